@@ -1,67 +1,100 @@
+import os
+from functools import lru_cache, partial
 
 from dotenv import load_dotenv
 from flask import Flask
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
-
-# Initialize extensions
-db = SQLAlchemy()
-migrate = Migrate()
+from models import db
+from sqlalchemy.pool import NullPool
+from utils import rate_limit_storage  # noqa: F401  registers the mmap:// limiter storage
+from utils.lazy_dispatch import LazyPrefixDispatcher
+from utils.password_hashing import HashingOverloaded
+from utils.read_replicas import read_replicas
+from werkzeug.utils import import_string
+
+# Initialize extensions (models share the db instance)
 limiter = Limiter(key_func=get_remote_address, default_limits=["200 per day", "50 per hour"])
 cors = CORS()
 
-def create_app(config_name=None):
-    """Application factory function"""
+CONFIG_OBJECTS = {
+    'testing': 'config.TestingConfig',
+    'production': 'config.ProductionConfig'
+}
+
+# Blueprints by URL prefix: (module, attribute). In lazy mode a module is
+# imported on the first request under its prefix.
+BLUEPRINTS = {
+    '/api/posts': ('routes.posts', 'posts_bp'),
+    '/api/authors': ('routes.authors', 'authors_bp'),
+    '/api/categories': ('routes.categories', 'categories_bp'),
+    '/api/search': ('routes.search', 'search_bp'),
+    '/api/newsletter': ('routes.newsletter', 'newsletter_bp'),
+    '/api/admin': ('routes.admin', 'admin_bp'),
+    '/api/auth': ('routes.auth', 'auth_bp'),
+    '/api/analytics': ('routes.analytics', 'bp'),
+    '/api/feeds': ('routes.feeds', 'bp')
+}
+
+@lru_cache(maxsize=None)
+def _load_environment():
+    """Load .env into os.environ once per process"""
+    load_dotenv()
+
+@lru_cache(maxsize=None)
+def _config_defaults(config_name):
+    """Uppercase settings of the selected config object, resolved once"""
+    config_object = import_string(CONFIG_OBJECTS.get(config_name, 'config.DevelopmentConfig'))
+    return {key: getattr(config_object, key) for key in dir(config_object) if key.isupper()}
+
+def create_app(config_name=None, config_overrides=None):
+    """
+    Application factory function
+
+    ``config_overrides`` is applied on top of the selected config before
+    extensions are initialized, e.g. to point tests or benchmarks at
+    their own database. With LAZY_BLUEPRINTS enabled, route modules are
+    imported on the first request under their URL prefix instead of here.
+    """
     app = Flask(__name__)
 
-    # Load environment variables
-    load_dotenv()
+    # Load environment variables and configure the application
+    _load_environment()
+    app.config.from_mapping(_config_defaults(config_name))
 
-    # Configure the application
-    if config_name == 'testing':
-        app.config.from_object('config.TestingConfig')
-    elif config_name == 'production':
-        app.config.from_object('config.ProductionConfig')
-    else:
-        app.config.from_object('config.DevelopmentConfig')
+    if config_overrides:
+        app.config.update(config_overrides)
 
-    # Initialize extensions
+    # Rate limit counters: memory:// (per process, also the test stand-in),
+    # mmap:///path for workers sharing one host, or an external store such
+    # as redis://host:6379 for multi-host deployments
+    app.config.setdefault('RATELIMIT_STORAGE_URI', os.getenv('RATELIMIT_STORAGE_URI', 'memory://'))
+    app.config.setdefault('RATELIMIT_STRATEGY', os.getenv('RATELIMIT_STRATEGY', 'sliding-window-counter'))
+    app.config.setdefault('LAZY_BLUEPRINTS', os.getenv('LAZY_BLUEPRINTS', '').lower() in ('1', 'true', 'yes'))
+
+    # Initialize extensions (replica binds must exist before the engines are made)
+    read_replicas.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
-    limiter.init_app(app)
-    cors.init_app(app, resources={r"/api/*": {"origins": "*"}})
+    _init_migrations(app)
+    _init_request_extensions(app)
+    _init_services(app)
 
     # Register blueprints
-    from routes.admin import admin_bp
-    from routes.authors import authors_bp
-    from routes.categories import categories_bp
-    from routes.newsletter import newsletter_bp
-    from routes.posts import posts_bp
-    from routes.search import search_bp
-
-    app.register_blueprint(posts_bp, url_prefix='/api/posts')
-    app.register_blueprint(authors_bp, url_prefix='/api/authors')
-    app.register_blueprint(categories_bp, url_prefix='/api/categories')
-    app.register_blueprint(search_bp, url_prefix='/api/search')
-    app.register_blueprint(newsletter_bp, url_prefix='/api/newsletter')
-    app.register_blueprint(admin_bp, url_prefix='/api/admin')
-
-    # Error handlers
-    @app.errorhandler(404)
-    def not_found(error):
-        return {'error': 'Resource not found'}, 404
+    if app.config['LAZY_BLUEPRINTS']:
+        app.wsgi_app = LazyPrefixDispatcher(app.wsgi_app, {
+            prefix: partial(_create_blueprint_app, app, prefix, module, attribute)
+            for prefix, (module, attribute) in BLUEPRINTS.items()
+        })
+    else:
+        for prefix, (module, attribute) in BLUEPRINTS.items():
+            app.register_blueprint(import_string(f'{module}:{attribute}'), url_prefix=prefix)
 
-    @app.errorhandler(429)
-    def ratelimit_handler(e):
-        return {'error': 'Rate limit exceeded'}, 429
+    # CLI commands
+    from cli import register_commands
+    register_commands(app)
 
-    @app.errorhandler(500)
-    def internal_error(error):
-        db.session.rollback()
-        return {'error': 'Internal server error'}, 500
+    _register_error_handlers(app)
 
     # Health check endpoint
     @app.route('/health')
@@ -81,8 +114,106 @@ def create_app(config_name=None):
 
     return app
 
-# Initialize the app
-app = create_app()
+def _init_migrations(app):
+    """Set up Flask-Migrate when running under the flask CLI"""
+    # Importing flask_migrate pulls in Alembic (over 100 modules) and only
+    # the ``flask db`` commands need it
+    if os.environ.get('FLASK_RUN_FROM_CLI') != 'true':
+        return
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+def _init_request_extensions(app):
+    """Extensions that hook into request handling"""
+    from services.instrumentation import instrumentation
+
+    limiter.init_app(app)
+    # The client revalidates cached reads with If-None-Match, so it must see ETag
+    cors.init_app(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=['ETag'])
+    instrumentation.init_app(app)
+    # Scrapers poll /metrics on a schedule; the per-client default limits
+    # would start refusing them within the hour
+    limiter.exempt(instrumentation.metrics_view)
+
+def _init_services(app):
+    """Set up the caches, search index and background workers"""
+    # Imported here rather than at module level so ``import app`` stays
+    # cheap. They still load before the first request: importing them
+    # registers the change listeners every write must go through.
+    from services import jobs  # noqa: F401  registers the built-in background jobs
+    from services.response_cache import response_cache
+    from services.search_index import search_index
+    from services.snapshots import snapshots
+    from services.view_buffer import view_buffer
+    from utils.job_queue import job_queue
+
+    response_cache.init_app(app)
+    search_index.init_app(app)
+    snapshots.init_app(app)
+    view_buffer.init_app(app)
+    job_queue.init_app(app)
+
+def _register_error_handlers(app):
+    @app.errorhandler(404)
+    def not_found(error):
+        return {'error': 'Resource not found'}, 404
+
+    @app.errorhandler(429)
+    def ratelimit_handler(e):
+        return {'error': 'Rate limit exceeded'}, 429
+
+    @app.errorhandler(HashingOverloaded)
+    def hashing_overloaded_handler(e):
+        return {'error': 'Service busy, please retry'}, 503, {'Retry-After': '1'}
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        db.session.rollback()
+        return {'error': 'Internal server error'}, 500
+
+def _shared_engine_options(engine):
+    """Options for an engine that borrows its connections from ``engine``"""
+    # Every checkout takes a connection from the parent's pool and closing
+    # it hands it back, so the parent's pool size still bounds the total
+    return {'url': engine.url, 'poolclass': NullPool, 'creator': engine.pool.connect}
+
+def _create_blueprint_app(parent, prefix, module, attribute):
+    """Build the child app serving one lazily loaded blueprint"""
+    child = Flask(__name__)
+    child.config.from_mapping(parent.config)
+
+    # Point the child's engines at the parent's pools so all prefixes
+    # share one pool per database
+    with parent.app_context():
+        engines = {key: _shared_engine_options(engine) for key, engine in db.engines.items()}
+    child.config['SQLALCHEMY_ENGINE_OPTIONS'] = engines.pop(None)
+    child.config['SQLALCHEMY_BINDS'] = engines
+    db.init_app(child)
+
+    # Reuse the parent's extensions and request hooks rather than running
+    # init_app again: a second limiter.init_app would give the limiter new
+    # storage and reset every rate limit counter
+    for name, extension in parent.extensions.items():
+        child.extensions.setdefault(name, extension)
+    child.json = type(parent.json)(child)
+    for function in parent.before_request_funcs.get(None, ()):
+        child.before_request(function)
+    for function in parent.after_request_funcs.get(None, ()):
+        child.after_request(function)
+    for function in parent.teardown_request_funcs.get(None, ()):
+        child.teardown_request(function)
+
+    child.register_blueprint(import_string(f'{module}:{attribute}'), url_prefix=prefix)
+    _register_error_handlers(child)
+    return child
+
+def __getattr__(name):
+    # The module-level app is built on first access (e.g. by a WSGI server
+    # loading ``app:app``), not on import
+    if name == 'app':
+        application = globals()['app'] = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
+    create_app().run(host='0.0.0.0', port=5000)
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the AI Insights Blog API.
+
+Run from the backend directory, e.g. ``python -m benchmarks.validators``.
+"""
@@ -0,0 +1,284 @@
+"""
+Endpoint benchmarks against a seeded SQLite database.
+
+Each size gets its own database under benchmarks/.data, seeded once with
+a fixed random seed and reused by later runs. Every scenario is driven
+in-process through the Flask test client and over HTTP through a
+threaded local WSGI server with concurrent clients. Results are compared
+with benchmarks/baseline.json and the run fails on regressions, on runs
+the baseline does not cover, and when no baseline has been recorded.
+
+Usage:
+    python -m benchmarks.api --sizes 10000 100000 1000000
+    python -m benchmarks.api --sizes 10000 --update-baseline
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from socketserver import ThreadingMixIn
+from typing import Callable, Optional
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+
+from benchmarks.report import (DEFAULT_TOLERANCE, Summary, compare, format_table, load_baseline,
+                               save_baseline, summarize)
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCHMARK_DIR, '.data')
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+SIZES = (10_000, 100_000, 1_000_000)
+SEED = 2024
+INSERT_CHUNK = 10_000
+# Articles that get related-article rows; scenarios only request these
+RELATED_SEEDED = 10_000
+VOCABULARY = [
+    f'{prefix}{suffix}'
+    for prefix in ('neural', 'model', 'data', 'vector', 'agent', 'token', 'graph', 'prompt',
+                   'train', 'infer', 'cloud', 'robot', 'policy', 'signal', 'latent', 'search')
+    for suffix in ('', 's', 'ing', 'er', 'ed', 'ly', 'ism', 'ware')
+]
+
+USER_EMAIL = 'bench@example.com'
+USER_PASSWORD = 'Bench-pass1!'
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[random.Random, int], str]
+    body: Optional[Callable[[random.Random, int], dict]] = None
+    auth: bool = False
+
+SCENARIOS = [
+    Scenario('login', 'POST', lambda rng, n: '/api/auth/login',
+             body=lambda rng, n: {'email': USER_EMAIL, 'password': USER_PASSWORD}),
+    Scenario('me', 'GET', lambda rng, n: '/api/auth/me', auth=True),
+    Scenario('posts', 'GET', lambda rng, n: '/api/posts?limit=20'),
+    Scenario('search', 'GET', lambda rng, n: f'/api/search?q={rng.choice(VOCABULARY)}'),
+    Scenario('related', 'GET', lambda rng, n: f'/api/posts/{rng.randint(1, min(n, RELATED_SEEDED))}/related'),
+    Scenario('feeds', 'GET', lambda rng, n: '/api/feeds/rss'),
+    Scenario('views', 'POST', lambda rng, n: '/api/analytics/view',
+             body=lambda rng, n: {'articleId': rng.randint(1, n)}),
+]
+
+def build_app(size, search_backend):
+    from app import create_app
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    suffix = 'fts5' if search_backend == 'fts5' else 'idx'
+    return create_app('testing', config_overrides={
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(DATA_DIR, f'articles-{size}.db')}",
+        'SEARCH_BACKEND': search_backend,
+        'SEARCH_INDEX_PATH': os.path.join(DATA_DIR, f'search-{size}.{suffix}'),
+        'RATELIMIT_ENABLED': False,
+        'RESPONSE_CACHE_BACKEND': 'none',
+        'TESTING': False
+    })
+
+def seed(app, size):
+    """Create and fill the database for ``size`` articles unless already seeded"""
+    from models import Article, RelatedArticle, db
+    from models.user import User
+    from services.search_index import search_index
+
+    with app.app_context():
+        db.create_all()
+        if db.session.scalar(db.select(db.func.count(Article.id))) == size:
+            return
+
+        print(f'Seeding {size:,} articles...', file=sys.stderr)
+        rng = random.Random(SEED)
+        db.session.execute(Article.__table__.delete())
+        db.session.execute(RelatedArticle.__table__.delete())
+        if User.query.filter_by(email=USER_EMAIL).first() is None:
+            db.session.add(User(username='bench', email=USER_EMAIL, password=USER_PASSWORD,
+                                first_name='Bench', last_name='Mark', role='admin'))
+        db.session.commit()
+
+        start = datetime(2020, 1, 1)
+        for offset in range(0, size, INSERT_CHUNK):
+            rows = []
+            for i in range(offset, min(offset + INSERT_CHUNK, size)):
+                words = rng.choices(VOCABULARY, k=80)
+                published_at = start + timedelta(minutes=i)
+                rows.append({
+                    'title': ' '.join(words[:6]).title(),
+                    'slug': f'article-{i + 1}',
+                    'content': ' '.join(words),
+                    'excerpt': ' '.join(words[:20]),
+                    'status': 'published' if rng.random() < 0.95 else 'draft',
+                    'is_featured': rng.random() < 0.02,
+                    'published_at': published_at,
+                    'created_at': published_at,
+                    'updated_at': published_at
+                })
+            db.session.execute(Article.__table__.insert(), rows)
+            db.session.commit()
+
+        related = [
+            {'article_id': i, 'related_id': (i + k - 1) % size + 1, 'rank': k, 'score': 1.0 / k}
+            for i in range(1, min(size, RELATED_SEEDED) + 1)
+            for k in range(1, 6)
+        ]
+        db.session.execute(RelatedArticle.__table__.insert(), related)
+        db.session.commit()
+
+        search_index.rebuild()
+
+def _has_route(app, scenario, path):
+    adapter = app.url_map.bind('localhost')
+    try:
+        adapter.match(path.split('?', 1)[0], method=scenario.method)
+    except (NotFound, MethodNotAllowed):
+        return False
+    return True
+
+def _login(app):
+    response = app.test_client().post('/api/auth/login',
+                                      json={'email': USER_EMAIL, 'password': USER_PASSWORD})
+    return (response.get_json() or {}).get('token')
+
+def run_inprocess(app, scenario, size, requests, token):
+    rng = random.Random(SEED)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'} if scenario.auth else {}
+    latencies, errors = [], 0
+
+    wall_start = time.perf_counter()
+    for _ in range(requests):
+        path = scenario.path(rng, size)
+        body = scenario.body(rng, size) if scenario.body else None
+        start = time.perf_counter()
+        response = client.open(path, method=scenario.method, json=body, headers=headers)
+        response.get_data()
+        latencies.append(time.perf_counter() - start)
+        errors += response.status_code >= 400
+    return summarize(latencies, time.perf_counter() - wall_start, errors)
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def run_wsgi(app, scenario, size, requests, token, concurrency):
+    server = make_server('127.0.0.1', 0, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+    headers = {'Content-Type': 'application/json'}
+    if scenario.auth:
+        headers['Authorization'] = f'Bearer {token}'
+
+    def worker(worker_id):
+        rng = random.Random(SEED + worker_id)
+        latencies, errors = [], 0
+        for _ in range(requests // concurrency):
+            path = scenario.path(rng, size)
+            body = json.dumps(scenario.body(rng, size)) if scenario.body else None
+            start = time.perf_counter()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            try:
+                connection.request(scenario.method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                errors += response.status >= 400
+            except OSError:
+                errors += 1
+            finally:
+                connection.close()
+            latencies.append(time.perf_counter() - start)
+        return latencies, errors
+
+    try:
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(worker, range(concurrency)))
+        wall = time.perf_counter() - wall_start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    latencies = [latency for worker_latencies, _ in results for latency in worker_latencies]
+    return summarize(latencies, wall, sum(errors for _, errors in results))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark API endpoints against seeded databases.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--modes', nargs='+', choices=['inprocess', 'wsgi'], default=['inprocess', 'wsgi'])
+    parser.add_argument('--scenarios', nargs='+', choices=[s.name for s in SCENARIOS],
+                        default=[s.name for s in SCENARIOS])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per scenario and mode.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients in wsgi mode.')
+    parser.add_argument('--search-backend', choices=['memory', 'fts5'], default='fts5')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', help='Also write results as JSON to this file.')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        app = build_app(size, args.search_backend)
+        seed(app, size)
+        token = _login(app)
+
+        for scenario in (s for s in SCENARIOS if s.name in args.scenarios):
+            if not _has_route(app, scenario, scenario.path(random.Random(SEED), size)):
+                print(f'Skipping {scenario.name}: no route registered', file=sys.stderr)
+                continue
+            if scenario.auth and not token:
+                print(f'Skipping {scenario.name}: login failed', file=sys.stderr)
+                continue
+            # Warm caches and lazily started workers before measuring
+            run_inprocess(app, scenario, size, min(20, args.requests), token)
+            for mode in args.modes:
+                if mode == 'inprocess':
+                    summary = run_inprocess(app, scenario, size, args.requests, token)
+                else:
+                    summary = run_wsgi(app, scenario, size, args.requests, token, args.concurrency)
+                results[f'{size}:{mode}:{scenario.name}'] = summary
+
+    print(format_table(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({key: summary.to_dict() for key, summary in results.items()}, f, indent=2)
+
+    if args.update_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update({key: summary.to_dict() for key, summary in results.items()})
+        save_baseline(args.baseline, {key: Summary(**value) for key, value in baseline.items()})
+        print(f'Baseline written to {args.baseline}')
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f'No baseline at {args.baseline}; record one with --update-baseline', file=sys.stderr)
+        return 2
+    # A run the baseline does not cover would otherwise pass unchecked
+    unchecked = sorted(set(results) - set(baseline))
+    for key in unchecked:
+        print(f'NO BASELINE {key}', file=sys.stderr)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}', file=sys.stderr)
+    return 1 if regressions or unchecked else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
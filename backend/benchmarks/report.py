@@ -0,0 +1,88 @@
+"""
+Latency summaries and baseline comparison for the benchmark runners.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Sequence
+
+# Allowed slowdown before a result counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass
+class Summary:
+    """Latency percentiles (milliseconds) and throughput for one scenario run"""
+    requests: int
+    errors: int
+    p50_ms: float
+    p99_ms: float
+    throughput: float
+
+    def to_dict(self):
+        return asdict(self)
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(latencies: List[float], wall_seconds: float, errors: int = 0) -> Summary:
+    """Summarize per-request latencies (seconds) measured over ``wall_seconds``"""
+    values = sorted(latencies)
+    return Summary(
+        requests=len(values),
+        errors=errors,
+        p50_ms=round(percentile(values, 0.50) * 1000, 3),
+        p99_ms=round(percentile(values, 0.99) * 1000, 3),
+        throughput=round(len(values) / wall_seconds, 1) if wall_seconds > 0 else 0.0
+    )
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_baseline(path: str, results: Dict[str, Summary]):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({key: summary.to_dict() for key, summary in sorted(results.items())}, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+def compare(results: Dict[str, Summary], baseline: Dict[str, dict],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Return a description of every regression against ``baseline``.
+
+    A run regresses when its p99 latency grows, or its throughput drops,
+    by more than ``tolerance``, or when it errors and the baseline did
+    not. Keys missing from the baseline are not checked.
+    """
+    regressions = []
+    for key, summary in sorted(results.items()):
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if summary.p99_ms > expected['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p99 {summary.p99_ms}ms > baseline {expected['p99_ms']}ms")
+        if summary.throughput < expected['throughput'] * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {summary.throughput}/s < baseline {expected['throughput']}/s"
+            )
+        if summary.errors and not expected.get('errors'):
+            regressions.append(f'{key}: {summary.errors} failed requests')
+    return regressions
+
+def format_table(results: Dict[str, Summary]) -> str:
+    lines = [f"{'run':<40} {'reqs':>7} {'errs':>5} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}"]
+    for key, summary in sorted(results.items()):
+        lines.append(
+            f'{key:<40} {summary.requests:>7} {summary.errors:>5} '
+            f'{summary.p50_ms:>9.2f} {summary.p99_ms:>9.2f} {summary.throughput:>9.1f}'
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,93 @@
+"""
+Compare Marshmallow dumps with the precompiled serializers on user listings.
+
+Rows come from an in-memory SQLite users table. Each path is timed
+end to end, from the query to the JSON body:
+
+- ORM objects through UserSchema(many=True) and the app's JSON provider
+- Core rows through the compiled serializer and utils.serializers.dumps
+
+Usage:
+    python -m benchmarks.serializers --rows 100000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from models.user import User, UserSchema
+from utils import serializers
+from utils.serializers import compile_serializer
+
+def seed(engine, rows, seed_value):
+    rng = random.Random(seed_value)
+    User.__table__.create(engine)
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {
+                'username': f'user{i}',
+                'email': f'user{i}@example.com',
+                'password_hash': 'x',
+                'first_name': rng.choice(['Ada', 'Alan', 'Grace', 'Zoë']),
+                'last_name': f'Last{i}',
+                'bio': ' '.join(rng.choices(['data', 'model', 'agent', 'graph'], k=12)) if i % 3 else None,
+                'profile_image': f'https://example.com/{i}.png' if i % 2 else None,
+                'role': 'admin' if i % 50 == 0 else 'author',
+                'is_active': i % 10 != 0,
+                'created_at': start + timedelta(minutes=i),
+                'updated_at': start + timedelta(minutes=i, seconds=rng.randint(0, 59))
+            }
+            for i in range(rows)
+        ])
+
+def timed(label, fn, rows):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<34} {elapsed:8.3f}s  {rows / elapsed:12,.0f} rows/s')
+    return result, elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=13)
+    args = parser.parse_args(argv)
+
+    engine = create_engine('sqlite://')
+    seed(engine, args.rows, args.seed)
+    app = Flask(__name__)
+    schema = UserSchema(many=True)
+    serializer = compile_serializer(UserSchema)
+    print(f'{args.rows:,} rows, orjson {"enabled" if serializers.orjson else "not installed"}')
+
+    with app.app_context(), Session(engine) as session:
+        def marshmallow_path():
+            users = session.scalars(select(User)).all()
+            body = app.json.dumps(schema.dump(users))
+            session.expunge_all()
+            return body
+
+        def compiled_path():
+            rows = session.execute(select(*serializer.columns(User)))
+            return serializers.dumps(serializer.many(rows))
+
+        rows = session.execute(select(*serializer.columns(User))).all()
+        dump_only, dump_time = timed('UserSchema.dump (rows only)', lambda: schema.dump(rows), args.rows)
+        many_only, many_time = timed('compiled serializer (rows only)', lambda: serializer.many(rows), args.rows)
+        assert dump_only == many_only, 'serialized output differs'
+        print(f'{"serialization speedup":<34} {dump_time / many_time:8.2f}x')
+
+        expected, slow_time = timed('ORM + UserSchema + json', marshmallow_path, args.rows)
+        actual, fast_time = timed('Core rows + compiled + dumps', compiled_path, args.rows)
+        assert json.loads(expected) == json.loads(actual), 'JSON output differs'
+        print(f'{"end-to-end speedup":<34} {slow_time / fast_time:8.2f}x')
+
+if __name__ == '__main__':
+    main()
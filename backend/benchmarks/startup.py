@@ -0,0 +1,108 @@
+"""
+Cold-start report for the application factory.
+
+Each mode runs in a fresh interpreter under ``python -X importtime``.
+The report shows:
+
+- the time spent importing app.py and running create_app, eager vs lazy;
+- in lazy mode, the first request to every blueprint prefix;
+- import cost broken down by module and by top-level package.
+
+Usage:
+    python -m benchmarks.startup --config testing --top 25
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import List, NamedTuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line of timings
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app(sys.argv[1], {
+    "LAZY_BLUEPRINTS": sys.argv[2] == "lazy",
+    # Only the cost of loading each prefix matters, not its response
+    "PROPAGATE_EXCEPTIONS": False,
+    "RATELIMIT_ENABLED": False
+})
+created = time.perf_counter()
+first_hits = {}
+if sys.argv[2] == "lazy":
+    client = application.test_client()
+    for prefix in app_module.BLUEPRINTS:
+        hit = time.perf_counter()
+        client.get(prefix)
+        first_hits[prefix] = time.perf_counter() - hit
+print(json.dumps({"import": imported - start, "create_app": created - imported, "first_hits": first_hits}))
+'''
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Parse ``-X importtime`` output into per-module timings"""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = [field.strip() for field in line[len('import time:'):].split('|')]
+        if len(fields) != 3 or not fields[0].isdigit():
+            continue
+        timings.append(ImportTiming(fields[2].strip(), int(fields[0]), int(fields[1])))
+    return timings
+
+def by_package(timings: List[ImportTiming]):
+    """Total self time per top-level package, largest first"""
+    totals = defaultdict(int)
+    for timing in timings:
+        totals[timing.module.split('.', 1)[0]] += timing.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+def run_probe(config_name, mode):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE, config_name, mode],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'{mode} probe failed:\n{result.stderr[-2000:]}')
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report cold-start time and import cost.')
+    parser.add_argument('--config', default='testing')
+    parser.add_argument('--top', type=int, default=20, help='Modules and packages to list.')
+    args = parser.parse_args(argv)
+
+    for mode in ('eager', 'lazy'):
+        timings, imports = run_probe(args.config, mode)
+        total_ms = sum(timing.self_us for timing in imports) / 1000
+        print(f'== {mode}: import app {timings["import"] * 1000:.1f} ms, '
+              f'create_app {timings["create_app"] * 1000:.1f} ms, '
+              f'{len(imports)} modules ({total_ms:.1f} ms importing)')
+
+        for prefix, seconds in sorted(timings['first_hits'].items(), key=lambda item: -item[1]):
+            print(f'   first request {prefix:<20} {seconds * 1000:8.1f} ms')
+
+        print(f'   {"module (cumulative)":<48} {"self ms":>9} {"cum ms":>9}')
+        for timing in sorted(imports, key=lambda t: t.cumulative_us, reverse=True)[:args.top]:
+            print(f'   {timing.module:<48} {timing.self_us / 1000:>9.1f} {timing.cumulative_us / 1000:>9.1f}')
+
+        print(f'   {"package (self)":<48} {"self ms":>9}')
+        for package, self_us in by_package(imports)[:args.top]:
+            print(f'   {package:<48} {self_us / 1000:>9.1f}')
+        print()
+
+if __name__ == '__main__':
+    main()
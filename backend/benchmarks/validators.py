@@ -0,0 +1,70 @@
+"""
+Compare the per-item validators with the batch validators.
+
+Usage:
+    python -m benchmarks.validators --rows 1000000
+"""
+
+import argparse
+import random
+import string
+import time
+
+from utils.validators import (_email_memo, validate_email, validate_emails, validate_password,
+                              validate_passwords)
+
+def make_emails(rows, seed, distinct_ratio=0.3):
+    """Mostly valid addresses with repeats and a share of malformed ones"""
+    rng = random.Random(seed)
+    distinct = max(1, int(rows * distinct_ratio))
+    pool = []
+    for i in range(distinct):
+        roll = rng.random()
+        if roll < 0.8:
+            pool.append(f'user{i}.{rng.choice(string.ascii_lowercase)}@example{i % 97}.com')
+        elif roll < 0.9:
+            pool.append(f'user{i}@example{i % 97}')
+        else:
+            pool.append(f'user {i}@@example.com')
+    return [pool[rng.randrange(distinct)] for _ in range(rows)]
+
+def make_passwords(rows, seed):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '@$!%*?&#'
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(6, 16))) for _ in range(rows)]
+
+def timed(label, fn, values):
+    start = time.perf_counter()
+    results = fn(values)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {elapsed:8.3f}s  {len(values) / elapsed:12,.0f} rows/s')
+    return results, elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=13)
+    parser.add_argument('--distinct', type=float, nargs='+', default=[1.0, 0.3, 0.05],
+                        help='Share of distinct emails in each email run.')
+    args = parser.parse_args(argv)
+    print(f'{args.rows:,} rows')
+
+    for ratio in args.distinct:
+        emails = make_emails(args.rows, args.seed, distinct_ratio=ratio)
+        _email_memo.clear()
+        print(f'emails, {ratio:.0%} distinct')
+        loop_emails, loop_time = timed('validate_email (loop)', lambda v: [validate_email(e) for e in v], emails)
+        batch_emails, batch_time = timed('validate_emails (batch)', validate_emails, emails)
+        assert loop_emails == batch_emails, 'email results differ'
+        print(f'{"email speedup":<28} {loop_time / batch_time:8.2f}x')
+
+    passwords = make_passwords(args.rows, args.seed)
+    print('passwords')
+
+    loop_passwords, loop_time = timed('validate_password (loop)', lambda v: [validate_password(p) for p in v], passwords)
+    batch_passwords, batch_time = timed('validate_passwords (batch)', validate_passwords, passwords)
+    assert loop_passwords == batch_passwords, 'password results differ'
+    print(f'{"password speedup":<28} {loop_time / batch_time:8.2f}x')
+
+if __name__ == '__main__':
+    main()
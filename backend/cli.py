@@ -0,0 +1,247 @@
+"""
+Flask CLI commands for maintenance tasks.
+
+Commands are grouped by subsystem and registered on the app in
+create_app, e.g. ``flask search rebuild``.
+"""
+
+import json
+import os
+import time
+
+import click
+from flask.cli import AppGroup
+
+search_cli = AppGroup('search', help='Full-text search index commands.')
+
+@search_cli.command('rebuild')
+@click.option('--batch-size', default=500, show_default=True, help='Articles loaded per query batch.')
+def rebuild_search_index(batch_size):
+    """Re-index every published article."""
+    from services.search_index import search_index
+
+    count = search_index.rebuild(batch_size=batch_size)
+    click.echo(f'Indexed {count} articles')
+
+related_cli = AppGroup('related', help='Related-articles index commands.')
+
+@related_cli.command('rebuild')
+@click.option('--top-k', default=10, show_default=True, help='Related articles stored per article.')
+def rebuild_related(top_k):
+    """Recompute related articles for every published article."""
+    from services.related_articles import RelatedArticlesJob
+
+    written = RelatedArticlesJob(top_k=top_k).rebuild()
+    click.echo(f'Wrote {written} related-article rows')
+
+@related_cli.command('refresh')
+@click.option('--top-k', default=10, show_default=True, help='Related articles stored per article.')
+@click.option('--watch', type=int, default=0, help='Keep refreshing every N seconds.')
+def refresh_related(top_k, watch):
+    """Recompute rows affected by articles changed since the last refresh."""
+    from services.related_articles import RelatedArticlesJob
+
+    job = RelatedArticlesJob(top_k=top_k)
+    while True:
+        written = job.refresh()
+        click.echo(f'Wrote {written} related-article rows')
+        if not watch:
+            break
+        time.sleep(watch)
+
+newsletter_cli = AppGroup('newsletter', help='Newsletter subscriber and delivery commands.')
+
+@newsletter_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Records validated and inserted per batch.')
+def import_newsletter_subscribers(path, fmt, chunk_size):
+    """Import subscribers from a CSV or NDJSON file."""
+    from services.newsletter import import_subscribers, read_records
+
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    with open(path, 'rb') as stream:
+        result = import_subscribers(read_records(stream, fmt), chunk_size=chunk_size)
+    click.echo(f'Imported {result.imported}, skipped {result.duplicates} duplicates '
+               f'and {result.invalid} invalid records')
+    for error in result.errors:
+        click.echo(f"  record {error['record']}: {error['email']!r} - {error['error']}", err=True)
+
+@newsletter_cli.command('send')
+@click.option('--subject', required=True, help='Subject line; $placeholders are filled from --var.')
+@click.option('--text', 'text_path', type=click.Path(exists=True, dir_okay=False), required=True,
+              help='Plain-text template file.')
+@click.option('--html', 'html_path', type=click.Path(exists=True, dir_okay=False), help='HTML template file.')
+@click.option('--var', 'variables', multiple=True, help='Template variable as name=value.')
+@click.option('--workers', default=8, show_default=True, help='Concurrent sending threads.')
+def send_newsletter_command(subject, text_path, html_path, variables, workers):
+    """Render a newsletter once and send it to every active subscriber."""
+    from services.newsletter import render_message, send_newsletter
+
+    context = dict(variable.split('=', 1) for variable in variables)
+    with open(text_path, encoding='utf-8') as f:
+        text_template = f.read()
+    html_template = None
+    if html_path:
+        with open(html_path, encoding='utf-8') as f:
+            html_template = f.read()
+
+    message = render_message(subject, text_template, html_template, **context)
+    result = send_newsletter(message, workers=workers)
+    click.echo(f'Sent {result.sent}, failed {result.failed}')
+    for failure in result.failures:
+        click.echo(f"  {failure['email']}: {failure['error']}", err=True)
+
+catalog_cli = AppGroup('catalog', help='Category and tag summary commands.')
+
+@catalog_cli.command('rebuild')
+def rebuild_catalog():
+    """Recompute category and tag counts and latest articles."""
+    from models.catalog_stats import rebuild_catalog_stats
+
+    for table, rows in rebuild_catalog_stats().items():
+        click.echo(f'Wrote {rows} {table} rows')
+
+views_cli = AppGroup('views', help='Article view rollup commands.')
+
+@views_cli.command('compact')
+@click.option('--lag', type=int, help='Seconds raw counters are left alone (VIEW_ROLLUP_LAG_SECONDS).')
+@click.option('--watch', type=int, default=0, help='Keep compacting every N seconds.')
+def compact_views(lag, watch):
+    """Compact raw view counters into rollups and apply retention."""
+    from services.view_rollups import ViewRollupJob
+
+    job = ViewRollupJob(lag_seconds=lag)
+    while True:
+        written, deleted = job.run()
+        click.echo('Wrote ' + ', '.join(f'{rows} {level}' for level, rows in written.items()) + ' rollups; '
+                   'deleted ' + (', '.join(f'{rows} {level}' for level, rows in deleted.items()) or 'nothing'))
+        if not watch:
+            break
+        time.sleep(watch)
+
+jobs_cli = AppGroup('jobs', help='Background job queue commands.')
+
+@jobs_cli.command('worker')
+@click.option('--processes', default=2, show_default=True, help='Worker processes; 0 runs jobs in this process.')
+@click.option('--config', 'config_name', help='Config name the worker processes build their app with.')
+@click.option('--poll', default=1.0, show_default=True, help='Seconds between checks of an idle queue.')
+@click.option('--burst', is_flag=True, help='Exit once no job is due.')
+def run_job_workers(processes, config_name, poll, burst):
+    """Run queued jobs until interrupted."""
+    from flask import current_app
+    from utils.job_queue import job_queue, run_workers
+
+    if processes <= 0:
+        ran = job_queue.work(current_app._get_current_object(), poll_interval=poll, burst=burst)
+        click.echo(f'Ran {ran} jobs')
+        return
+
+    # Workers build their own app but must share this one's database and queue
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': current_app.config['SQLALCHEMY_DATABASE_URI'],
+        'JOB_QUEUE_PATH': job_queue.path
+    }
+    click.echo(f'Starting {processes} job workers on {job_queue.path}')
+    run_workers('app:create_app', (config_name, overrides), processes=processes, poll_interval=poll, burst=burst)
+
+@jobs_cli.command('enqueue')
+@click.argument('name')
+@click.option('--arg', 'arguments', multiple=True, help='Job argument as name=<JSON value>.')
+@click.option('--priority', default=0, show_default=True, help='Higher priorities run first.')
+def enqueue_job(name, arguments, priority):
+    """Queue a job; arguments are JSON, e.g. --arg article_ids=[1,2]."""
+    from utils.job_queue import UnknownJob, job_queue
+
+    try:
+        args = {key: json.loads(value) for key, value in (argument.split('=', 1) for argument in arguments)}
+        job_id = job_queue.enqueue(name, args, priority=priority)
+    except (UnknownJob, ValueError) as e:
+        raise click.UsageError(str(e))
+    click.echo(f'Queued job {job_id}')
+
+@jobs_cli.command('list')
+@click.option('--status', type=click.Choice(['queued', 'running', 'succeeded', 'failed', 'cancelled']))
+@click.option('--limit', default=20, show_default=True)
+def list_jobs(status, limit):
+    """Show the newest jobs."""
+    from utils.job_queue import job_queue
+
+    for job in job_queue.list(status=status, limit=limit):
+        progress = f"{job['progress']:.0%}" if job['progress'] is not None else '-'
+        click.echo(f"{job['id']:>6}  {job['name']:<22} {job['status']:<10} {progress:>5}  "
+                   f"attempt {job['attempts']}/{job['max_attempts']}  {job['message'] or ''}")
+
+@jobs_cli.command('purge')
+@click.option('--older-than', default=7, show_default=True, help='Days since the job finished.')
+def purge_jobs(older_than):
+    """Delete finished jobs."""
+    from utils.job_queue import job_queue
+
+    click.echo(f'Deleted {job_queue.purge(older_than * 86400)} jobs')
+
+snapshots_cli = AppGroup('snapshots', help='Static JSON snapshot commands.')
+
+@snapshots_cli.command('rebuild')
+@click.option('--processes', default=os.cpu_count() or 1, show_default='CPU count',
+              help='Rendering processes; 1 renders in this process.')
+@click.option('--config', 'config_name', help='Config name the rendering processes build their app with.')
+def rebuild_snapshots(processes, config_name):
+    """Render every snapshot file from scratch."""
+    from flask import current_app
+    from services.snapshots import snapshots
+
+    if snapshots.directory is None:
+        raise click.UsageError('SNAPSHOT_DIR is not configured')
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': current_app.config['SQLALCHEMY_DATABASE_URI'],
+        'SNAPSHOT_DIR': snapshots.directory
+    }
+    result = snapshots.rebuild(processes=processes, factory='app:create_app', factory_args=(config_name, overrides))
+    click.echo(f"Rendered {result['articles']} articles; wrote {result['written']} files, "
+               f"removed {result['removed']}")
+
+@snapshots_cli.command('refresh')
+@click.option('--full', is_flag=True, help='Render every article, not only changed ones.')
+def refresh_snapshots(full):
+    """Re-render snapshots of content changed since the last run."""
+    from services.snapshots import snapshots
+
+    if snapshots.directory is None:
+        raise click.UsageError('SNAPSHOT_DIR is not configured')
+    result = snapshots.refresh(full=full)
+    click.echo(f"Rendered {result['articles']} articles; wrote {result['written']} files, "
+               f"removed {result['removed']}")
+
+articles_cli = AppGroup('articles', help='Article rendering commands.')
+
+@articles_cli.command('render')
+@click.option('--processes', default=os.cpu_count() or 1, show_default='CPU count',
+              help='Rendering processes; 1 renders in this process.')
+@click.option('--config', 'config_name', help='Config name the rendering processes build their app with.')
+def render_articles(processes, config_name):
+    """Render stored HTML, excerpts and reading stats that are missing or stale."""
+    from flask import current_app
+    from services.article_rendering import backfill_renderings
+    from services.snapshots import snapshots
+    from utils.job_queue import job_queue
+
+    overrides = {'SQLALCHEMY_DATABASE_URI': current_app.config['SQLALCHEMY_DATABASE_URI']}
+    checked, written = backfill_renderings(processes=processes, factory='app:create_app',
+                                           factory_args=(config_name, overrides))
+    click.echo(f'Checked {checked} articles, rendered {written}')
+    # Renderings written here bypass the model hooks that queue this
+    if written and snapshots.directory is not None:
+        job_queue.enqueue('snapshots.refresh', {'full': True}, priority=5, unique=True)
+        click.echo('Queued a full snapshot refresh')
+
+def register_commands(app):
+    """Register all CLI command groups on the app"""
+    app.cli.add_command(search_cli)
+    app.cli.add_command(related_cli)
+    app.cli.add_command(newsletter_cli)
+    app.cli.add_command(catalog_cli)
+    app.cli.add_command(views_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(snapshots_cli)
+    app.cli.add_command(articles_cli)
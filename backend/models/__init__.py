@@ -4,14 +4,21 @@
 Initialize the database models for the AI Insights Blog API.
 
 This module:
-- Sets up SQLAlchemy instance
+- Sets up SQLAlchemy instance, with sessions routing safe reads to replicas
 - Defines base model class
+- Provides change hooks for caches derived from model data
+- Provides a batched write mode for bulk jobs
 - Imports all model classes
 - Configures model relationships
 """
 
+from contextlib import contextmanager
+from datetime import timezone
+
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData
+from utils.read_replicas import RoutingSession
 
 # Define naming convention for constraints
 naming_convention = {
@@ -22,8 +29,120 @@ naming_convention = {
     "pk": "pk_%(table_name)s"
 }
 
-# Initialize SQLAlchemy with custom metadata
-db = SQLAlchemy(metadata=MetaData(naming_convention=naming_convention))
+# Initialize SQLAlchemy with custom metadata; reads in GET requests may use
+# a replica (see utils.read_replicas)
+db = SQLAlchemy(metadata=MetaData(naming_convention=naming_convention),
+                session_options={'class_': RoutingSession})
+
+# Callbacks run after a BaseModel write has been committed
+_change_listeners = []
+
+def on_model_change(callback):
+    """Register ``callback(instance, action)`` to run after save/update/delete"""
+    _change_listeners.append(callback)
+    return callback
+
+def notify_model_change(instance, action):
+    """Notify registered listeners that ``instance`` was written"""
+    for callback in _change_listeners:
+        callback(instance, action)
+
+def db_now():
+    """Database time as a naive UTC datetime, comparable with the server-stamped columns"""
+    now = db.session.scalar(db.select(db.func.now()))
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    return now
+
+# Rows flushed per executemany batch inside write_batch()
+DEFAULT_BATCH_SIZE = 500
+
+class WriteBatch:
+    """Unit of work collecting BaseModel writes until the batch is flushed"""
+
+    def __init__(self, session, batch_size, commit_chunks=False):
+        self.session = session
+        self.batch_size = batch_size
+        self.commit_chunks = commit_chunks
+        self.pending = 0
+        # Written instances awaiting notification, keyed by identity so
+        # repeated writes to one instance are notified once
+        self.changes = {}
+
+    def record(self, instance, action):
+        """Record a write and flush once ``batch_size`` writes are pending"""
+        self.changes.pop(id(instance), None)
+        self.changes[id(instance)] = (instance, action)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Send pending inserts, updates and deletes as executemany batches"""
+        if self.pending:
+            self.session.flush()
+            self.pending = 0
+            if self.commit_chunks:
+                self.commit()
+
+    def commit(self):
+        """Commit everything flushed so far, then notify change listeners"""
+        self.session.commit()
+        changes = list(self.changes.values())
+        self.changes.clear()
+        # Writes made by listeners are not part of this batch
+        self.session.info.pop('write_batch', None)
+        try:
+            for instance, action in changes:
+                notify_model_change(instance, action)
+        finally:
+            self.session.info['write_batch'] = self
+
+@contextmanager
+def write_batch(batch_size=None, commit_chunks=False):
+    """
+    Defer commits for BaseModel writes made inside the block.
+
+    save/update/delete only record the change; pending rows are flushed
+    every ``batch_size`` writes and committed once when the block exits.
+    Change listeners run after that commit, and not at all if the block
+    raises. Nested blocks join the outermost batch.
+
+    The batch holds every written instance until the listeners have run.
+    For imports too large for that, ``commit_chunks`` commits and notifies
+    each flushed chunk instead, so only ``batch_size`` instances are held;
+    an error then rolls back the current chunk only.
+    """
+    session = db.session
+    batch = session.info.get('write_batch')
+    if batch is not None:
+        yield batch
+        return
+
+    if batch_size is None:
+        batch_size = current_app.config.get('WRITE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    batch = WriteBatch(session, batch_size, commit_chunks)
+    session.info['write_batch'] = batch
+    try:
+        yield batch
+        batch.flush()
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.info.pop('write_batch', None)
+
+    for instance, action in batch.changes.values():
+        notify_model_change(instance, action)
+
+def _defer_write(instance, action):
+    """Record the write on the active batch, if any"""
+    batch = db.session.info.get('write_batch')
+    if batch is None:
+        return False
+    batch.record(instance, action)
+    return True
 
 class BaseModel(db.Model):
     """Base model class with common functionality"""
@@ -36,34 +155,73 @@ class BaseModel(db.Model):
     def save(self):
         """Save the current instance to the database"""
         db.session.add(self)
+        if _defer_write(self, 'save'):
+            return
         db.session.commit()
+        notify_model_change(self, 'save')
 
     def delete(self):
         """Delete the current instance from the database"""
         db.session.delete(self)
+        if _defer_write(self, 'delete'):
+            return
         db.session.commit()
+        notify_model_change(self, 'delete')
 
     def update(self, **kwargs):
         """Update the current instance with provided attributes"""
         for key, value in kwargs.items():
             setattr(self, key, value)
+        if _defer_write(self, 'update'):
+            return
         db.session.commit()
+        notify_model_change(self, 'update')
+
+    @classmethod
+    def bulk_save(cls, instances, batch_size=None, commit_chunks=False):
+        """Save many instances, flushing in batches and committing once (see write_batch)"""
+        with write_batch(batch_size, commit_chunks) as batch:
+            for instance in instances:
+                db.session.add(instance)
+                batch.record(instance, 'save')
 
 # Import all models to ensure they're registered with SQLAlchemy
 from .article import Article
+from .article_rendering import ArticleRendering
 from .article_view import ArticleView
+from .article_view_count import ArticleViewCount
+from .article_view_rollup import ArticleViewRollup
 from .author import Author
+from .catalog_stats import CategoryStat, TagStat
 from .category import Category
 from .newsletter_subscriber import NewsletterSubscriber
+from .related_article import RelatedArticle, RelatedArticlesRefresh
 from .tag import Tag
 
+# Composite indexes backing keyset pagination of article listings
+db.Index('ix_articles_status_published_at_id', Article.status, Article.published_at, Article.id)
+db.Index('ix_articles_category_id_published_at_id', Article.category_id, Article.published_at, Article.id)
+db.Index('ix_articles_author_id_published_at_id', Article.author_id, Article.published_at, Article.id)
+
 __all__ = [
     'Article',
+    'ArticleRendering',
     'ArticleView',
+    'ArticleViewCount',
+    'ArticleViewRollup',
     'Author',
     'BaseModel',
     'Category',
+    'CategoryStat',
     'NewsletterSubscriber',
+    'RelatedArticle',
+    'RelatedArticlesRefresh',
     'Tag',
-    'db'
+    'TagStat',
+    'WriteBatch',
+    'db',
+    'db_now',
+    'notify_model_change',
+    'on_model_change',
+    'write_batch'
 ]
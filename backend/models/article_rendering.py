@@ -0,0 +1,90 @@
+# models/article_rendering.py
+"""
+Rendered HTML, excerpt and reading stats of each article, computed when
+the article is written instead of on every read.
+
+A session flush hook renders new articles and articles whose content or
+excerpt changed, in the same transaction. The stored ``content_hash``
+covers the inputs and the renderer version, so a save that leaves them
+unchanged skips the work. Articles written outside the ORM, or stored
+by an older renderer, are brought up to date by
+``services.article_rendering.backfill_renderings``.
+"""
+
+from sqlalchemy import event, inspect
+from utils.markup import content_hash, render_article
+
+from . import BaseModel, db
+from .article import Article
+
+# Article attributes the rendering is derived from
+RENDERED_ATTRIBUTES = ('content', 'excerpt')
+
+
+class ArticleRendering(BaseModel):
+    """Write-time rendering of one article revision"""
+    __tablename__ = 'article_renderings'
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), nullable=False, unique=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    html = db.Column(db.Text, nullable=False, default='')
+    excerpt = db.Column(db.Text, nullable=False, default='')
+    word_count = db.Column(db.Integer, nullable=False, default=0)
+    reading_minutes = db.Column(db.SmallInteger, nullable=False, default=0)
+    toc = db.Column(db.JSON, nullable=False, default=list)
+
+    article = db.relationship(
+        Article,
+        backref=db.backref('rendering', uselist=False, lazy='select', cascade='all, delete-orphan')
+    )
+
+    @staticmethod
+    def values(content, excerpt):
+        """Column values for an article with ``content`` and ``excerpt``"""
+        rendered = render_article(content, excerpt)
+        return {
+            'content_hash': content_hash(content, excerpt),
+            'html': rendered.html,
+            'excerpt': rendered.excerpt,
+            'word_count': rendered.word_count,
+            'reading_minutes': rendered.reading_minutes,
+            'toc': rendered.toc
+        }
+
+    def to_dict(self):
+        return {
+            'html': self.html,
+            'excerpt': self.excerpt,
+            'word_count': self.word_count,
+            'reading_minutes': self.reading_minutes,
+            'toc': self.toc
+        }
+
+    def __repr__(self):
+        return f'<ArticleRendering {self.article_id}: {self.word_count} words>'
+
+def _needs_rendering(session, article):
+    if article in session.new:
+        return True
+    state = inspect(article)
+    return any(state.attrs[name].history.has_changes() for name in RENDERED_ATTRIBUTES)
+
+@event.listens_for(db.session, 'before_flush')
+def _render_changed_articles(session, flush_context, instances):
+    articles = [obj for obj in list(session.new) + list(session.dirty)
+                if isinstance(obj, Article) and obj not in session.deleted]
+    for article in articles:
+        if not _needs_rendering(session, article):
+            continue
+        digest = content_hash(article.content, article.excerpt)
+        with session.no_autoflush:
+            rendering = article.rendering
+        if rendering is not None and rendering.content_hash == digest:
+            continue
+        if rendering is None:
+            rendering = article.rendering = ArticleRendering()
+        for key, value in ArticleRendering.values(article.content, article.excerpt).items():
+            setattr(rendering, key, value)
+
+# Export the models
+__all__ = ['ArticleRendering']
@@ -0,0 +1,63 @@
+# models/article_view_count.py
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import BaseModel, db
+
+
+class ArticleViewCount(BaseModel):
+    """
+    Article views aggregated per time bucket, written in bulk by the view buffer.
+    """
+    __tablename__ = 'article_view_counts'
+    __table_args__ = (
+        db.UniqueConstraint('article_id', 'bucket_start'),
+    )
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id'), nullable=False, index=True)
+    bucket_start = db.Column(db.DateTime, nullable=False, index=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def increment_many(cls, rows):
+        """
+        Add view counts for ``(article_id, bucket_start, views)`` rows.
+
+        Uses a single INSERT ... ON CONFLICT DO UPDATE executemany where the
+        dialect supports it.
+        """
+        if not rows:
+            return
+
+        values = [
+            {'article_id': article_id, 'bucket_start': bucket_start, 'views': views}
+            for article_id, bucket_start, views in rows
+        ]
+        table = cls.__table__
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['article_id', 'bucket_start'],
+                set_={'views': table.c.views + stmt.excluded.views, 'updated_at': db.func.now()}
+            )
+            db.session.execute(stmt, values)
+        else:
+            for value in values:
+                updated = db.session.execute(
+                    table.update()
+                    .where(table.c.article_id == value['article_id'])
+                    .where(table.c.bucket_start == value['bucket_start'])
+                    .values(views=table.c.views + value['views'])
+                )
+                if not updated.rowcount:
+                    db.session.execute(table.insert().values(**value))
+
+        db.session.commit()
+
+    def __repr__(self):
+        return f'<ArticleViewCount {self.article_id} @ {self.bucket_start}: {self.views}>'
+
+# Export the models
+__all__ = ['ArticleViewCount']
@@ -0,0 +1,49 @@
+# models/article_view_rollup.py
+import numpy as np
+
+from . import BaseModel, db
+
+# Column layout of the packed arrays
+ID_DTYPE = np.dtype('<i4')
+VIEWS_DTYPE = np.dtype('<i8')
+
+
+class ArticleViewRollup(BaseModel):
+    """
+    Article views for one hour, day or month, written by the rollup job.
+
+    Each row is columnar: ``article_ids`` holds the sorted ids of the
+    articles viewed in the period and ``views`` their counts, packed as
+    little-endian int32 and int64 arrays.
+    """
+    __tablename__ = 'article_view_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'period_start'),
+    )
+
+    granularity = db.Column(db.String(8), nullable=False)  # hour, day, month
+    period_start = db.Column(db.DateTime, nullable=False)
+    article_ids = db.Column(db.LargeBinary, nullable=False)
+    views = db.Column(db.LargeBinary, nullable=False)
+    total_views = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @staticmethod
+    def pack(article_ids, views):
+        """Column values for sorted ``article_ids`` and their ``views``"""
+        views = np.asarray(views, dtype=VIEWS_DTYPE)
+        return {
+            'article_ids': np.asarray(article_ids, dtype=ID_DTYPE).tobytes(),
+            'views': views.tobytes(),
+            'total_views': int(views.sum())
+        }
+
+    @staticmethod
+    def unpack(article_ids, views):
+        """(ids, views) arrays from the packed column values"""
+        return np.frombuffer(article_ids, dtype=ID_DTYPE), np.frombuffer(views, dtype=VIEWS_DTYPE)
+
+    def __repr__(self):
+        return f'<ArticleViewRollup {self.granularity} @ {self.period_start}: {self.total_views}>'
+
+# Export the models
+__all__ = ['ArticleViewRollup']
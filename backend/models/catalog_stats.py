@@ -0,0 +1,325 @@
+# models/catalog_stats.py
+"""
+Materialized article counts and latest-article pointers per Category and Tag.
+
+Rows are kept current by session flush hooks: before a flush the stored
+status, category, publish date and tags of each changed Article are
+read, and after it the per-category and per-tag deltas are written
+in the same transaction. Only published articles are counted. Rows
+written outside the ORM (bulk loads, manual SQL) are picked up by
+``rebuild_catalog_stats``.
+"""
+
+from collections import Counter
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import BaseModel, db
+from .article import Article
+from .category import Category
+from .tag import Tag
+
+# Article attributes that change a category's or tag's stats
+TRACKED_ATTRIBUTES = ('status', 'category_id', 'published_at', 'tags')
+
+
+class _CatalogStat(BaseModel):
+    """
+    Shared columns and maintenance queries for the stat tables.
+
+    Subclasses set ``key_name`` and define ``published_articles()``,
+    selecting (key, article id, published_at) for every published article.
+    """
+    __abstract__ = True
+
+    # Name of the column holding the category or tag id
+    key_name = None
+
+    article_count = db.Column(db.Integer, nullable=False, default=0)
+    latest_published_at = db.Column(db.DateTime)
+
+    @classmethod
+    def key_column(cls):
+        return cls.__table__.c[cls.key_name]
+
+    @classmethod
+    def add_counts(cls, connection, deltas):
+        """Apply ``{key: delta}`` count changes, creating rows as needed"""
+        table = cls.__table__
+        key = cls.key_column()
+        increments = [{cls.key_name: k, 'article_count': d} for k, d in deltas.items() if d > 0]
+        for k, d in deltas.items():
+            if d < 0:
+                connection.execute(
+                    table.update().where(key == k).values(article_count=table.c.article_count + d)
+                )
+        if not increments:
+            return
+
+        dialect = connection.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[cls.key_name],
+                set_={'article_count': table.c.article_count + stmt.excluded.article_count,
+                      'updated_at': db.func.now()}
+            )
+            connection.execute(stmt, increments)
+        else:
+            for value in increments:
+                updated = connection.execute(
+                    table.update().where(key == value[cls.key_name])
+                    .values(article_count=table.c.article_count + value['article_count'])
+                )
+                if not updated.rowcount:
+                    connection.execute(table.insert().values(**value))
+
+    @classmethod
+    def offer_latest(cls, connection, key, article_id, published_at):
+        """Point ``key`` at the article if it is newer than the current latest"""
+        if published_at is None:
+            return
+        table = cls.__table__
+        connection.execute(
+            table.update()
+            .where(cls.key_column() == key)
+            .where(db.or_(
+                table.c.latest_published_at.is_(None),
+                table.c.latest_published_at < published_at,
+                db.and_(table.c.latest_published_at == published_at,
+                        table.c.latest_article_id < article_id)
+            ))
+            .values(latest_article_id=article_id, latest_published_at=published_at)
+        )
+
+    @classmethod
+    def refresh_latest(cls, connection, keys):
+        """Recompute the latest-article pointer for ``keys``"""
+        articles = cls.published_articles().subquery()
+        table = cls.__table__
+        for key in keys:
+            latest = connection.execute(
+                db.select(articles.c.article_id, articles.c.published_at)
+                .where(articles.c.key == key)
+                .order_by(articles.c.published_at.desc().nulls_last(), articles.c.article_id.desc())
+                .limit(1)
+            ).first()
+            connection.execute(
+                table.update().where(cls.key_column() == key).values(
+                    latest_article_id=latest.article_id if latest else None,
+                    latest_published_at=latest.published_at if latest else None
+                )
+            )
+
+    @classmethod
+    def rebuild(cls, connection):
+        """Replace every row with counts and pointers recomputed from articles"""
+        articles = cls.published_articles().subquery()
+        ranked = db.select(
+            articles.c.key,
+            articles.c.article_id,
+            articles.c.published_at,
+            db.func.count().over(partition_by=articles.c.key).label('article_count'),
+            db.func.row_number().over(
+                partition_by=articles.c.key,
+                order_by=(articles.c.published_at.desc().nulls_last(), articles.c.article_id.desc())
+            ).label('position')
+        ).subquery()
+
+        rows = [
+            {cls.key_name: row.key, 'article_count': row.article_count,
+             'latest_article_id': row.article_id, 'latest_published_at': row.published_at}
+            for row in connection.execute(db.select(ranked).where(ranked.c.position == 1))
+        ]
+        connection.execute(cls.__table__.delete())
+        if rows:
+            connection.execute(cls.__table__.insert(), rows)
+        return len(rows)
+
+
+class CategoryStat(_CatalogStat):
+    """
+    Published article count and newest article per category.
+    """
+    __tablename__ = 'category_stats'
+    key_name = 'category_id'
+
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'),
+                            nullable=False, unique=True)
+    latest_article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='SET NULL'))
+
+    @classmethod
+    def published_articles(cls):
+        return (db.select(Article.category_id.label('key'), Article.id.label('article_id'),
+                          Article.published_at.label('published_at'))
+                .where(Article.status == 'published', Article.category_id.isnot(None)))
+
+    @classmethod
+    def listing(cls):
+        """Categories with their article count and latest article, in one query"""
+        return _listing(Category, cls)
+
+    def __repr__(self):
+        return f'<CategoryStat {self.category_id}: {self.article_count}>'
+
+
+class TagStat(_CatalogStat):
+    """
+    Published article count and newest article per tag.
+    """
+    __tablename__ = 'tag_stats'
+    key_name = 'tag_id'
+
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), nullable=False, unique=True)
+    latest_article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='SET NULL'))
+
+    @classmethod
+    def published_articles(cls):
+        article_column, tag_column = _article_tag_columns()
+        return (db.select(tag_column.label('key'), Article.id.label('article_id'),
+                          Article.published_at.label('published_at'))
+                .join(Article, Article.id == article_column)
+                .where(Article.status == 'published'))
+
+    @classmethod
+    def listing(cls):
+        """Tags with their article count and latest article, in one query"""
+        return _listing(Tag, cls)
+
+    def __repr__(self):
+        return f'<TagStat {self.tag_id}: {self.article_count}>'
+
+STAT_MODELS = (CategoryStat, TagStat)
+
+def _article_tag_columns():
+    """The (article id, tag id) columns of the Article.tags association table"""
+    secondary = Article.tags.property.secondary
+    article_column = next(c for c in secondary.c if c.references(Article.__table__.c.id))
+    tag_column = next(c for c in secondary.c if c.references(Tag.__table__.c.id))
+    return article_column, tag_column
+
+def _listing(model, stat):
+    latest = db.aliased(Article)
+    rows = db.session.execute(
+        db.select(model.id, model.name, db.func.coalesce(stat.article_count, 0).label('article_count'),
+                  latest.id.label('latest_id'), latest.title, latest.slug, latest.published_at)
+        .outerjoin(stat, stat.key_column() == model.id)
+        .outerjoin(latest, latest.id == stat.latest_article_id)
+        .order_by(model.name)
+    )
+    return [
+        {
+            'id': row.id,
+            'name': row.name,
+            'article_count': max(row.article_count, 0),
+            'latest_article': None if row.latest_id is None else {
+                'id': row.latest_id,
+                'title': row.title,
+                'slug': row.slug,
+                'published_at': row.published_at.isoformat() if row.published_at else None
+            }
+        }
+        for row in rows
+    ]
+
+def rebuild_catalog_stats():
+    """Recompute every stat row from the articles table and commit"""
+    connection = db.session.connection()
+    counts = {model.__tablename__: model.rebuild(connection) for model in STAT_MODELS}
+    db.session.commit()
+    return counts
+
+def _stored_contributions(session, articles):
+    """
+    Category, tag ids and publish date each article counts toward in the
+    database, i.e. before this flush, keyed by article; None when unpublished.
+
+    Read from the rows rather than attribute history, which does not hold
+    the previous value of a column assigned while expired.
+    """
+    ids = {article.id: article for article in articles if article.id is not None}
+    if not ids:
+        return {}
+    article_column, tag_column = _article_tag_columns()
+    with session.no_autoflush:
+        rows = session.execute(
+            db.select(Article.id, Article.category_id, Article.published_at)
+            .where(Article.id.in_(ids), Article.status == 'published')
+        ).all()
+        tags = session.execute(
+            db.select(article_column, tag_column).where(article_column.in_([row.id for row in rows]))
+        ).all() if rows else []
+
+    tag_ids = {}
+    for article_id, tag_id in tags:
+        tag_ids.setdefault(article_id, []).append(tag_id)
+    contributions = dict.fromkeys(ids.values())
+    for row in rows:
+        contributions[ids[row.id]] = (row.category_id, tag_ids.get(row.id, []), row.published_at)
+    return contributions
+
+def _new_contribution(article):
+    if article.status != 'published':
+        return None
+    return article.category_id, [tag.id for tag in article.tags], article.published_at
+
+def _is_tracked_change(article):
+    state = inspect(article)
+    return any(state.attrs[name].history.has_changes() for name in TRACKED_ATTRIBUTES)
+
+@event.listens_for(db.session, 'before_flush')
+def _record_catalog_changes(session, flush_context, instances):
+    changed = [obj for obj in session.deleted if isinstance(obj, Article)]
+    changed += [obj for obj in session.dirty if isinstance(obj, Article) and _is_tracked_change(obj)]
+    before = _stored_contributions(session, changed)
+    new_articles = [obj for obj in session.new if isinstance(obj, Article)]
+    removed = [(type(obj), obj.id) for obj in session.deleted if isinstance(obj, (Category, Tag))]
+    session.info['catalog_changes'] = (before, new_articles, removed)
+
+@event.listens_for(db.session, 'after_flush')
+def _apply_catalog_changes(session, flush_context):
+    before, new_articles, removed = session.info.pop('catalog_changes', ({}, [], []))
+    if not before and not new_articles and not removed:
+        return
+
+    deltas = {CategoryStat: Counter(), TagStat: Counter()}
+    stale = {CategoryStat: set(), TagStat: set()}
+    offers = []
+
+    changes = [(article, before[article]) for article in before]
+    changes += [(article, None) for article in new_articles]
+    for article, old in changes:
+        new = None if article in session.deleted else _new_contribution(article)
+        if old is not None:
+            category_id, tag_ids, _ = old
+            if category_id is not None:
+                deltas[CategoryStat][category_id] -= 1
+                stale[CategoryStat].add(category_id)
+            for tag_id in tag_ids:
+                deltas[TagStat][tag_id] -= 1
+                stale[TagStat].add(tag_id)
+        if new is not None:
+            category_id, tag_ids, published_at = new
+            if category_id is not None:
+                deltas[CategoryStat][category_id] += 1
+                offers.append((CategoryStat, category_id, article.id, published_at))
+            for tag_id in tag_ids:
+                deltas[TagStat][tag_id] += 1
+                offers.append((TagStat, tag_id, article.id, published_at))
+
+    connection = session.connection()
+    for model, counter in deltas.items():
+        model.add_counts(connection, {key: delta for key, delta in counter.items() if delta})
+        model.refresh_latest(connection, stale[model])
+    for model, key, article_id, published_at in offers:
+        if key not in stale[model]:
+            model.offer_latest(connection, key, article_id, published_at)
+
+    for model, key in removed:
+        stat = CategoryStat if model is Category else TagStat
+        connection.execute(stat.__table__.delete().where(stat.key_column() == key))
+
+# Export the models
+__all__ = ['CategoryStat', 'TagStat', 'rebuild_catalog_stats']
@@ -0,0 +1,72 @@
+# models/related_article.py
+from sqlalchemy import event
+
+from . import BaseModel, db
+from .article import Article
+
+
+class RelatedArticle(BaseModel):
+    """
+    Precomputed top-K related articles, written by the related-articles job.
+    """
+    __tablename__ = 'related_articles'
+    __table_args__ = (
+        db.UniqueConstraint('article_id', 'rank'),
+        db.Index('ix_related_articles_article_id_rank', 'article_id', 'rank'),
+    )
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), nullable=False)
+    related_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), nullable=False, index=True)
+    rank = db.Column(db.SmallInteger, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    @classmethod
+    def for_article(cls, article_id, limit=5):
+        """Return related Article objects for ``article_id`` in rank order"""
+        return (Article.query
+                .join(cls, cls.related_id == Article.id)
+                .filter(cls.article_id == article_id)
+                .order_by(cls.rank)
+                .limit(limit)
+                .all())
+
+    def __repr__(self):
+        return f'<RelatedArticle {self.article_id} -> {self.related_id} #{self.rank}>'
+
+
+class RelatedArticlesRefresh(BaseModel):
+    """
+    Watermark of the related-articles job: a single row holding the
+    database time at which the last refresh or rebuild started. Articles
+    updated since then are the next refresh's input.
+    """
+    __tablename__ = 'related_articles_refresh'
+
+    started_at = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def watermark(cls):
+        row = db.session.get(cls, 1)
+        return row.started_at if row is not None else None
+
+    @classmethod
+    def advance(cls, started_at):
+        """Record a refresh that started at ``started_at``; the caller commits"""
+        row = db.session.get(cls, 1) or cls(id=1)
+        row.started_at = started_at
+        db.session.add(row)
+
+@event.listens_for(db.session, 'before_flush')
+def _drop_deleted_articles(session, flush_context, instances):
+    # Runs in the deleting transaction, before the article rows go
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Article) and obj.id is not None]
+    if deleted:
+        with session.no_autoflush:
+            session.execute(
+                db.delete(RelatedArticle)
+                .where(RelatedArticle.article_id.in_(deleted) | RelatedArticle.related_id.in_(deleted))
+                .execution_options(synchronize_session=False)
+            )
+
+# Export the models
+__all__ = ['RelatedArticle', 'RelatedArticlesRefresh']
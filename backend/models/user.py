@@ -1,13 +1,24 @@
 # models/user.py
+import logging
 import re
+from concurrent.futures import BrokenExecutor
 from datetime import datetime
 
-from flask_sqlalchemy import db
 from marshmallow import Schema, fields, validate
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import column, func, select, table
+from sqlalchemy.orm import column_property
+from utils.password_hashing import HashingOverloaded, hash_password, needs_rehash, verify_password
 
+from . import BaseModel, db, notify_model_change
 
-class User(db.Model):
+logger = logging.getLogger(__name__)
+
+# Lightweight table handles for the count subqueries below
+_articles = table('articles', column('author_id'))
+_comments = table('comments', column('user_id'))
+
+
+class User(BaseModel):
     """
     User model representing blog authors and administrators.
     """
@@ -30,6 +41,16 @@ class User(db.Model):
     articles = db.relationship('Article', backref='author', lazy=True)
     comments = db.relationship('Comment', backref='user', lazy=True)
 
+    # Precomputed counts, only loaded when a query undefers them
+    article_count = column_property(
+        select(func.count()).where(_articles.c.author_id == id).correlate_except(_articles).scalar_subquery(),
+        deferred=True
+    )
+    comment_count = column_property(
+        select(func.count()).where(_comments.c.user_id == id).correlate_except(_comments).scalar_subquery(),
+        deferred=True
+    )
+
     def __init__(self, username, email, password, first_name, last_name, **kwargs):
         self.username = username
         self.email = email
@@ -49,11 +70,28 @@ class User(db.Model):
             raise ValueError("Password must contain at least one lowercase letter")
         if not re.search(r'[0-9]', password):
             raise ValueError("Password must contain at least one number")
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
+        if self.id is not None:
+            notify_model_change(self, 'set_password')
 
     def check_password(self, password):
-        """Check hashed password."""
-        return check_password_hash(self.password_hash, password)
+        """
+        Check hashed password, upgrading it if the hash parameters changed.
+
+        The upgrade is best effort: when the hashing pool is saturated or
+        broken the old hash is kept for a later login, and a correct
+        password still checks out.
+        """
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            try:
+                self.password_hash = hash_password(password)
+            except (HashingOverloaded, BrokenExecutor):
+                logger.warning('Skipped upgrading the password hash of user %s', self.id, exc_info=True)
+            else:
+                self.save()
+        return True
 
     def get_full_name(self):
         """Return the full name of the user."""
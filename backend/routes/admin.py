@@ -0,0 +1,153 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+from models import db
+from routes.auth import token_required
+from services.exports import CONTENT_TYPES, DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, parse_export, stream_export
+from utils.job_queue import STATUSES, UnknownJob, job_queue, registered_jobs
+from utils.streaming import accepts_gzip, gzip_stream
+
+admin_bp = Blueprint('admin', __name__)
+# routes/__init__ registers blueprints by their ``bp`` attribute
+bp = admin_bp
+
+def _id_argument(name):
+    """An optional integer query parameter; ValueError if it is not one"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer id') from None
+
+@admin_bp.route('/export/<name>', methods=['GET'])
+@token_required
+def export(current_user, name):
+    """
+    Stream every row of an exportable table (articles, views, subscribers)
+
+    Query parameters: ``format`` (ndjson or csv), ``fields``, ``after`` and
+    ``until`` (id range) and ``batch_size``. The upper id bound used is
+    returned in X-Export-Until; to resume an interrupted download, repeat
+    the request with ``after`` set to the last id received and ``until``
+    set to that header.
+    """
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in CONTENT_TYPES:
+        return jsonify({'message': f"format must be one of {', '.join(CONTENT_TYPES)}"}), 400
+
+    try:
+        spec, names = parse_export(name, request.args.get('fields'))
+        after = _id_argument('after')
+        until = _id_argument('until')
+        batch_size = min(max(int(request.args.get('batch_size', DEFAULT_BATCH_SIZE)), 1), MAX_BATCH_SIZE)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    # Pin the range so rows inserted during the download are left for the next one
+    if until is None:
+        until = db.session.scalar(db.select(db.func.max(spec.model.__table__.c.id))) or 0
+        db.session.rollback()
+
+    body = stream_with_context(stream_export(spec, names, fmt, after=after, until=until, batch_size=batch_size))
+    gzipped = accepts_gzip(request)
+    response = Response(gzip_stream(body) if gzipped else body, content_type=CONTENT_TYPES[fmt])
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+
+    suffix = f'-after-{after}' if after is not None else ''
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}{suffix}.{fmt}"'
+    response.headers['X-Export-Until'] = str(until)
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@admin_bp.route('/jobs', methods=['GET'])
+@token_required
+def list_jobs(current_user):
+    """List the newest background jobs, optionally filtered by ``status``"""
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    status = request.args.get('status')
+    if status is not None and status not in STATUSES:
+        return jsonify({'message': f"status must be one of {', '.join(STATUSES)}"}), 400
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    before = request.args.get('before', type=int)
+
+    return jsonify({
+        'jobs': job_queue.list(status=status, limit=limit, before=before),
+        'counts': job_queue.counts(),
+        'available': registered_jobs()
+    }), 200
+
+@admin_bp.route('/jobs', methods=['POST'])
+@token_required
+def enqueue_job(current_user):
+    """
+    Queue a background job
+
+    Body: ``name`` plus optional ``args`` (object), ``priority`` (higher
+    runs first), ``max_attempts`` and ``delay`` (seconds). Poll the
+    returned Location for progress.
+    """
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    data = request.get_json(silent=True) or {}
+    args = data.get('args') or {}
+    if not isinstance(args, dict):
+        return jsonify({'message': 'args must be an object'}), 400
+
+    try:
+        job_id = job_queue.enqueue(
+            data.get('name'), args,
+            priority=int(data.get('priority', 0)),
+            max_attempts=int(data['max_attempts']) if 'max_attempts' in data else None,
+            delay=max(float(data.get('delay', 0)), 0),
+            created_by=current_user.id
+        )
+    except (UnknownJob, TypeError, ValueError) as e:
+        return jsonify({'message': str(e)}), 400
+
+    return jsonify(job_queue.get(job_id)), 202, {'Location': url_for('.get_job', job_id=job_id)}
+
+@admin_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@token_required
+def get_job(current_user, job_id):
+    """Status, progress and result of one job"""
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(job), 200
+
+@admin_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@token_required
+def cancel_job(current_user, job_id):
+    """Cancel a queued job, or ask a running one to stop at its next progress report"""
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(job), 200
+
+@admin_bp.route('/jobs/<int:job_id>/retry', methods=['POST'])
+@token_required
+def retry_job(current_user, job_id):
+    """Queue a failed or cancelled job again"""
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+    if job['status'] not in ('failed', 'cancelled'):
+        return jsonify({'message': f"Cannot retry a {job['status']} job"}), 409
+    return jsonify(job_queue.retry(job_id)), 202
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, request
+from routes.auth import token_required
+from services.view_buffer import view_buffer
+from services.view_rollups import GRANULARITIES, top_articles, views_over_time
+
+bp = Blueprint('analytics', __name__, url_prefix='/analytics')
+
+# Upper bound on entries accepted in one batched request
+MAX_VIEWS_PER_BATCH = 500
+
+# Longest range a dashboard query may cover
+MAX_RANGE_DAYS = 3660
+
+@bp.route('/view', methods=['POST'])
+def track_view():
+    """
+    Record a single article view
+    """
+    data = request.get_json(silent=True) or {}
+    article_id = data.get('articleId')
+
+    if not isinstance(article_id, int) or article_id < 1:
+        return jsonify({'message': 'articleId is required'}), 400
+
+    accepted = view_buffer.record(article_id)
+    return jsonify({'accepted': 1 if accepted else 0}), 202
+
+@bp.route('/views', methods=['POST'])
+def track_views():
+    """
+    Record a batch of article views sent by the client-side batcher.
+
+    Each article counts at most once per request, whatever ``count`` the
+    entry carries, so an anonymous request cannot inflate a view count.
+    """
+    data = request.get_json(silent=True, force=True) or {}
+    views = data.get('views')
+
+    if not isinstance(views, list) or len(views) > MAX_VIEWS_PER_BATCH:
+        return jsonify({'message': f'views must be a list of at most {MAX_VIEWS_PER_BATCH} entries'}), 400
+
+    article_ids = set()
+    for view in views:
+        article_id = view.get('articleId') if isinstance(view, dict) else None
+        if isinstance(article_id, int) and article_id > 0:
+            article_ids.add(article_id)
+
+    accepted = sum(1 for article_id in sorted(article_ids) if view_buffer.record(article_id))
+    return jsonify({'accepted': accepted}), 202
+
+def _parse_range(args, default_days):
+    """
+    [start, end) from ISO ``start``/``end`` or the last ``days`` days
+
+    Raises:
+        ValueError: If a value is malformed or the range is empty or too long
+    """
+    end = datetime.fromisoformat(args['end']) if args.get('end') else datetime.utcnow()
+    if args.get('start'):
+        start = datetime.fromisoformat(args['start'])
+    else:
+        start = end - timedelta(days=int(args.get('days', default_days)))
+    if not start < end or end - start > timedelta(days=MAX_RANGE_DAYS):
+        raise ValueError('start must be before end and the range at most %d days' % MAX_RANGE_DAYS)
+    return start, end
+
+@bp.route('/top', methods=['GET'])
+@token_required
+def top(current_user):
+    """
+    Most viewed articles in a time range, read from the view rollups
+    """
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    try:
+        start, end = _parse_range(request.args, default_days=7)
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'articles': top_articles(start, end, limit)
+    }), 200
+
+@bp.route('/timeseries', methods=['GET'])
+@token_required
+def timeseries(current_user):
+    """
+    Views per hour, day or month: in total, for one article (articleId)
+    or per author (by=author)
+    """
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'message': f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+
+    try:
+        start, end = _parse_range(request.args, default_days=30)
+        article_id = request.args.get('articleId', type=int)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    series = views_over_time(granularity, start, end, article_id=article_id,
+                             by_author=request.args.get('by') == 'author')
+    return jsonify({'granularity': granularity, 'series': series}), 200
@@ -4,18 +4,34 @@ from functools import wraps
 
 import jwt
 from flask import Blueprint, jsonify, request
+from models import on_model_change
 from models.user import User
-from werkzeug.security import check_password_hash
+from utils.password_hashing import HashingOverloaded
+from utils.token_cache import TokenCache, UserSnapshot
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 # Configuration
 SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
 TOKEN_EXPIRATION_HOURS = 24
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', '300'))
+
+# Verified tokens mapped to user snapshots
+token_cache = TokenCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+@on_model_change
+def invalidate_cached_tokens(instance, action):
+    """Drop cached tokens when a User row is written"""
+    if isinstance(instance, User) and instance.id is not None:
+        token_cache.invalidate_user(instance.id)
 
 def token_required(f):
     """
     Decorator to verify JWT token in protected routes
+
+    Verified tokens are cached, so repeat requests skip the JWT decode and
+    the User lookup. The wrapped view receives a UserSnapshot.
     """
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -27,12 +43,22 @@ def token_required(f):
         if not token:
             return jsonify({'message': 'Token is missing!'}), 401
 
+        current_user = token_cache.get(token)
+        if current_user is not None:
+            return f(current_user, *args, **kwargs)
+
         try:
             data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            current_user = User.query.get(data['user_id'])
+            user = User.query.get(data['user_id'])
         except Exception as e:
             return jsonify({'message': 'Token is invalid!', 'error': str(e)}), 401
 
+        if user is None:
+            return jsonify({'message': 'Token is invalid!', 'error': 'User not found'}), 401
+
+        current_user = UserSnapshot.from_user(user)
+        token_cache.set(token, current_user, token_exp=data.get('exp'))
+
         return f(current_user, *args, **kwargs)
 
     return decorated
@@ -80,6 +106,8 @@ def register():
             }
         }), 201
 
+    except HashingOverloaded:
+        raise
     except Exception as e:
         return jsonify({'message': 'Registration failed', 'error': str(e)}), 500
 
@@ -96,7 +124,7 @@ def login():
 
         user = User.query.filter_by(email=data['email']).first()
 
-        if not user or not check_password_hash(user.password, data['password']):
+        if not user or not user.check_password(data['password']):
             return jsonify({'message': 'Invalid credentials'}), 401
 
         # Generate token
@@ -111,11 +139,13 @@ def login():
             'user': {
                 'id': user.id,
                 'email': user.email,
-                'name': user.name,
+                'name': user.get_full_name(),
                 'role': user.role
             }
         }), 200
 
+    except HashingOverloaded:
+        raise
     except Exception as e:
         return jsonify({'message': 'Login failed', 'error': str(e)}), 500
 
@@ -128,7 +158,7 @@ def get_current_user(current_user):
     return jsonify({
         'id': current_user.id,
         'email': current_user.email,
-        'name': current_user.name,
+        'name': current_user.get_full_name(),
         'role': current_user.role,
         'created_at': current_user.created_at.isoformat()
     }), 200
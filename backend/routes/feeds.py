@@ -0,0 +1,20 @@
+from flask import Blueprint
+from services.feeds import feed_response
+
+bp = Blueprint('feeds', __name__, url_prefix='/feeds')
+
+@bp.route('/rss', methods=['GET'])
+@bp.route('/rss.xml', methods=['GET'])
+def rss():
+    """
+    Stream the RSS 2.0 feed of the newest published articles
+    """
+    return feed_response('rss')
+
+@bp.route('/atom', methods=['GET'])
+@bp.route('/atom.xml', methods=['GET'])
+def atom():
+    """
+    Stream the Atom feed of the newest published articles
+    """
+    return feed_response('atom')
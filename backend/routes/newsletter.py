@@ -0,0 +1,66 @@
+from flask import Blueprint, jsonify, request
+from models import NewsletterSubscriber
+from routes.auth import token_required
+from services.newsletter import import_subscribers, read_records
+from utils.validators import validate_email
+
+newsletter_bp = Blueprint('newsletter', __name__)
+# routes/__init__ registers blueprints by their ``bp`` attribute
+bp = newsletter_bp
+
+CONTENT_TYPE_FORMATS = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson'
+}
+
+@newsletter_bp.route('/subscribe', methods=['POST'])
+def subscribe():
+    """
+    Subscribe a single email address to the newsletter
+    """
+    data = request.get_json(silent=True) or {}
+    email = (data.get('email') or '').strip().lower()
+
+    is_valid, error = validate_email(email)
+    if not is_valid:
+        return jsonify({'message': error}), 400
+
+    existing = NewsletterSubscriber.query.filter_by(email=email).first()
+    if existing is not None:
+        if not existing.is_active:
+            existing.update(is_active=True)
+        return jsonify({'message': 'Subscribed successfully'}), 200
+
+    NewsletterSubscriber(email=email).save()
+    return jsonify({'message': 'Subscribed successfully'}), 201
+
+@newsletter_bp.route('/import', methods=['POST'])
+@token_required
+def bulk_import(current_user):
+    """
+    Bulk import subscribers from a CSV or NDJSON upload
+
+    The body is streamed, either raw (Content-Type text/csv or
+    application/x-ndjson) or as a multipart ``file`` field, in which case
+    ``format`` defaults to the file extension.
+    """
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Admin access required'}), 403
+
+    upload = request.files.get('file')
+    if upload is not None:
+        fmt = request.args.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+        stream = upload.stream
+    else:
+        fmt = request.args.get('format') or CONTENT_TYPE_FORMATS.get(request.mimetype)
+        stream = request.stream
+
+    if fmt == 'jsonl':
+        fmt = 'ndjson'
+
+    # Malformed input stops the import; the response still reports what
+    # was imported before it
+    result = import_subscribers(read_records(stream, fmt))
+    return jsonify(result.to_dict()), 400 if result.error else 200
@@ -0,0 +1,54 @@
+from flask import Blueprint, jsonify, request
+from models import Article
+from services.search_index import search_index
+
+search_bp = Blueprint('search', __name__)
+
+MAX_PER_PAGE = 50
+
+@search_bp.route('', methods=['GET'])
+def search_articles():
+    """
+    Full-text search over published articles
+    """
+    query = request.args.get('q') or request.args.get('query', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), MAX_PER_PAGE)
+
+    if not query.strip():
+        return jsonify({'message': 'Search query is required'}), 400
+
+    hits = search_index.search(query, page=page, per_page=per_page)
+    ids = [hit['id'] for hit in hits['results']]
+    articles = {article.id: article for article in Article.query.filter(Article.id.in_(ids))} if ids else {}
+
+    results = []
+    for hit in hits['results']:
+        article = articles.get(hit['id'])
+        if article is None:
+            continue
+        results.append({
+            'id': article.id,
+            'title': article.title,
+            'slug': article.slug,
+            'excerpt': article.excerpt,
+            'published_at': article.published_at.isoformat() if article.published_at else None,
+            'score': hit['score']
+        })
+
+    return jsonify({
+        'query': query,
+        'total': hits['total'],
+        'page': page,
+        'per_page': per_page,
+        'results': results
+    }), 200
+
+@search_bp.route('/suggest', methods=['GET'])
+def suggest():
+    """
+    Typeahead suggestions from article titles and tags
+    """
+    prefix = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_PER_PAGE)
+    return jsonify({'suggestions': search_index.suggest(prefix, limit=limit)}), 200
@@ -0,0 +1,6 @@
+"""
+Services package for AI Insights Blog API.
+
+Holds background and caching subsystems that sit between the routes and
+the models, such as buffered ingestion pipelines.
+"""
@@ -0,0 +1,81 @@
+"""
+Bulk backfill of stored article renderings.
+
+Saves keep renderings current on their own (see
+models.article_rendering); this pass covers articles loaded outside the
+ORM and renderings made by an older renderer version. Each chunk of
+articles is compared by content hash against its stored rendering and
+only stale ones are rendered, so a rerun over an up-to-date table only
+reads. Rendering is CPU-bound, so chunks can be spread over a pool of
+processes.
+"""
+
+from models import Article, ArticleRendering, db
+from sqlalchemy import insert, update
+from utils.markup import content_hash
+from utils.process_pool import app_pool
+
+# Articles read, rendered and committed per task
+CHUNK_SIZE = 200
+
+def render_chunk(article_ids):
+    """
+    Render the stale or missing renderings among ``article_ids``.
+
+    Returns:
+        int: Renderings written
+    """
+    rows = db.session.execute(
+        db.select(Article.id, Article.content, Article.excerpt, ArticleRendering.id, ArticleRendering.content_hash)
+        .outerjoin(ArticleRendering, ArticleRendering.article_id == Article.id)
+        .where(Article.id.in_(article_ids))
+    )
+    inserts, updates = [], []
+    for article_id, content, excerpt, rendering_id, stored_hash in rows:
+        if stored_hash == content_hash(content, excerpt):
+            continue
+        values = ArticleRendering.values(content, excerpt)
+        if rendering_id is None:
+            inserts.append(dict(values, article_id=article_id))
+        else:
+            updates.append(dict(values, id=rendering_id))
+
+    if inserts:
+        db.session.execute(insert(ArticleRendering), inserts)
+    if updates:
+        db.session.execute(update(ArticleRendering), updates)
+    db.session.commit()
+    return len(inserts) + len(updates)
+
+def backfill_renderings(processes=1, factory=None, factory_args=(), progress=None):
+    """
+    Bring every article's stored rendering up to date.
+
+    With ``processes`` above 1, chunks are rendered on a pool of spawned
+    processes, each building its own app by calling the ``factory``
+    import string with ``factory_args``.
+
+    Returns:
+        tuple: (articles checked, renderings written)
+    """
+    ids = db.session.scalars(db.select(Article.id).order_by(Article.id)).all()
+    db.session.rollback()
+    chunks = [ids[start:start + CHUNK_SIZE] for start in range(0, len(ids), CHUNK_SIZE)]
+
+    written = done = 0
+    if processes > 1 and factory and len(chunks) > 1:
+        with app_pool(processes, factory, factory_args) as pool:
+            for chunk, count in zip(chunks, pool.map(render_chunk, chunks)):
+                written += count
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, len(ids))
+    else:
+        for chunk in chunks:
+            written += render_chunk(chunk)
+            done += len(chunk)
+            if progress is not None:
+                progress(done, len(ids))
+    return len(ids), written
+
+__all__ = ['backfill_renderings', 'render_chunk']
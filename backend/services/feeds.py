@@ -0,0 +1,211 @@
+"""
+Streaming RSS and Atom feeds.
+
+Each article's <item>/<entry> is rendered once and cached until the
+article's ``updated_at`` changes; a feed is streamed by stitching cached
+fragments between a header and footer. A feed's state is identified by
+the newest ``updated_at`` and the number of published articles, read in
+one aggregate query. That state drives the ETag/Last-Modified headers,
+and a fully assembled feed is reused until an Article changes. The
+assembled feed is gzipped once when it is stored, not on every request.
+
+Links are absolute, built from FEED_SITE_URL or else the request's host,
+so cached fragments and feeds are kept per site URL.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from flask import Response, current_app, request, stream_with_context
+from models import Article, db, on_model_change
+from utils.streaming import accepts_gzip, gzip_stream
+from werkzeug.http import is_resource_modified
+
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8'
+}
+
+# Build date reported by a feed with no published articles
+EMPTY_FEED_DATE = datetime(1970, 1, 1)
+
+FEED_COLUMNS = (Article.id, Article.title, Article.slug, Article.excerpt,
+                Article.published_at, Article.updated_at)
+
+
+class FeedCache:
+    """Per-article fragments plus the last fully assembled body of each feed"""
+
+    def __init__(self, max_fragments=5000, max_feeds=16):
+        self.max_fragments = max_fragments
+        self.max_feeds = max_feeds
+        self._fragments = OrderedDict()
+        self._feeds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fragment(self, kind, site, row, render):
+        key = (kind, site, row.id)
+        with self._lock:
+            cached = self._fragments.get(key)
+            if cached is not None and cached[0] == row.updated_at:
+                self._fragments.move_to_end(key)
+                return cached[1]
+
+        fragment = render(row)
+        with self._lock:
+            self._fragments[key] = (row.updated_at, fragment)
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.max_fragments:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def feed(self, kind, site, state, gzipped=False):
+        """The stored body (or its gzip encoding) if it matches ``state``"""
+        with self._lock:
+            cached = self._feeds.get((kind, site))
+            if cached is None or cached[0] != state:
+                return None
+            return cached[2] if gzipped else cached[1]
+
+    def store_feed(self, kind, site, state, body):
+        compressed = gzip.compress(body, 6)
+        with self._lock:
+            self._feeds[(kind, site)] = (state, body, compressed)
+            self._feeds.move_to_end((kind, site))
+            # The Host header is client-supplied, so keep only a few sites
+            while len(self._feeds) > self.max_feeds:
+                self._feeds.popitem(last=False)
+
+    def invalidate(self, article_id=None):
+        with self._lock:
+            self._feeds.clear()
+            if article_id is not None:
+                for key in [key for key in self._fragments if key[2] == article_id]:
+                    del self._fragments[key]
+
+feed_cache = FeedCache()
+
+def _site_url():
+    return current_app.config.get('FEED_SITE_URL', request.host_url).rstrip('/')
+
+def _article_url(row):
+    return f'{_site_url()}/articles/{row.slug}'
+
+def _published(row):
+    return row.published_at or row.updated_at or EMPTY_FEED_DATE
+
+def _render_rss_item(row):
+    return (
+        '<item>'
+        f'<title>{escape(row.title or "")}</title>'
+        f'<link>{escape(_article_url(row))}</link>'
+        f'<guid isPermaLink="false">article-{row.id}</guid>'
+        f'<pubDate>{format_datetime(_published(row))}</pubDate>'
+        f'<description>{escape(row.excerpt or "")}</description>'
+        '</item>'
+    )
+
+def _render_atom_entry(row):
+    return (
+        '<entry>'
+        f'<title>{escape(row.title or "")}</title>'
+        f'<link href="{escape(_article_url(row))}"/>'
+        f'<id>{escape(_site_url())}/articles/{row.id}</id>'
+        f'<published>{_published(row).isoformat()}Z</published>'
+        f'<updated>{(row.updated_at or _published(row)).isoformat()}Z</updated>'
+        f'<summary>{escape(row.excerpt or "")}</summary>'
+        '</entry>'
+    )
+
+RENDERERS = {'rss': _render_rss_item, 'atom': _render_atom_entry}
+
+def _header(kind, last_modified):
+    title = escape(current_app.config.get('FEED_TITLE', 'AI Insights Blog'))
+    site = escape(_site_url())
+    if kind == 'rss':
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<rss version="2.0"><channel>'
+            f'<title>{title}</title><link>{site}</link>'
+            f'<description>{title}</description>'
+            f'<lastBuildDate>{format_datetime(last_modified)}</lastBuildDate>'
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>{title}</title><link href="{site}"/><id>{site}/</id>'
+        f'<updated>{last_modified.isoformat()}Z</updated>'
+    )
+
+FOOTERS = {'rss': '</channel></rss>', 'atom': '</feed>'}
+
+def _feed_state():
+    """Newest update time and published article count, in one query"""
+    return db.session.execute(
+        db.select(db.func.max(Article.updated_at), db.func.count(Article.id))
+        .where(Article.status == 'published')
+    ).one()
+
+def _generate(kind, site, state, size):
+    """Yield the feed, caching the assembled body once it completes"""
+    render = RENDERERS[kind]
+    parts = [_header(kind, state[0])]
+    yield parts[0]
+
+    query = (db.select(*FEED_COLUMNS)
+             .where(Article.status == 'published')
+             .order_by(Article.published_at.desc(), Article.id.desc())
+             .limit(size)
+             .execution_options(yield_per=100))
+    for row in db.session.execute(query):
+        fragment = feed_cache.fragment(kind, site, row, render)
+        parts.append(fragment)
+        yield fragment
+
+    parts.append(FOOTERS[kind])
+    yield parts[-1]
+    feed_cache.store_feed(kind, site, state, ''.join(parts).encode('utf-8'))
+
+def feed_response(kind):
+    """Build a conditional, optionally gzipped, streaming feed response"""
+    last_modified, count = _feed_state()
+    if last_modified is None:
+        last_modified = EMPTY_FEED_DATE
+
+    state = (last_modified, count)
+    site = _site_url()
+    etag = hashlib.md5(f'{kind}:{site}:{last_modified.isoformat()}:{count}'.encode('utf-8')).hexdigest()
+    size = current_app.config.get('FEED_SIZE', 50)
+
+    # Checked up front: Response.make_conditional would buffer the stream
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        gzipped = accepts_gzip(request)
+        cached = feed_cache.feed(kind, site, state, gzipped)
+        if cached is not None:
+            response = Response(cached, content_type=CONTENT_TYPES[kind])
+        else:
+            body = stream_with_context(_generate(kind, site, state, size))
+            response = Response(gzip_stream(body) if gzipped else body, content_type=CONTENT_TYPES[kind])
+        if gzipped:
+            response.headers['Content-Encoding'] = 'gzip'
+
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response
+
+@on_model_change
+def invalidate_feeds(instance, action):
+    """Drop cached feeds and the article's fragments when an Article changes"""
+    if isinstance(instance, Article):
+        feed_cache.invalidate(instance.id)
+
+__all__ = ['FeedCache', 'feed_cache', 'feed_response']
@@ -0,0 +1,240 @@
+"""
+Request-level performance metrics exposed in Prometheus text format.
+
+Disabled unless METRICS_ENABLED is set. Sampled requests record, per
+endpoint and method:
+
+- latency (histogram)
+- SQL statement count (histogram) and SQL time
+- time spent serializing JSON
+- response size (histogram)
+
+Sampling is controlled by METRICS_SAMPLE_RATE (0.0-1.0). Unsampled
+requests only pay for one random() call. Metrics are kept per process
+and served at ``/metrics``.
+
+Latency is measured up to the end of the view and its after_request
+hooks, so it excludes the time spent streaming a response body.
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import Response, g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class RequestMetrics:
+    """Measurements collected while a sampled request is handled"""
+
+    __slots__ = ('start', 'sql_count', 'sql_time', 'serialization_time')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serialization_time = 0.0
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            yield bound, total
+
+
+class EndpointMetrics:
+    """Aggregated metrics for one (endpoint, method) pair"""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.sql_time = 0.0
+        self.serialization_time = 0.0
+
+
+class MetricsRegistry:
+    """Thread-safe store of per-endpoint metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(EndpointMetrics)
+
+    def record(self, endpoint, method, metrics, duration, size):
+        with self._lock:
+            entry = self._endpoints[(endpoint, method)]
+            entry.latency.observe(duration)
+            entry.queries.observe(metrics.sql_count)
+            entry.sql_time += metrics.sql_time
+            entry.serialization_time += metrics.serialization_time
+            if size is not None:
+                entry.response_size.observe(size)
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            lines = []
+            _histogram(lines, 'http_request_duration_seconds', 'Request latency in seconds',
+                       [(labels, entry.latency) for labels, entry in items])
+            _histogram(lines, 'http_request_sql_queries', 'SQL statements per request',
+                       [(labels, entry.queries) for labels, entry in items])
+            _counter(lines, 'http_request_sql_seconds_total', 'Time spent executing SQL',
+                     [(labels, entry.sql_time) for labels, entry in items])
+            _counter(lines, 'http_request_serialization_seconds_total', 'Time spent serializing JSON',
+                     [(labels, entry.serialization_time) for labels, entry in items])
+            _histogram(lines, 'http_response_size_bytes', 'Response body size in bytes',
+                       [(labels, entry.response_size) for labels, entry in items])
+        return '\n'.join(lines) + '\n'
+
+def _labels(endpoint, method, **extra):
+    pairs = [('endpoint', endpoint), ('method', method)] + list(extra.items())
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+def _histogram(lines, name, help_text, series):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (endpoint, method), histogram in series:
+        for bound, total in histogram.cumulative():
+            lines.append(f'{name}_bucket{_labels(endpoint, method, le=bound)} {total}')
+        lines.append(f'{name}_bucket{_labels(endpoint, method, le="+Inf")} {histogram.count}')
+        lines.append(f'{name}_sum{_labels(endpoint, method)} {histogram.sum}')
+        lines.append(f'{name}_count{_labels(endpoint, method)} {histogram.count}')
+
+def _counter(lines, name, help_text, series):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for (endpoint, method), value in series:
+        lines.append(f'{name}{_labels(endpoint, method)} {value}')
+
+def _current_metrics():
+    if not has_app_context():
+        return None
+    return g.get('_request_metrics')
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that adds serialization time to the sampled request"""
+
+    def dumps(self, obj, **kwargs):
+        metrics = _current_metrics()
+        if metrics is None:
+            return super().dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            metrics.serialization_time += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current_metrics()
+    if metrics is not None:
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current_metrics()
+    if metrics is None:
+        return
+    starts = conn.info.get('_query_start')
+    if starts:
+        metrics.sql_time += time.perf_counter() - starts.pop()
+    metrics.sql_count += 1
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute: pop its start
+    # time here so the stack does not grow on a pooled connection
+    metrics = _current_metrics()
+    conn = context.connection
+    if metrics is None or conn is None or context.statement is None:
+        return
+    starts = conn.info.get('_query_start')
+    if starts:
+        metrics.sql_time += time.perf_counter() - starts.pop()
+    metrics.sql_count += 1
+
+
+class Instrumentation:
+    """Flask extension recording sampled per-endpoint request metrics"""
+
+    def __init__(self, app=None):
+        self.registry = MetricsRegistry()
+        self.sample_rate = 1.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', False)
+        app.config.setdefault('METRICS_SAMPLE_RATE', 1.0)
+        app.config.setdefault('METRICS_PATH', '/metrics')
+        app.extensions['instrumentation'] = self
+
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        self.sample_rate = float(app.config['METRICS_SAMPLE_RATE'])
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule(app.config['METRICS_PATH'], 'metrics', self.metrics_view)
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+    def _start_request(self):
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            g._request_metrics = RequestMetrics()
+
+    def _finish_request(self, response):
+        metrics = g.pop('_request_metrics', None)
+        if metrics is None:
+            return response
+        duration = time.perf_counter() - metrics.start
+        size = None if response.is_streamed else response.calculate_content_length()
+        self.registry.record(request.endpoint or 'unmatched', request.method, metrics, duration, size)
+        return response
+
+    def metrics_view(self):
+        return Response(self.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+instrumentation = Instrumentation()
+
+__all__ = ['Instrumentation', 'MetricsRegistry', 'instrumentation']
@@ -0,0 +1,129 @@
+"""
+Built-in background jobs for admin and maintenance work.
+
+Each handler takes the JobContext followed by the job's JSON arguments
+and returns a JSON-serializable summary. Bulk article edits go through
+write_batch in chunks. Every chunk is committed before progress is
+reported, so a cancelled job keeps the chunks it already finished.
+
+Jobs run in worker processes, so change listeners fire there and not in
+the web processes. What lives in the database (catalog stats, related
+article rows, the snapshot refresh job) is current at once. State kept
+in process memory is not: the worker's copy of the memory search index
+is synced to its file when a bulk edit ends, and web processes merge it
+within SEARCH_INDEX_SYNC_INTERVAL; a web process's memory response cache
+is not invalidated at all and serves entries until they expire, so run
+jobs with the filesystem cache backend. The feed cache rebuilds itself
+from the database on the next request, so there is no feed job.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+
+from models import Article, Tag, write_batch
+from utils.job_queue import job
+
+# Articles edited per committed chunk
+CHUNK_SIZE = 500
+
+def _chunks(ids, size=CHUNK_SIZE):
+    ids = sorted({int(article_id) for article_id in ids})
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+@contextmanager
+def _publishing_search_changes():
+    """Write this worker's search index changes to the shared file on exit"""
+    from services.search_index import search_index
+
+    try:
+        yield
+    finally:
+        # Also after a cancel or failure: the finished chunks are committed
+        search_index.save()
+
+@job('articles.set_status')
+def set_article_status(ctx, article_ids, status='published'):
+    """Publish (or unpublish) articles; first publication stamps published_at"""
+    if status not in ('published', 'draft'):
+        raise ValueError("status must be 'published' or 'draft'")
+
+    total = len(set(article_ids))
+    done = changed = 0
+    with _publishing_search_changes():
+        for chunk in _chunks(article_ids):
+            with write_batch():
+                for article in Article.query.filter(Article.id.in_(chunk)):
+                    if article.status == status:
+                        continue
+                    changes = {'status': status}
+                    if status == 'published' and article.published_at is None:
+                        changes['published_at'] = datetime.utcnow()
+                    article.update(**changes)
+                    changed += 1
+            done += len(chunk)
+            ctx.progress(done, total, f'{changed} of {done} articles changed')
+    return {'articles': total, 'changed': changed}
+
+@job('articles.retag')
+def retag_articles(ctx, article_ids, add=(), remove=()):
+    """Add and remove tags (by id) on many articles"""
+    add_tags = Tag.query.filter(Tag.id.in_(add)).all() if add else []
+    if len(add_tags) != len(set(add)):
+        raise ValueError('Unknown tag id in add')
+    remove = set(remove)
+
+    total = len(set(article_ids))
+    done = changed = 0
+    with _publishing_search_changes():
+        for chunk in _chunks(article_ids):
+            with write_batch():
+                for article in Article.query.filter(Article.id.in_(chunk)):
+                    tags = [tag for tag in article.tags if tag.id not in remove]
+                    tags += [tag for tag in add_tags if tag not in tags]
+                    if tags == article.tags:
+                        continue
+                    article.update(tags=tags)
+                    changed += 1
+            done += len(chunk)
+            ctx.progress(done, total, f'{changed} of {done} articles changed')
+    return {'articles': total, 'changed': changed}
+
+@job('search.rebuild', max_attempts=1)
+def rebuild_search(ctx, batch_size=500):
+    """Re-index every published article"""
+    from services.search_index import search_index
+
+    return {'indexed': search_index.rebuild(batch_size=batch_size)}
+
+@job('related.rebuild')
+def rebuild_related(ctx, top_k=10):
+    """Recompute related articles for every published article"""
+    from services.related_articles import RelatedArticlesJob
+
+    return {'written': RelatedArticlesJob(top_k=top_k).rebuild()}
+
+@job('catalog.rebuild')
+def rebuild_catalog(ctx):
+    """Recompute category and tag counts and latest articles"""
+    from models.catalog_stats import rebuild_catalog_stats
+
+    return rebuild_catalog_stats()
+
+@job('snapshots.refresh')
+def refresh_snapshots(ctx, full=False):
+    """Re-render static JSON snapshots of content that changed"""
+    from services.snapshots import snapshots
+
+    return snapshots.refresh(full=full, progress=ctx.progress)
+
+@job('views.compact')
+def compact_views(ctx, lag_seconds=None):
+    """Compact raw view counters into rollups and apply retention"""
+    from services.view_rollups import ViewRollupJob
+
+    written, deleted = ViewRollupJob(lag_seconds=lag_seconds).run()
+    return {'written': written, 'deleted': deleted}
+
+__all__ = ['compact_views', 'rebuild_catalog', 'rebuild_related', 'rebuild_search', 'refresh_snapshots',
+           'retag_articles', 'set_article_status']
@@ -0,0 +1,393 @@
+"""
+Bulk subscriber import and batched newsletter delivery.
+
+Imports stream CSV or NDJSON records, validate them in chunks and look up
+existing subscribers with one ``IN`` query per chunk before inserting
+the new ones as a single executemany. Each chunk is committed as it
+goes, so malformed input stops the import with the counts of what was
+already imported rather than discarding it.
+
+Sending renders each template once and fans the recipients out over a
+thread pool. Every worker holds its own sender connection. The mail
+backend is chosen by NEWSLETTER_MAIL_BACKEND: ``smtp`` (default) or
+``outbox``, an in-memory stand-in for tests and local development.
+"""
+
+import csv
+import io
+import json
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from itertools import islice
+from string import Template
+from typing import Iterable, Iterator, List, Optional
+
+from flask import current_app
+from models import NewsletterSubscriber, db
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from utils.validators import validate_emails
+
+# Records validated, deduplicated and inserted together
+IMPORT_CHUNK_SIZE = 1000
+
+# Invalid rows reported back to the caller
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ('csv', 'ndjson')
+
+
+@dataclass
+class ImportResult:
+    """Counts from a bulk import; ``error`` is set when malformed input stopped it"""
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[dict] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self):
+        result = {
+            'imported': self.imported,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'errors': self.errors
+        }
+        if self.error is not None:
+            result['message'] = self.error
+        return result
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def read_records(stream, fmt: str) -> Iterator[str]:
+    """
+    Yield raw email values from a CSV or NDJSON byte stream.
+
+    CSV input needs an ``email`` header column. NDJSON lines are either
+    objects with an ``email`` key or bare JSON strings.
+
+    Raises:
+        ValueError: If the format is unknown or the input is malformed
+        csv.Error: If a CSV row cannot be parsed, e.g. a field over the size limit
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of: {', '.join(FORMATS)}")
+
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or 'email' not in reader.fieldnames:
+            raise ValueError("CSV input needs an 'email' column")
+        for row in reader:
+            yield row.get('email') or ''
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ValueError(f'Invalid JSON on line {line_number}') from None
+        yield record.get('email', '') if isinstance(record, dict) else str(record)
+
+def _until_error(records, result):
+    # Stop at the first malformed record, keeping the ones read before it
+    try:
+        yield from records
+    except ValueError as e:
+        result.error = str(e)
+    except csv.Error as e:
+        result.error = f'Malformed CSV: {e}'
+
+def _insert_new(emails):
+    """Insert subscribers, skipping any another import added meanwhile; returns the number inserted"""
+    table = NewsletterSubscriber.__table__
+    rows = [{'email': email} for email in emails]
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table).on_conflict_do_nothing(index_elements=['email']).returning(table.c.email)
+        return len(db.session.execute(stmt, rows).all())
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert(), rows)
+        return len(rows)
+    except IntegrityError:
+        inserted = 0
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert(), row)
+                inserted += 1
+            except IntegrityError:
+                pass
+        return inserted
+
+def import_subscribers(emails: Iterable[str], chunk_size: Optional[int] = None) -> ImportResult:
+    """
+    Validate, deduplicate and insert subscriber emails.
+
+    A ValueError or csv.Error raised by ``emails`` (malformed input) ends
+    the import: the records read before it are imported and committed,
+    and the message is returned in ``ImportResult.error``. Values that
+    are not strings, such as ``{"email": 5}`` in NDJSON, are counted as
+    invalid records.
+
+    Args:
+        emails: Raw email values, typically from ``read_records``
+        chunk_size: Records per validation/insert batch
+
+    Returns:
+        ImportResult: Counts of imported, duplicate and invalid records
+    """
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    result = ImportResult()
+    position = 0
+
+    for chunk in _chunks(_until_error(emails, result), chunk_size):
+        candidates = {}
+        normalized = [raw.strip().lower() if isinstance(raw, str) else '' for raw in chunk]
+        for raw, email, (is_valid, error) in zip(chunk, normalized, validate_emails(normalized)):
+            position += 1
+            if raw is not None and not isinstance(raw, str):
+                is_valid, error = False, 'Email must be a string'
+            if not is_valid:
+                result.invalid += 1
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append({'record': position, 'email': raw, 'error': error})
+            elif email in candidates:
+                result.duplicates += 1
+            else:
+                candidates[email] = position
+
+        if not candidates:
+            continue
+
+        existing = set(db.session.execute(
+            db.select(NewsletterSubscriber.email)
+            .where(NewsletterSubscriber.email.in_(list(candidates)))
+        ).scalars())
+        new_emails = [email for email in candidates if email not in existing]
+        inserted = _insert_new(new_emails) if new_emails else 0
+        db.session.commit()
+        result.imported += inserted
+        result.duplicates += len(candidates) - inserted
+
+    return result
+
+
+@dataclass(frozen=True)
+class RenderedMessage:
+    """A newsletter rendered once and reused for every recipient"""
+    subject: str
+    text: str
+    html: Optional[str] = None
+
+    def for_recipient(self, sender: str, recipient: str) -> EmailMessage:
+        message = EmailMessage()
+        message['Subject'] = self.subject
+        message['From'] = sender
+        message['To'] = recipient
+        message.set_content(self.text)
+        if self.html:
+            message.add_alternative(self.html, subtype='html')
+        return message
+
+def render_message(subject: str, text_template: str, html_template: Optional[str] = None,
+                   **context) -> RenderedMessage:
+    """Render the subject and bodies once with ``$name`` placeholders"""
+    return RenderedMessage(
+        subject=Template(subject).safe_substitute(context),
+        text=Template(text_template).safe_substitute(context),
+        html=Template(html_template).safe_substitute(context) if html_template else None
+    )
+
+
+class SMTPSender:
+    """Sends through an SMTP server, keeping one connection per thread"""
+
+    def __init__(self, host='localhost', port=25, username=None, password=None,
+                 use_tls=False, default_sender='noreply@localhost', timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.default_sender = default_sender
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            host=config.get('MAIL_SERVER', 'localhost'),
+            port=config.get('MAIL_PORT', 25),
+            username=config.get('MAIL_USERNAME'),
+            password=config.get('MAIL_PASSWORD'),
+            use_tls=config.get('MAIL_USE_TLS', False),
+            default_sender=config.get('MAIL_DEFAULT_SENDER', 'noreply@localhost')
+        )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def send(self, message: EmailMessage):
+        try:
+            self._connection().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # Reconnect once if the server dropped an idle connection
+            self._local.connection = None
+            self._connection().send_message(message)
+
+    def close(self):
+        """Close the connections opened by every thread"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        self._local = threading.local()
+
+
+class OutboxSender:
+    """In-memory sender that records messages instead of delivering them"""
+
+    def __init__(self, default_sender='noreply@localhost'):
+        self.default_sender = default_sender
+        self.outbox: List[EmailMessage] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(default_sender=config.get('MAIL_DEFAULT_SENDER', 'noreply@localhost'))
+
+    def send(self, message: EmailMessage):
+        with self._lock:
+            self.outbox.append(message)
+
+    def close(self):
+        pass
+
+SENDERS = {'smtp': SMTPSender, 'outbox': OutboxSender}
+
+def get_sender():
+    """Build the sender selected by NEWSLETTER_MAIL_BACKEND"""
+    backend = current_app.config.get('NEWSLETTER_MAIL_BACKEND', 'smtp')
+    try:
+        return SENDERS[backend].from_config(current_app.config)
+    except KeyError:
+        raise ValueError(f"Unknown NEWSLETTER_MAIL_BACKEND '{backend}'") from None
+
+
+@dataclass
+class SendResult:
+    """Counts from a newsletter send"""
+    sent: int = 0
+    failed: int = 0
+    failures: List[dict] = field(default_factory=list)
+
+    def to_dict(self):
+        return {'sent': self.sent, 'failed': self.failed, 'failures': self.failures}
+
+def active_subscriber_emails(batch_size: int = 1000) -> Iterator[str]:
+    """Stream the emails of active subscribers without loading them all"""
+    query = (db.select(NewsletterSubscriber.email)
+             .where(NewsletterSubscriber.is_active.is_(True))
+             .order_by(NewsletterSubscriber.id)
+             .execution_options(yield_per=batch_size))
+    return db.session.execute(query).scalars()
+
+def send_newsletter(message: RenderedMessage, recipients: Optional[Iterable[str]] = None,
+                    sender=None, workers: int = 8, batch_size: int = 200) -> SendResult:
+    """
+    Deliver a rendered newsletter to every recipient.
+
+    Recipients are split into batches and sent concurrently by a thread
+    pool. Failures are counted and reported without stopping the send.
+
+    Args:
+        message: Newsletter from ``render_message``
+        recipients: Emails to send to; defaults to all active subscribers
+        sender: SMTPSender/OutboxSender; defaults to ``get_sender()``
+        workers: Concurrent sending threads
+        batch_size: Recipients handed to a worker at a time
+
+    Returns:
+        SendResult: Sent and failed counts
+    """
+    if sender is None:
+        sender = get_sender()
+    if recipients is None:
+        recipients = active_subscriber_emails()
+
+    result = SendResult()
+    lock = threading.Lock()
+
+    def deliver(batch):
+        sent, failures = 0, []
+        for recipient in batch:
+            try:
+                sender.send(message.for_recipient(sender.default_sender, recipient))
+                sent += 1
+            except (smtplib.SMTPException, OSError) as e:
+                failures.append({'email': recipient, 'error': str(e)})
+        with lock:
+            result.sent += sent
+            result.failed += len(failures)
+            room = MAX_REPORTED_ERRORS - len(result.failures)
+            result.failures.extend(failures[:max(room, 0)])
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Bound the number of queued batches so huge lists stream through
+            pending = []
+            for batch in _chunks(recipients, batch_size):
+                pending.append(executor.submit(deliver, batch))
+                if len(pending) >= workers * 2:
+                    pending.pop(0).result()
+            for future in pending:
+                future.result()
+    finally:
+        sender.close()
+
+    return result
+
+__all__ = [
+    'ImportResult',
+    'OutboxSender',
+    'RenderedMessage',
+    'SMTPSender',
+    'SendResult',
+    'get_sender',
+    'import_subscribers',
+    'read_records',
+    'render_message',
+    'send_newsletter'
+]
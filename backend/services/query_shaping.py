@@ -0,0 +1,68 @@
+"""
+Query shaping for listing endpoints.
+
+Each endpoint names a loader profile instead of relying on lazy
+relationship loading, so related rows are fetched in a fixed number of
+queries regardless of page size::
+
+    authors = shaped(User.query, 'authors.list').all()
+
+Many-to-one relationships use joined loading, collections use selectin
+loading, and per-row counts come from correlated subqueries or a single
+grouped query.
+"""
+
+from sqlalchemy import column, func, select, table
+from sqlalchemy.orm import joinedload, selectinload, undefer
+
+from models import Article, db
+from models.user import User
+
+_comments = table('comments', column('article_id'))
+
+# Loader options applied per endpoint
+LOADER_PROFILES = {
+    'authors.list': (
+        undefer(User.article_count),
+        undefer(User.comment_count),
+    ),
+    'authors.detail': (
+        undefer(User.article_count),
+        undefer(User.comment_count),
+        selectinload(User.articles),
+    ),
+    'posts.list': (
+        joinedload(Article.author),
+        joinedload(Article.category),
+        selectinload(Article.tags),
+    ),
+    'posts.detail': (
+        joinedload(Article.author),
+        joinedload(Article.category),
+        joinedload(Article.rendering),
+        selectinload(Article.tags),
+    ),
+}
+
+def shaped(query, profile):
+    """Apply the loader options registered for ``profile`` to ``query``"""
+    try:
+        options = LOADER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f'Unknown loader profile: {profile}') from None
+    return query.options(*options)
+
+def comment_counts(article_ids):
+    """Return ``{article_id: comment_count}`` for a page of articles in one query"""
+    if not article_ids:
+        return {}
+    rows = db.session.execute(
+        select(_comments.c.article_id, func.count())
+        .where(_comments.c.article_id.in_(article_ids))
+        .group_by(_comments.c.article_id)
+    )
+    counts = dict.fromkeys(article_ids, 0)
+    counts.update(rows.all())
+    return counts
+
+__all__ = ['LOADER_PROFILES', 'comment_counts', 'shaped']
@@ -0,0 +1,283 @@
+"""
+Response cache for read-heavy GET endpoints.
+
+Views opt in with the ``cached`` decorator::
+
+    @posts_bp.route('/<int:post_id>')
+    @response_cache.cached(tags=('articles', 'article:{post_id}'))
+    def get_post(post_id):
+        ...
+
+Entries are keyed by path and normalized query args and carry the
+versions of their tags. Writes through BaseModel bump the version of the
+matching tags, which invalidates every entry recorded under them. Cached
+responses carry ETag/Last-Modified headers and answer conditional
+requests with 304.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, make_response, request
+from models import on_model_change
+
+# Tags invalidated when a model of the given class is written
+MODEL_TAGS = {
+    'Article': ('articles', 'article:{id}'),
+    'Category': ('categories', 'category:{id}'),
+    'Tag': ('tags', 'tag:{id}'),
+    'Author': ('authors', 'author:{id}')
+}
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU backend"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires_at = time.time() + timeout if timeout else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemBackend:
+    """
+    Backend storing one pickle file per key, shareable across worker processes.
+
+    Each process counts the files it creates instead of listing the
+    directory on every write. Once the count passes ``maxsize`` the oldest
+    files are removed down to ``low_water`` of it, so the directory scan
+    runs once per ``(1 - low_water) * maxsize`` new entries.
+    """
+
+    def __init__(self, directory, maxsize=10000, low_water=0.9):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.low_water = low_water
+        os.makedirs(directory, exist_ok=True)
+        self._count = len(os.listdir(directory))
+        self._prune_lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, timeout=None):
+        expires_at = time.time() + timeout if timeout else None
+        path = self._path(key)
+        created = not os.path.exists(path)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        if created:
+            self._count += 1
+            if self._count > self.maxsize:
+                self._prune()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        self._count = 0
+
+    def _prune(self):
+        # One thread prunes at a time; the others keep writing
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            names = os.listdir(self.directory)
+            # Another process may already have pruned
+            if len(names) <= self.maxsize:
+                self._count = len(names)
+                return
+            mtimes = []
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    mtimes.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    pass
+            mtimes.sort()
+            keep = int(self.maxsize * self.low_water)
+            for _, path in mtimes[:max(len(mtimes) - keep, 0)]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._count = min(len(mtimes), keep)
+        finally:
+            self._prune_lock.release()
+
+
+class ResponseCache:
+    """Flask extension caching GET responses with tag-based invalidation"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.default_timeout = 300
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Select the backend from RESPONSE_CACHE_* config"""
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        maxsize = app.config.get('RESPONSE_CACHE_SIZE', 1024)
+        self.default_timeout = app.config.get('RESPONSE_CACHE_TIMEOUT', self.default_timeout)
+
+        if backend == 'filesystem':
+            directory = app.config.get('RESPONSE_CACHE_DIR',
+                                       os.path.join(app.instance_path, 'response_cache'))
+            self.backend = FileSystemBackend(directory, maxsize=maxsize)
+        elif backend == 'memory':
+            self.backend = MemoryBackend(maxsize=maxsize)
+        else:
+            self.backend = None
+
+        app.extensions['response_cache'] = self
+
+    def cached(self, tags=(), timeout=None):
+        """
+        Cache a GET view's response.
+
+        Args:
+            tags: Tag names, formatted with the view's keyword arguments
+            timeout: Entry lifetime in seconds (defaults to RESPONSE_CACHE_TIMEOUT)
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if self.backend is None or request.method != 'GET':
+                    return f(*args, **kwargs)
+
+                key = self._make_key()
+                # Versions are read before the view runs so a concurrent write
+                # can never be hidden behind a newer version
+                versions = self._tag_versions([tag.format(**kwargs) for tag in tags])
+                entry = self.backend.get(key)
+
+                if entry is not None and entry['tags'] == versions:
+                    self._count('hits')
+                    return self._build_response(entry, 'HIT')
+
+                self._count('misses')
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+
+                body = response.get_data()
+                entry = {
+                    'body': body,
+                    'mimetype': response.mimetype,
+                    'etag': hashlib.md5(body).hexdigest(),
+                    'last_modified': int(time.time()),
+                    'tags': versions
+                }
+                self.backend.set(key, entry, timeout or self.default_timeout)
+                return self._build_response(entry, 'MISS')
+
+            return decorated
+
+        return decorator
+
+    def invalidate(self, *tags):
+        """Invalidate every entry recorded under any of ``tags``"""
+        if self.backend is None:
+            return
+        for tag in tags:
+            self.backend.set(f'tag:{tag}', uuid.uuid4().hex)
+
+    def stats(self):
+        """Return hit/miss counters"""
+        with self._stats_lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _make_key(self):
+        args = sorted(request.args.items(multi=True))
+        return f'view:{request.path}?{urlencode(args)}'
+
+    def _tag_versions(self, tags):
+        versions = {}
+        for tag in tags:
+            version = self.backend.get(f'tag:{tag}')
+            if version is None:
+                version = uuid.uuid4().hex
+                self.backend.set(f'tag:{tag}', version)
+            versions[tag] = version
+        return versions
+
+    def _build_response(self, entry, status):
+        response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+        response.set_etag(entry['etag'])
+        response.last_modified = entry['last_modified']
+        response.headers['X-Cache'] = status
+        return response.make_conditional(request)
+
+# Shared cache instance, initialized in create_app
+response_cache = ResponseCache()
+
+@on_model_change
+def invalidate_model_tags(instance, action):
+    """Invalidate cached responses derived from the written model"""
+    tags = MODEL_TAGS.get(type(instance).__name__)
+    if tags:
+        response_cache.invalidate(*(tag.format(id=instance.id) for tag in tags))
+
+__all__ = ['FileSystemBackend', 'MemoryBackend', 'ResponseCache', 'response_cache']
@@ -0,0 +1,533 @@
+"""
+Full-text search over published articles.
+
+Two interchangeable backends are provided:
+
+- ``InvertedIndex``: in-process index with BM25 ranking, prefix matching
+  on the last query term and title/tag typeahead. Persisted to a
+  compressed file so workers start warm. Each process holds its own
+  copy and merges it with the file every SEARCH_INDEX_SYNC_INTERVAL
+  seconds (see ``SearchIndex.sync``), so updates made in other worker
+  processes, CLI commands and background jobs show up after a delay.
+- ``FTS5Index``: SQLite FTS5 table in a standalone file, shared by all
+  worker processes on a host.
+
+The active backend is kept current by an on_model_change listener that
+re-indexes an Article whenever it is saved, updated or deleted.
+"""
+
+import atexit
+import bisect
+import fcntl
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from models import Article, on_model_change
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in',
+    'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'to', 'was', 'were', 'with'
+))
+
+# Suffixes stripped by the stemmer, longest first
+SUFFIXES = ('ational', 'ization', 'fulness', 'iveness', 'ments', 'ment', 'ness',
+            'ings', 'ing', 'edly', 'ies', 'ied', 'ers', 'er', 'ed', 'ly', 'es', 's')
+
+# Weight of each field in the combined term frequency
+FIELD_WEIGHTS = {'title': 3, 'tags': 2, 'category': 2, 'body': 1}
+
+def stem(word):
+    """Strip a common English suffix, keeping at least three characters"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix in ('ies', 'ied'):
+                return word[:-3] + 'y'
+            if suffix == 's' and word.endswith('ss'):
+                return word
+            return word[:-len(suffix)]
+    return word
+
+def tokenize(text):
+    """Split text into lowercase words, dropping stop words"""
+    return [word for word in TOKEN_REGEX.findall((text or '').lower()) if word not in STOP_WORDS]
+
+def article_document(article):
+    """Return the searchable fields of an Article"""
+    return {
+        'title': article.title,
+        'body': article.content,
+        'tags': ' '.join(tag.name for tag in article.tags),
+        'category': article.category.name if article.category else ''
+    }
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index with BM25 ranking.
+
+    Args:
+        k1 (float): BM25 term frequency saturation
+        b (float): BM25 length normalization
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._words = Counter()
+        self._doc_words = {}
+        self._sorted_terms = None
+        self._sorted_words = None
+        self._lock = threading.RLock()
+        self.dirty = False
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def add(self, doc_id, title='', body='', tags='', category=''):
+        """Index a document, replacing any previous version"""
+        fields = {'title': title, 'body': body, 'tags': tags, 'category': category}
+        frequencies = Counter()
+        for field, text in fields.items():
+            for word in tokenize(text):
+                frequencies[stem(word)] += FIELD_WEIGHTS[field]
+        words = set(tokenize(title)) | set(tokenize(tags))
+
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in frequencies.items():
+                self._postings[term][doc_id] = tf
+            self._doc_terms[doc_id] = list(frequencies)
+            self._doc_lengths[doc_id] = sum(frequencies.values())
+            self._total_length += self._doc_lengths[doc_id]
+            self._doc_words[doc_id] = list(words)
+            self._words.update(words)
+            self._sorted_terms = self._sorted_words = None
+            self.dirty = True
+
+    def clear(self):
+        """Remove every document"""
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0
+            self._words.clear()
+            self._doc_words.clear()
+            self._sorted_terms = self._sorted_words = None
+            self.dirty = True
+
+    def remove(self, doc_id):
+        """Remove a document from the index"""
+        with self._lock:
+            self._remove(doc_id)
+            self._sorted_terms = self._sorted_words = None
+            self.dirty = True
+
+    def copy_document(self, source, doc_id):
+        """Replace ``doc_id`` with its entry in the index ``source``, or remove it if absent there"""
+        with self._lock, source._lock:
+            self._remove(doc_id)
+            terms = source._doc_terms.get(doc_id)
+            if terms is not None:
+                for term in terms:
+                    self._postings[term][doc_id] = source._postings[term][doc_id]
+                self._doc_terms[doc_id] = list(terms)
+                self._doc_lengths[doc_id] = source._doc_lengths[doc_id]
+                self._total_length += self._doc_lengths[doc_id]
+                self._doc_words[doc_id] = list(source._doc_words.get(doc_id, ()))
+                self._words.update(self._doc_words[doc_id])
+            self._sorted_terms = self._sorted_words = None
+            self.dirty = True
+
+    def search(self, query, page=1, per_page=10, prefix=True):
+        """
+        Rank documents against ``query`` with BM25.
+
+        When ``prefix`` is set the last query word also matches every term
+        starting with it, which gives search-as-you-type behaviour.
+
+        Returns:
+            dict: total match count and the requested page of (id, score) hits
+        """
+        words = tokenize(query)
+        if not words:
+            return {'total': 0, 'page': page, 'per_page': per_page, 'results': []}
+
+        with self._lock:
+            terms = {stem(word) for word in words[:-1]}
+            last = words[-1]
+            terms.add(stem(last))
+            if prefix:
+                terms.update(self._expand_prefix(last))
+
+            doc_count = len(self._doc_lengths) or 1
+            avg_length = self._total_length / doc_count
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        top = heapq.nlargest(page * per_page, scores.items(), key=lambda item: (item[1], -item[0]))
+        start = (page - 1) * per_page
+        return {
+            'total': len(scores),
+            'page': page,
+            'per_page': per_page,
+            'results': [{'id': doc_id, 'score': round(score, 4)} for doc_id, score in top[start:]]
+        }
+
+    def suggest(self, prefix, limit=10):
+        """Return the most common title/tag words starting with ``prefix``"""
+        prefix = (prefix or '').lower().strip()
+        if not prefix:
+            return []
+        with self._lock:
+            if self._sorted_words is None:
+                self._sorted_words = sorted(self._words)
+            matches = self._range(self._sorted_words, prefix)
+            return heapq.nlargest(limit, matches, key=lambda word: (self._words[word], word))
+
+    def save(self, path):
+        """Write the index to ``path`` as compressed JSON, atomically"""
+        with self._lock:
+            postings = {}
+            for term, docs in self._postings.items():
+                doc_ids = sorted(docs)
+                # Delta-encode doc ids to keep the file small
+                deltas = [doc_ids[0]] + [b - a for a, b in zip(doc_ids, doc_ids[1:])]
+                postings[term] = [deltas, [docs[doc_id] for doc_id in doc_ids]]
+            payload = {
+                'postings': postings,
+                'lengths': self._doc_lengths,
+                'words': self._doc_words
+            }
+            self.dirty = False
+
+        data = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 6)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.search')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Load an index written by ``save``"""
+        with open(path, 'rb') as f:
+            payload = json.loads(zlib.decompress(f.read()))
+
+        index = cls(**kwargs)
+        for term, (deltas, tfs) in payload['postings'].items():
+            doc_id = 0
+            postings = index._postings[term]
+            for delta, tf in zip(deltas, tfs):
+                doc_id += delta
+                postings[doc_id] = tf
+                index._doc_terms.setdefault(doc_id, []).append(term)
+        index._doc_lengths = {int(doc_id): length for doc_id, length in payload['lengths'].items()}
+        index._total_length = sum(index._doc_lengths.values())
+        index._doc_words = {int(doc_id): words for doc_id, words in payload['words'].items()}
+        for words in index._doc_words.values():
+            index._words.update(words)
+        return index
+
+    def _remove(self, doc_id):
+        # Caller must hold the lock
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+        words = self._doc_words.pop(doc_id, ())
+        self._words.subtract(words)
+        for word in words:
+            if self._words[word] <= 0:
+                del self._words[word]
+
+    def _expand_prefix(self, prefix):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        return self._range(self._sorted_terms, prefix)
+
+    @staticmethod
+    def _range(sorted_items, prefix):
+        start = bisect.bisect_left(sorted_items, prefix)
+        end = bisect.bisect_left(sorted_items, prefix + '\uffff')
+        return sorted_items[start:end]
+
+
+class FTS5Index:
+    """SQLite FTS5 backend with the same interface as InvertedIndex"""
+
+    def __init__(self, path):
+        self.path = path
+        self.dirty = False
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+            "title, body, tags, category, tokenize='porter unicode61', prefix='2 3')"
+        )
+
+    def __len__(self):
+        return self._connection().execute('SELECT count(*) FROM articles_fts').fetchone()[0]
+
+    def add(self, doc_id, title='', body='', tags='', category=''):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM articles_fts WHERE rowid = ?', (doc_id,))
+            conn.execute(
+                'INSERT INTO articles_fts (rowid, title, body, tags, category) VALUES (?, ?, ?, ?, ?)',
+                (doc_id, title or '', body or '', tags or '', category or '')
+            )
+
+    def remove(self, doc_id):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM articles_fts WHERE rowid = ?', (doc_id,))
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM articles_fts')
+
+    def search(self, query, page=1, per_page=10, prefix=True):
+        match = self._match_expression(tokenize(query), prefix)
+        if not match:
+            return {'total': 0, 'page': page, 'per_page': per_page, 'results': []}
+
+        conn = self._connection()
+        total = conn.execute(
+            'SELECT count(*) FROM articles_fts WHERE articles_fts MATCH ?', (match,)
+        ).fetchone()[0]
+        rows = conn.execute(
+            'SELECT rowid, -bm25(articles_fts, 3.0, 1.0, 2.0, 2.0) AS score FROM articles_fts '
+            'WHERE articles_fts MATCH ? ORDER BY score DESC LIMIT ? OFFSET ?',
+            (match, per_page, (page - 1) * per_page)
+        ).fetchall()
+        return {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'results': [{'id': doc_id, 'score': round(score, 4)} for doc_id, score in rows]
+        }
+
+    def suggest(self, prefix, limit=10):
+        words = tokenize(prefix)
+        if not words:
+            return []
+        rows = self._connection().execute(
+            'SELECT title, tags FROM articles_fts WHERE articles_fts MATCH ? LIMIT 200',
+            (f'{{title tags}} : "{words[-1]}"*',)
+        ).fetchall()
+        counts = Counter(
+            word for row in rows for word in tokenize(' '.join(row)) if word.startswith(words[-1])
+        )
+        return [word for word, _ in counts.most_common(limit)]
+
+    def save(self, path=None):
+        """FTS5 writes are durable on commit; nothing to do"""
+        self.dirty = False
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _match_expression(words, prefix):
+        if not words:
+            return ''
+        terms = [f'"{word}"' for word in words]
+        if prefix:
+            terms[-1] += '*'
+        return ' '.join(terms)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+@contextmanager
+def _file_lock(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class SearchIndex:
+    """Flask extension owning the configured search backend"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.path = None
+        self.sync_interval = 30
+        # Memory backend: articles re-indexed here since the last sync,
+        # and whether the whole index was rebuilt here
+        self._changed = set()
+        self._rebuilt = False
+        self._synced_mtime = None
+        self._next_sync = 0
+        self._sync_lock = threading.RLock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Open the backend chosen by SEARCH_BACKEND ('memory' or 'fts5').
+
+        The memory index is loaded from SEARCH_INDEX_PATH when present and
+        synced with it periodically and at exit.
+        """
+        kind = app.config.get('SEARCH_BACKEND', 'memory')
+        default_path = os.path.join(app.instance_path, 'search.fts5' if kind == 'fts5' else 'search.idx')
+        self.path = app.config.get('SEARCH_INDEX_PATH', default_path)
+        self.sync_interval = app.config.get('SEARCH_INDEX_SYNC_INTERVAL', self.sync_interval)
+
+        if kind == 'fts5':
+            self.backend = FTS5Index(self.path)
+        else:
+            self.backend = InvertedIndex()
+            self._changed.clear()
+            self._rebuilt = False
+            self._synced_mtime = None
+            self.sync()
+
+        app.extensions['search_index'] = self
+        atexit.unregister(self.save)
+        atexit.register(self.save)
+
+    def index_article(self, article):
+        """Add or refresh an article; drafts are removed from the index"""
+        if article.status != 'published':
+            self.remove_article(article.id)
+            return
+        with self._sync_lock:
+            self.backend.add(article.id, **article_document(article))
+            self._track(article.id)
+
+    def remove_article(self, article_id):
+        """Remove an article from the index"""
+        with self._sync_lock:
+            self.backend.remove(article_id)
+            self._track(article_id)
+
+    def rebuild(self, batch_size=500):
+        """Re-index every published article from the database"""
+        with self._sync_lock:
+            self.backend.clear()
+            query = Article.query.filter_by(status='published').order_by(Article.id)
+            for article in query.yield_per(batch_size):
+                self.backend.add(article.id, **article_document(article))
+            self._rebuilt = True
+            self.save()
+            return len(self.backend)
+
+    def search(self, query, page=1, per_page=10):
+        self._maybe_sync()
+        return self.backend.search(query, page=page, per_page=per_page)
+
+    def suggest(self, prefix, limit=10):
+        self._maybe_sync()
+        return self.backend.suggest(prefix, limit=limit)
+
+    def save(self):
+        """Persist the index if it changed since the last save"""
+        if isinstance(self.backend, InvertedIndex):
+            self.sync()
+        elif self.backend is not None and self.backend.dirty:
+            self.backend.save(self.path)
+
+    def sync(self):
+        """
+        Merge the memory index with the file at SEARCH_INDEX_PATH.
+
+        Every worker process, CLI command and job worker holds its own
+        copy of the index. Under a file lock, the file is loaded if another
+        process wrote it since this one last synced, the articles
+        re-indexed here are copied onto it, and the result is written
+        back. A rebuild made here replaces the file instead.
+        """
+        if not isinstance(self.backend, InvertedIndex):
+            return
+        with self._sync_lock, _file_lock(self.path + '.lock'):
+            index = self.backend
+            mtime = _mtime(self.path)
+            if not self._rebuilt and mtime is not None and mtime != self._synced_mtime:
+                try:
+                    index = InvertedIndex.load(self.path)
+                except (OSError, ValueError, zlib.error):
+                    logger.warning('Ignoring unreadable search index at %s', self.path)
+                    index = self.backend
+                else:
+                    for doc_id in self._changed:
+                        index.copy_document(self.backend, doc_id)
+            if self._rebuilt or self._changed:
+                index.save(self.path)
+                mtime = _mtime(self.path)
+            index.dirty = False
+            self.backend = index
+            self._synced_mtime = mtime
+            self._changed.clear()
+            self._rebuilt = False
+            self._next_sync = time.monotonic() + self.sync_interval
+
+    def _track(self, doc_id):
+        # FTS5 writes go straight to the shared file
+        if isinstance(self.backend, InvertedIndex):
+            self._changed.add(doc_id)
+
+    def _maybe_sync(self):
+        # Cheap unless the interval has passed and there is something to merge
+        if not isinstance(self.backend, InvertedIndex) or time.monotonic() < self._next_sync:
+            return
+        self._next_sync = time.monotonic() + self.sync_interval
+        if self._changed or _mtime(self.path) != self._synced_mtime:
+            self.sync()
+
+# Shared search index, initialized in create_app
+search_index = SearchIndex()
+
+@on_model_change
+def reindex_article(instance, action):
+    """Keep the search index in step with Article writes"""
+    if not isinstance(instance, Article) or search_index.backend is None:
+        return
+    if action == 'delete':
+        search_index.remove_article(instance.id)
+    else:
+        search_index.index_article(instance)
+
+__all__ = ['FTS5Index', 'InvertedIndex', 'SearchIndex', 'search_index', 'stem', 'tokenize']
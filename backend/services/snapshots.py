@@ -0,0 +1,325 @@
+"""
+Static JSON snapshots of published content.
+
+With SNAPSHOT_DIR set, the public read API is also published as
+pre-rendered JSON files that a static file server or the frontend can
+serve with no database load. The tree mirrors the API paths::
+
+    posts/<id>.json                  article with author, category and tags
+    posts/pages/<n>.json             newest-first listing pages
+    posts/featured.json
+    categories/index.json
+    categories/<id>/pages/<n>.json
+    authors/index.json
+    authors/<id>.json
+    authors/<id>/pages/<n>.json
+    manifest.json                    content hash of every file
+
+Each file is written to a temporary name and renamed into place, so a
+reader sees either the old or the new version, never a partial one.
+
+Refreshes are incremental. An article is rendered again only when its
+row, author, category or tags changed since the manifest was written,
+and a file whose content hash is unchanged is not rewritten. Content changes
+queue one coalesced ``snapshots.refresh`` job for ``flask jobs worker``.
+``flask snapshots rebuild`` renders everything on a process pool.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from models import Article, ArticleRendering, Author, Category, Tag, db, db_now, on_model_change
+from services.query_shaping import shaped
+from utils.job_queue import job_queue
+from utils.pagination import DEFAULT_ARTICLE_FIELDS
+from utils.process_pool import app_pool
+from utils.serializers import dumps
+
+PAGE_SIZE = 20
+FEATURED_LIMIT = 10
+# Articles rendered per query (and per process pool task)
+CHUNK_SIZE = 500
+MANIFEST = 'manifest.json'
+
+# Columns never written to a public snapshot
+PRIVATE_FIELDS = frozenset({'email', 'password', 'password_hash'})
+
+def _public(instance):
+    if instance is None:
+        return None
+    return {column.key: getattr(instance, column.key)
+            for column in instance.__table__.columns if column.key not in PRIVATE_FIELDS}
+
+def _article_document(article):
+    document = _public(article)
+    document['author'] = _public(article.author)
+    document['category'] = _public(article.category)
+    document['tags'] = [_public(tag) for tag in article.tags]
+    if article.rendering is not None:
+        document.update(article.rendering.to_dict())
+    return document
+
+def _article_versions():
+    """
+    ``{article id: version}`` of published articles, covering their author,
+    category and tags. Rows stamped within the last second of database
+    time get no version, because a second write in the same second
+    (timestamps may have one-second resolution) would not change it.
+    """
+    settled = db_now() - timedelta(seconds=1)
+    rows = db.session.execute(
+        db.select(Article.id, Article.updated_at, Category.updated_at, Author.updated_at)
+        .select_from(Article)
+        .outerjoin(Category, Article.category_id == Category.id)
+        .outerjoin(Author, Article.author_id == Author.id)
+        .where(Article.status == 'published')
+    )
+    # Changing an article's tags does not touch its row, so the tag ids are
+    # part of the version
+    tags = defaultdict(list)
+    for article_id, tag_id, stamp in db.session.execute(
+        db.select(Article.id, Tag.id, Tag.updated_at)
+        .select_from(Article)
+        .join(Article.tags)
+        .where(Article.status == 'published')
+        .order_by(Article.id, Tag.id)
+    ):
+        tags[article_id].append((tag_id, stamp))
+
+    versions = {}
+    for article_id, *stamps in rows:
+        tag_stamps = tags.get(article_id, ())
+        stamps += [stamp for _, stamp in tag_stamps]
+        if any(stamp and stamp >= settled for stamp in stamps):
+            versions[str(article_id)] = None
+        else:
+            tag_ids = ','.join(str(tag_id) for tag_id, _ in tag_stamps)
+            versions[str(article_id)] = '|'.join(str(stamp) for stamp in stamps) + f'|tags:{tag_ids}'
+    return versions
+
+def _chunks(ids, size=CHUNK_SIZE):
+    return [ids[start:start + size] for start in range(0, len(ids), size)]
+
+def _write_atomic(path, body):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(body)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+class _Snapshot:
+    """Files written during one refresh, skipping those whose content is unchanged"""
+
+    def __init__(self, directory, previous=None):
+        self.directory = directory
+        self.previous = previous or {}
+        self.files = {}
+        self.changed = 0
+
+    def write(self, path, data):
+        body = dumps(data)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha1(body).hexdigest()
+        self.files[path] = digest
+        full_path = os.path.join(self.directory, path)
+        if self.previous.get(path) == digest and os.path.exists(full_path):
+            return
+        _write_atomic(full_path, body)
+        self.changed += 1
+
+    def write_pages(self, prefix, items):
+        pages = max(1, -(-len(items) // PAGE_SIZE))
+        for page in range(1, pages + 1):
+            self.write(f'{prefix}/{page}.json', {
+                'items': items[(page - 1) * PAGE_SIZE:page * PAGE_SIZE],
+                'page': page,
+                'pages': pages,
+                'total': len(items)
+            })
+
+    def write_articles(self, article_ids):
+        query = shaped(Article.query, 'posts.detail').filter(Article.id.in_(article_ids))
+        for article in query:
+            self.write(f'posts/{article.id}.json', _article_document(article))
+
+    def write_indexes(self):
+        """Listing, featured, category and author files"""
+        # Listings carry the rendered (plain-text) excerpt where there is one
+        columns = [db.func.coalesce(ArticleRendering.excerpt, Article.excerpt).label(name) if name == 'excerpt'
+                   else getattr(Article, name) for name in DEFAULT_ARTICLE_FIELDS]
+        rows = db.session.execute(
+            db.select(*columns)
+            .outerjoin(ArticleRendering, ArticleRendering.article_id == Article.id)
+            .where(Article.status == 'published')
+            .order_by(Article.published_at.desc(), Article.id.desc())
+        )
+        items = [dict(row._mapping) for row in rows]
+        by_category, by_author = defaultdict(list), defaultdict(list)
+        for item in items:
+            by_category[item['category_id']].append(item)
+            by_author[item['author_id']].append(item)
+
+        self.write_pages('posts/pages', items)
+        featured = [item for item in items if item['is_featured']][:FEATURED_LIMIT]
+        self.write('posts/featured.json', {'items': featured})
+
+        categories = []
+        for category in Category.query.order_by(Category.id):
+            categories.append(dict(_public(category), article_count=len(by_category[category.id])))
+            self.write_pages(f'categories/{category.id}/pages', by_category[category.id])
+        self.write('categories/index.json', {'items': categories})
+
+        # Authors without published articles are not public
+        authors = []
+        author_ids = [author_id for author_id in by_author if author_id is not None]
+        for author in Author.query.filter(Author.id.in_(author_ids)).order_by(Author.id):
+            profile = dict(_public(author), article_count=len(by_author[author.id]))
+            authors.append(profile)
+            self.write(f'authors/{author.id}.json', profile)
+            self.write_pages(f'authors/{author.id}/pages', by_author[author.id])
+        self.write('authors/index.json', {'items': authors})
+
+    def remove_stale(self):
+        """Delete files of the previous snapshot that this one did not write"""
+        removed = 0
+        for path in self.previous.keys() - self.files.keys():
+            try:
+                os.remove(os.path.join(self.directory, path))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class SnapshotPublisher:
+    """Flask extension writing JSON snapshots under SNAPSHOT_DIR"""
+
+    def __init__(self, app=None):
+        self.directory = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Enable publishing when SNAPSHOT_DIR is configured"""
+        directory = app.config.get('SNAPSHOT_DIR')
+        self.directory = os.path.abspath(directory) if directory else None
+        app.extensions['snapshots'] = self
+
+    def refresh(self, full=False, progress=None):
+        """
+        Bring the snapshot in step with the database.
+
+        Args:
+            full: Render every article, not only those that changed
+            progress: Optional ``progress(done, total)`` callback
+
+        Returns:
+            dict: Articles rendered, files written and files removed
+        """
+        with self._locked():
+            manifest = self._load_manifest()
+            versions = _article_versions()
+            rendered = {} if full else manifest['articles']
+            snapshot = _Snapshot(self.directory, manifest['files'])
+
+            stale_ids = []
+            for article_id, version in versions.items():
+                path = f'posts/{article_id}.json'
+                if version is not None and rendered.get(article_id) == version and path in snapshot.previous:
+                    snapshot.files[path] = snapshot.previous[path]
+                else:
+                    stale_ids.append(int(article_id))
+
+            done = 0
+            for chunk in _chunks(sorted(stale_ids)):
+                snapshot.write_articles(chunk)
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, len(stale_ids))
+
+            return self._finish(snapshot, versions, rendered=len(stale_ids))
+
+    def rebuild(self, processes=None, factory=None, factory_args=()):
+        """
+        Render every file from scratch.
+
+        With ``processes`` above 1, articles are rendered on a pool of
+        spawned processes, each building its own app by calling the
+        ``factory`` import string with ``factory_args``.
+        """
+        with self._locked():
+            manifest = self._load_manifest()
+            versions = _article_versions()
+            chunks = _chunks(sorted(int(article_id) for article_id in versions))
+            snapshot = _Snapshot(self.directory, manifest['files'])
+
+            if processes and processes > 1 and factory:
+                with app_pool(processes, factory, factory_args) as pool:
+                    for files, changed in pool.map(_render_chunk, [(self.directory, chunk) for chunk in chunks]):
+                        snapshot.files.update(files)
+                        snapshot.changed += changed
+            else:
+                for chunk in chunks:
+                    snapshot.write_articles(chunk)
+
+            return self._finish(snapshot, versions, rendered=len(versions))
+
+    def _finish(self, snapshot, versions, rendered):
+        snapshot.write_indexes()
+        removed = snapshot.remove_stale()
+        manifest = {
+            'generated_at': datetime.utcnow().isoformat(),
+            'files': snapshot.files,
+            'articles': versions
+        }
+        _write_atomic(os.path.join(self.directory, MANIFEST), json.dumps(manifest).encode('utf-8'))
+        return {'articles': rendered, 'written': snapshot.changed, 'removed': removed}
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST), 'rb') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'files': {}, 'articles': {}}
+
+    @contextmanager
+    def _locked(self):
+        # One writer at a time across workers sharing the directory
+        if self.directory is None:
+            raise ValueError('SNAPSHOT_DIR is not configured')
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _render_chunk(task):
+    directory, article_ids = task
+    snapshot = _Snapshot(directory)
+    snapshot.write_articles(article_ids)
+    db.session.remove()
+    return snapshot.files, snapshot.changed
+
+# Shared publisher, initialized in create_app
+snapshots = SnapshotPublisher()
+
+@on_model_change
+def queue_snapshot_refresh(instance, action):
+    """Queue a snapshot refresh when published content may have changed"""
+    if snapshots.directory is None or not isinstance(instance, (Article, Author, Category, Tag)):
+        return
+    job_queue.enqueue('snapshots.refresh', priority=5, unique=True)
+
+__all__ = ['SnapshotPublisher', 'snapshots']
@@ -0,0 +1,188 @@
+"""
+In-process buffer for article view events.
+
+Views are aggregated in memory per article per time bucket and a
+background thread periodically bulk-upserts the counters into
+ArticleViewCount, so a page view costs a dict increment instead of a
+database write. Counters the database rejects, such as views of an
+article that does not exist, are dropped one by one so they cannot hold
+up the rest of the buffer.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+class ViewBuffer:
+    """
+    Bounded view counter buffer with a background flusher thread.
+
+    The buffer holds at most ``capacity`` distinct (article, bucket) keys.
+    Views for a new key arriving while the buffer is full are dropped and
+    counted, so memory stays bounded under bursts or a stalled database.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.capacity = 10000
+        self.bucket_seconds = 300
+        self.flush_interval = 5.0
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.accepted = 0
+        self.dropped = 0
+        self.flushed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the buffer from app config and register shutdown flush"""
+        self.app = app
+        self.capacity = app.config.get('VIEW_BUFFER_CAPACITY', self.capacity)
+        self.bucket_seconds = app.config.get('VIEW_BUFFER_BUCKET_SECONDS', self.bucket_seconds)
+        self.flush_interval = app.config.get('VIEW_BUFFER_FLUSH_INTERVAL', self.flush_interval)
+        app.extensions['view_buffer'] = self
+        atexit.unregister(self.shutdown)
+        atexit.register(self.shutdown)
+
+    def record(self, article_id, count=1, timestamp=None):
+        """
+        Buffer ``count`` views of ``article_id``.
+
+        Returns:
+            bool: False if the views were dropped because the buffer is full
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        bucket = int(timestamp // self.bucket_seconds) * self.bucket_seconds
+        key = (article_id, bucket)
+
+        with self._lock:
+            if key not in self._counts and len(self._counts) >= self.capacity:
+                self.dropped += count
+                return False
+            self._counts[key] += count
+            self.accepted += count
+
+        self._ensure_started()
+        return True
+
+    def flush(self):
+        """Write all buffered counters to the database"""
+        with self._lock:
+            if not self._counts:
+                return 0
+            counts, self._counts = self._counts, defaultdict(int)
+
+        from models import db
+
+        try:
+            with self.app.app_context():
+                self._write(counts.items())
+        except (IntegrityError, DataError):
+            # A bad row (e.g. an unknown article) must not block the rest
+            logger.warning('Rejected view counter batch, retrying %d counters one by one', len(counts))
+            with self.app.app_context():
+                db.session.rollback()
+                return self._flush_each(counts)
+        except Exception:
+            logger.exception('Failed to flush %d view counters', len(counts))
+            with self.app.app_context():
+                db.session.rollback()
+            self._requeue(counts)
+            return 0
+
+        self.flushed += sum(counts.values())
+        return len(counts)
+
+    def shutdown(self):
+        """Stop the flusher thread and write whatever is still buffered"""
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval * 2)
+        if self.app is not None:
+            self.flush()
+
+    def stats(self):
+        """Return ingestion counters and current buffer size"""
+        with self._lock:
+            return {
+                'accepted': self.accepted,
+                'dropped': self.dropped,
+                'flushed': self.flushed,
+                'buffered_keys': len(self._counts),
+                'capacity': self.capacity
+            }
+
+    def _write(self, items):
+        from models import ArticleViewCount
+
+        ArticleViewCount.increment_many([
+            (article_id, datetime.utcfromtimestamp(bucket), views)
+            for (article_id, bucket), views in items
+        ])
+
+    def _flush_each(self, counts):
+        # Write counters separately, dropping those the database rejects;
+        # any other error requeues what is left for the next flush
+        from models import db
+
+        written = 0
+        items = list(counts.items())
+        for index, (key, views) in enumerate(items):
+            try:
+                self._write([(key, views)])
+            except (IntegrityError, DataError):
+                db.session.rollback()
+                logger.warning('Dropped %d views of article %r: rejected by the database', views, key[0])
+                with self._lock:
+                    self.dropped += views
+                continue
+            except Exception:
+                logger.exception('Failed to flush view counters')
+                db.session.rollback()
+                self._requeue(dict(items[index:]))
+                break
+            self.flushed += views
+            written += 1
+        return written
+
+    def _requeue(self, counts):
+        # Merge failed counters back, dropping what no longer fits
+        with self._lock:
+            for key, views in counts.items():
+                if key not in self._counts and len(self._counts) >= self.capacity:
+                    self.dropped += views
+                    continue
+                self._counts[key] += views
+
+    def _ensure_started(self):
+        # Start lazily and per process so forked workers get their own flusher
+        if self._pid == os.getpid() or self._stop.is_set():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='view-buffer-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+# Shared buffer instance, initialized in create_app
+view_buffer = ViewBuffer()
+
+__all__ = ['ViewBuffer', 'view_buffer']
@@ -0,0 +1,351 @@
+"""
+Time-bucketed rollups of article views.
+
+The view buffer writes raw counters to ArticleViewCount, one row per
+article per few-minute bucket. The rollup job compacts them into
+ArticleViewRollup rows:
+
+- hourly rows from the raw counters;
+- daily rows from the hourly rows;
+- monthly rows from the daily rows.
+
+Dashboard queries read the coarsest rollups that cover the requested
+range. The edges come from finer levels and, for the newest hour, from
+the raw counters. The cost of a query depends on the length of its
+range, not on how much history is stored.
+
+Once compacted, raw counters and finer rollups are deleted when they are
+older than their retention period (VIEW_RAW_RETENTION_DAYS,
+VIEW_HOUR_RETENTION_DAYS, VIEW_DAY_RETENTION_DAYS; None keeps them).
+Below-day resolution is therefore only available for recent history.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import current_app
+
+from models import Article, ArticleViewCount, ArticleViewRollup, db
+from models.article_view_rollup import ID_DTYPE, VIEWS_DTYPE
+
+# Coarsest first; each level is compacted from the next finer one
+GRANULARITIES = ('month', 'day', 'hour')
+
+# Raw buckets still being written by the view buffer are left alone
+DEFAULT_LAG_SECONDS = 600
+DEFAULT_RETENTION_DAYS = {'raw': 30, 'hour': 90, 'day': None}
+
+# Span of source data compacted per transaction
+WINDOWS = {'hour': timedelta(days=1), 'day': timedelta(days=31), 'month': timedelta(days=366)}
+
+AUTHOR_INDEX_SECONDS = 300
+_author_index = {'expires': 0.0, 'index': np.full(0, -1, dtype=np.int64)}
+
+def floor_period(granularity, moment):
+    """Start of the ``granularity`` period containing ``moment``"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    return moment if granularity == 'day' else moment.replace(day=1)
+
+def next_period(granularity, start):
+    """Start of the period after the one starting at ``start``"""
+    if granularity == 'hour':
+        return start + timedelta(hours=1)
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def ceil_period(granularity, moment):
+    start = floor_period(granularity, moment)
+    return start if start == moment else next_period(granularity, start)
+
+def empty():
+    return np.empty(0, dtype=ID_DTYPE), np.empty(0, dtype=VIEWS_DTYPE)
+
+def aggregate(parts):
+    """Sum (ids, views) array pairs into one pair with unique, sorted ids"""
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return empty()
+    if len(parts) == 1:
+        return parts[0]
+    ids = np.concatenate([part[0] for part in parts])
+    views = np.concatenate([part[1] for part in parts])
+    unique, inverse = np.unique(ids, return_inverse=True)
+    return unique.astype(ID_DTYPE), np.bincount(inverse, weights=views).astype(VIEWS_DTYPE)
+
+def _raw_arrays(start, end):
+    """Raw counters in [start, end) as (bucket, ids, views) arrays"""
+    rows = db.session.execute(
+        db.select(ArticleViewCount.bucket_start, ArticleViewCount.article_id, ArticleViewCount.views)
+        .where(ArticleViewCount.bucket_start >= start, ArticleViewCount.bucket_start < end)
+    ).all()
+    if not rows:
+        return np.empty(0, dtype='datetime64[s]'), *empty()
+    buckets, ids, views = zip(*rows)
+    return (np.array(buckets, dtype='datetime64[s]'), np.array(ids, dtype=ID_DTYPE),
+            np.array(views, dtype=VIEWS_DTYPE))
+
+def _raw_totals(start, end):
+    _, ids, views = _raw_arrays(start, end)
+    if not len(ids):
+        return empty()
+    unique, inverse = np.unique(ids, return_inverse=True)
+    return unique.astype(ID_DTYPE), np.bincount(inverse, weights=views).astype(VIEWS_DTYPE)
+
+def _rollup_rows(granularity, start, end):
+    """Rollups of ``granularity`` starting in [start, end) as (start, ids, views)"""
+    rows = db.session.execute(
+        db.select(ArticleViewRollup.period_start, ArticleViewRollup.article_ids, ArticleViewRollup.views)
+        .where(ArticleViewRollup.granularity == granularity,
+               ArticleViewRollup.period_start >= start, ArticleViewRollup.period_start < end)
+        .order_by(ArticleViewRollup.period_start)
+    )
+    return [(row.period_start, *ArticleViewRollup.unpack(row.article_ids, row.views)) for row in rows]
+
+def _hourly_groups(start, end):
+    """Raw counters in [start, end) summed per hour and article"""
+    buckets, ids, views = _raw_arrays(start, end)
+    if not len(ids):
+        return {}
+    hours = (buckets - np.datetime64(start, 's')) // np.timedelta64(1, 'h')
+    keys = (hours.astype(np.int64) << 32) | ids.astype(np.int64)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=views).astype(VIEWS_DTYPE)
+
+    # unique is sorted by hour, then article id
+    boundaries = np.flatnonzero(np.diff(unique >> 32)) + 1
+    groups = {}
+    for chunk_keys, chunk_views in zip(np.split(unique, boundaries), np.split(sums, boundaries)):
+        hour = start + timedelta(hours=int(chunk_keys[0] >> 32))
+        groups[hour] = ((chunk_keys & 0xFFFFFFFF).astype(ID_DTYPE), chunk_views)
+    return groups
+
+def _last_period(granularity):
+    return db.session.scalar(
+        db.select(db.func.max(ArticleViewRollup.period_start))
+        .where(ArticleViewRollup.granularity == granularity)
+    )
+
+def _watermarks():
+    """End of the newest compacted period per granularity, None if none yet"""
+    rows = db.session.execute(
+        db.select(ArticleViewRollup.granularity, db.func.max(ArticleViewRollup.period_start))
+        .group_by(ArticleViewRollup.granularity)
+    )
+    watermarks = dict.fromkeys(GRANULARITIES)
+    for granularity, last in rows:
+        watermarks[granularity] = next_period(granularity, last)
+    return watermarks
+
+def _collect(start, end, levels, watermarks):
+    """(ids, views) parts covering [start, end) from the coarsest usable level"""
+    if start >= end:
+        return []
+    if not levels:
+        return [_raw_totals(start, end)]
+    granularity, finer = levels[0], levels[1:]
+    watermark = watermarks[granularity]
+    inner_start = ceil_period(granularity, start)
+    inner_end = floor_period(granularity, end)
+    if watermark is not None:
+        inner_end = min(inner_end, watermark)
+    if watermark is None or inner_start >= inner_end:
+        return _collect(start, end, finer, watermarks)
+
+    parts = [(ids, views) for _, ids, views in _rollup_rows(granularity, inner_start, inner_end)]
+    return (parts + _collect(start, inner_start, finer, watermarks)
+            + _collect(inner_end, end, finer, watermarks))
+
+def article_totals(start, end):
+    """Views per article in [start, end) as (ids, views) arrays"""
+    return aggregate(_collect(start, end, GRANULARITIES, _watermarks()))
+
+def top_articles(start, end, limit=10):
+    """The ``limit`` most viewed articles in [start, end), with titles"""
+    ids, views = article_totals(start, end)
+    order = np.argsort(-views, kind='stable')[:limit]
+    top = [(int(ids[i]), int(views[i])) for i in order]
+
+    titles = {
+        row.id: row for row in db.session.execute(
+            db.select(Article.id, Article.title, Article.slug).where(Article.id.in_([i for i, _ in top]))
+        )
+    } if top else {}
+    return [
+        {
+            'articleId': article_id,
+            'title': titles[article_id].title if article_id in titles else None,
+            'slug': titles[article_id].slug if article_id in titles else None,
+            'views': count
+        }
+        for article_id, count in top
+    ]
+
+def _authors_of(ids):
+    """Author id for each article id, -1 when unknown"""
+    now = time.monotonic()
+    if now >= _author_index['expires'] or (len(ids) and ids.max() >= len(_author_index['index'])):
+        rows = db.session.execute(db.select(Article.id, Article.author_id)).all()
+        size = max((row.id for row in rows), default=-1) + 1
+        index = np.full(size, -1, dtype=np.int64)
+        for article_id, author_id in rows:
+            if author_id is not None:
+                index[article_id] = author_id
+        _author_index.update(expires=now + AUTHOR_INDEX_SECONDS, index=index)
+
+    index = _author_index['index']
+    authors = np.full(len(ids), -1, dtype=np.int64)
+    known = ids < len(index)
+    authors[known] = index[ids[known]]
+    return authors
+
+def views_over_time(granularity, start, end, article_id=None, by_author=False):
+    """
+    Views per ``granularity`` period in [start, end): the total, the
+    views of one article, or the views per author.
+    """
+    finer = GRANULARITIES[GRANULARITIES.index(granularity) + 1:]
+    watermarks = _watermarks()
+    watermark = watermarks[granularity]
+    periods = []
+    period = floor_period(granularity, start)
+    while period < end:
+        periods.append(period)
+        period = next_period(granularity, period)
+    if not periods:
+        return []
+
+    compacted = {}
+    if watermark is not None:
+        compacted = {period_start: (ids, views)
+                     for period_start, ids, views in _rollup_rows(granularity, periods[0], min(end, watermark))}
+
+    series = []
+    for period in periods:
+        if watermark is not None and period < watermark:
+            ids, views = compacted.get(period, empty())
+        else:
+            ids, views = aggregate(_collect(period, next_period(granularity, period), finer, watermarks))
+
+        point = {'period': period.isoformat()}
+        if article_id is not None:
+            position = np.searchsorted(ids, article_id)
+            found = position < len(ids) and ids[position] == article_id
+            point['views'] = int(views[position]) if found else 0
+        elif by_author:
+            authors, inverse = np.unique(_authors_of(ids), return_inverse=True)
+            totals = np.bincount(inverse, weights=views) if len(ids) else []
+            point['authors'] = sorted(
+                ({'authorId': int(author) if author >= 0 else None, 'views': int(total)}
+                 for author, total in zip(authors, totals)),
+                key=lambda entry: -entry['views']
+            )
+        else:
+            point['views'] = int(views.sum())
+        series.append(point)
+    return series
+
+
+class ViewRollupJob:
+    """
+    Compacts raw view counters into hourly, daily and monthly rollups and
+    applies the retention policies.
+
+    Each run resumes at the newest rollup of each level, recomputing that
+    period to absorb late counters, and only compacts periods that ended
+    at least ``lag_seconds`` ago.
+    """
+
+    def __init__(self, lag_seconds=None):
+        config = current_app.config
+        if lag_seconds is None:
+            lag_seconds = config.get('VIEW_ROLLUP_LAG_SECONDS', DEFAULT_LAG_SECONDS)
+        self.lag = timedelta(seconds=lag_seconds)
+        self.retention_days = {
+            level: config.get(f'VIEW_{level.upper()}_RETENTION_DAYS', days)
+            for level, days in DEFAULT_RETENTION_DAYS.items()
+        }
+
+    def run(self, now=None):
+        """Compact every level and apply retention; returns rows written and deleted"""
+        now = now or datetime.utcnow()
+        cutoff = floor_period('hour', now - self.lag)
+        written = {}
+        for granularity in reversed(GRANULARITIES):
+            written[granularity] = self.compact(granularity, floor_period(granularity, cutoff))
+        return written, self.apply_retention(now, cutoff)
+
+    def compact(self, granularity, cutoff):
+        """(Re)build ``granularity`` rollups for periods before ``cutoff``"""
+        start = self._resume_point(granularity)
+        if start is None:
+            return 0
+
+        written = 0
+        table = ArticleViewRollup.__table__
+        while start < cutoff:
+            end = min(floor_period(granularity, start + WINDOWS[granularity]), cutoff)
+            end = max(end, next_period(granularity, start))
+            if granularity == 'hour':
+                groups = _hourly_groups(start, end)
+            else:
+                groups = self._rolled_up_groups(granularity, start, end)
+
+            db.session.execute(table.delete().where(
+                table.c.granularity == granularity, table.c.period_start >= start, table.c.period_start < end
+            ))
+            if groups:
+                db.session.execute(table.insert(), [
+                    {'granularity': granularity, 'period_start': period, **ArticleViewRollup.pack(ids, views)}
+                    for period, (ids, views) in sorted(groups.items())
+                ])
+            db.session.commit()
+            written += len(groups)
+            start = end
+        return written
+
+    def apply_retention(self, now, cutoff):
+        """Delete compacted data older than its retention period"""
+        compacted_until = {'raw': cutoff, 'hour': floor_period('day', cutoff), 'day': floor_period('month', cutoff)}
+        deleted = {}
+        for level, days in self.retention_days.items():
+            if days is None:
+                continue
+            before = min(now - timedelta(days=days), compacted_until[level])
+            if level == 'raw':
+                result = db.session.execute(
+                    ArticleViewCount.__table__.delete().where(ArticleViewCount.bucket_start < before)
+                )
+            else:
+                table = ArticleViewRollup.__table__
+                result = db.session.execute(
+                    table.delete().where(table.c.granularity == level, table.c.period_start < before)
+                )
+            deleted[level] = result.rowcount
+        db.session.commit()
+        return deleted
+
+    def _resume_point(self, granularity):
+        last = _last_period(granularity)
+        if last is not None:
+            return last
+        if granularity == 'hour':
+            first = db.session.scalar(db.select(db.func.min(ArticleViewCount.bucket_start)))
+        else:
+            source = GRANULARITIES[GRANULARITIES.index(granularity) + 1]
+            first = db.session.scalar(
+                db.select(db.func.min(ArticleViewRollup.period_start))
+                .where(ArticleViewRollup.granularity == source)
+            )
+        return None if first is None else floor_period(granularity, first)
+
+    def _rolled_up_groups(self, granularity, start, end):
+        source = GRANULARITIES[GRANULARITIES.index(granularity) + 1]
+        parts = {}
+        for period, ids, views in _rollup_rows(source, start, end):
+            parts.setdefault(floor_period(granularity, period), []).append((ids, views))
+        return {period: aggregate(period_parts) for period, period_parts in parts.items()}
@@ -0,0 +1,37 @@
+from benchmarks.report import compare, load_baseline, percentile, save_baseline, summarize
+
+def test_percentile_nearest_rank():
+    """Test that percentiles use the nearest-rank method"""
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+def test_summarize_reports_milliseconds_and_throughput():
+    """Test that summaries are in milliseconds and requests per second"""
+    summary = summarize([0.001] * 99 + [0.1], wall_seconds=2.0, errors=1)
+    assert summary.p50_ms == 1.0
+    assert summary.p99_ms == 1.0
+    assert summary.throughput == 50.0
+    assert summary.errors == 1
+
+def test_compare_flags_latency_throughput_and_errors():
+    """Test that p99, throughput and error regressions are each reported"""
+    baseline = {'10000:inprocess:me': {'p99_ms': 10.0, 'throughput': 1000.0, 'errors': 0}}
+    ok = summarize([0.005] * 10, wall_seconds=0.01)
+    assert compare({'10000:inprocess:me': ok}, baseline) == []
+
+    slow = summarize([0.02] * 10, wall_seconds=0.1, errors=2)
+    regressions = compare({'10000:inprocess:me': slow}, baseline)
+    assert len(regressions) == 3
+
+def test_compare_ignores_runs_without_baseline():
+    """Test that compare skips runs the baseline does not cover"""
+    assert compare({'new:run': summarize([1.0], 1.0, errors=5)}, {}) == []
+
+def test_baseline_round_trip(tmp_path):
+    """Test that a saved baseline loads back unchanged"""
+    path = str(tmp_path / 'baseline.json')
+    results = {'a': summarize([0.01, 0.02], 1.0)}
+    save_baseline(path, results)
+    assert load_baseline(path) == {'a': results['a'].to_dict()}
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from models import Article, Category, CategoryStat, Tag, TagStat, db
+from models.catalog_stats import rebuild_catalog_stats
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'catalog.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+def stored_stats():
+    return (
+        {row.category_id: (row.article_count, row.latest_article_id) for row in CategoryStat.query},
+        {row.tag_id: (row.article_count, row.latest_article_id) for row in TagStat.query},
+    )
+
+def assert_matches_rebuild():
+    """The incrementally maintained rows equal a full recount"""
+    incremental = stored_stats()
+    rebuild_catalog_stats()
+    # A rebuild only writes keys with published articles
+    counted = tuple({key: value for key, value in stats.items() if value[0]} for stats in incremental)
+    assert counted == stored_stats()
+
+@pytest.fixture
+def catalog(app):
+    news, sport = Category(name='news'), Category(name='sport')
+    red, blue = Tag(name='red'), Tag(name='blue')
+    db.session.add_all([news, sport, red, blue])
+    db.session.commit()
+    first = Article(title='first', status='published', category=news, tags=[red, blue],
+                    published_at=datetime(2024, 1, 1))
+    second = Article(title='second', status='published', category=news, tags=[red],
+                     published_at=datetime(2024, 2, 1))
+    draft = Article(title='draft', status='draft', category=sport, tags=[blue])
+    db.session.add_all([first, second, draft])
+    db.session.commit()
+    return news, sport, red, blue, first, second, draft
+
+def test_new_articles_are_counted_when_published(catalog):
+    """Test that only published articles count, with the newest as latest"""
+    news, sport, red, blue, first, second, draft = catalog
+    assert stored_stats() == ({news.id: (2, second.id)},
+                              {red.id: (2, second.id), blue.id: (1, first.id)})
+    assert_matches_rebuild()
+
+def test_publishing_and_unpublishing_move_the_counts(catalog):
+    """Test that status changes add and remove an article's contribution"""
+    news, sport, red, blue, first, second, draft = catalog
+    draft.update(status='published', published_at=datetime(2024, 3, 1))
+    assert stored_stats()[0][sport.id] == (1, draft.id)
+    assert stored_stats()[1][blue.id] == (2, draft.id)
+    assert_matches_rebuild()
+
+    second.update(status='draft')
+    assert stored_stats()[0][news.id] == (1, first.id)
+    assert stored_stats()[1][red.id] == (1, first.id)
+    assert_matches_rebuild()
+
+def test_recategorizing_and_retagging_move_the_counts(catalog):
+    """Test that category and tag changes move counts and latest pointers"""
+    news, sport, red, blue, first, second, draft = catalog
+    second.update(category_id=sport.id)
+    assert stored_stats()[0] == {news.id: (1, first.id), sport.id: (1, second.id)}
+    assert_matches_rebuild()
+
+    first.tags.remove(red)
+    second.tags.append(blue)
+    db.session.commit()
+    assert stored_stats()[1] == {red.id: (1, second.id), blue.id: (2, second.id)}
+    assert_matches_rebuild()
+
+def test_deleting_articles_and_tags_drops_their_contribution(catalog):
+    """Test that deleted articles are uncounted and deleted tags lose their row"""
+    news, sport, red, blue, first, second, draft = catalog
+    second.delete()
+    assert stored_stats()[0] == {news.id: (1, first.id)}
+    assert stored_stats()[1] == {red.id: (1, first.id), blue.id: (1, first.id)}
+    assert_matches_rebuild()
+
+    blue_id = blue.id
+    first.tags.remove(blue)
+    draft.tags.remove(blue)
+    db.session.commit()
+    blue.delete()
+    assert blue_id not in stored_stats()[1]
+    assert_matches_rebuild()
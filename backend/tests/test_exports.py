@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from models import NewsletterSubscriber, db
+from routes.admin import admin_bp
+from services.exports import EXPORTS, stream_export
+from utils.token_cache import TokenCache, UserSnapshot
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'exports.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            NewsletterSubscriber(email=f'reader{i}@example.com', is_active=i != 2,
+                                 created_at=datetime(2024, 1, i))
+            for i in range(1, 6)
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+def export(fmt, **kwargs):
+    return b''.join(stream_export(EXPORTS['subscribers'], ['id', 'email', 'is_active', 'created_at'],
+                                  fmt, **kwargs))
+
+def test_ndjson_export_writes_one_object_per_row(app):
+    """Test that NDJSON rows carry the selected fields with ISO dates"""
+    rows = [json.loads(line) for line in export('ndjson', batch_size=2).splitlines()]
+    assert [row['id'] for row in rows] == [1, 2, 3, 4, 5]
+    assert rows[1] == {'id': 2, 'email': 'reader2@example.com', 'is_active': False,
+                       'created_at': '2024-01-02T00:00:00'}
+
+def test_csv_export_starts_with_a_header(app):
+    """Test that CSV exports have a header row and one line per row"""
+    rows = list(csv.reader(io.StringIO(export('csv', batch_size=2).decode('utf-8'))))
+    assert rows[0] == ['id', 'email', 'is_active', 'created_at']
+    assert rows[1] == ['1', 'reader1@example.com', 'True', '2024-01-01T00:00:00']
+    assert len(rows) == 6
+
+def test_export_range_excludes_after_and_includes_until(app):
+    """Test that after/until select the half-open id range (after, until]"""
+    rows = [json.loads(line) for line in export('ndjson', after=1, until=3).splitlines()]
+    assert [row['id'] for row in rows] == [2, 3]
+    assert export('csv', after=5).decode('utf-8').strip() == 'id,email,is_active,created_at'
+
+@pytest.fixture
+def client(app, monkeypatch):
+    cache = TokenCache()
+    cache.set('admin-token', UserSnapshot(id=1, username='admin', email='admin@example.com',
+                                          first_name='A', last_name='Admin', role='admin',
+                                          is_active=True, created_at=None))
+    monkeypatch.setattr('routes.auth.token_cache', cache)
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    return app.test_client()
+
+def test_export_endpoint_gzips_and_pins_the_range(client):
+    """Test that the endpoint compresses on request and reports the pinned upper id"""
+    response = client.get('/api/admin/export/subscribers?after=3&fields=id,email', headers={
+        'Authorization': 'Bearer admin-token', 'Accept-Encoding': 'gzip'
+    })
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['X-Export-Until'] == '5'
+    rows = [json.loads(line) for line in gzip.decompress(response.data).splitlines()]
+    assert rows == [{'id': 4, 'email': 'reader4@example.com'}, {'id': 5, 'email': 'reader5@example.com'}]
+
+def test_export_endpoint_rejects_non_integer_ids(client):
+    """Test that a malformed after or until is a 400, not an unbounded export"""
+    headers = {'Authorization': 'Bearer admin-token'}
+    for query in ('after=abc', 'until=1.5', 'after=&until=3'):
+        response = client.get(f'/api/admin/export/subscribers?{query}', headers=headers)
+        assert response.status_code == 400
+        assert 'must be an integer id' in response.json['message']
@@ -0,0 +1,55 @@
+import gzip
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from models import Article, db
+from routes.feeds import bp as feeds_bp
+from services.feeds import FeedCache, feed_cache
+
+@pytest.fixture
+def client(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'feeds.db'}")
+    db.init_app(app)
+    app.register_blueprint(feeds_bp)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Article(title='First', slug='first', content='', status='published',
+                               published_at=datetime(2024, 1, 1)))
+        db.session.commit()
+    feed_cache.invalidate()
+    yield app.test_client()
+    feed_cache.invalidate()
+
+def test_feeds_link_to_the_requesting_host(client):
+    """Test that a feed cached for one host is not served to another"""
+    # Streamed bodies are read before the next request starts
+    for _ in range(2):
+        first = client.get('/feeds/rss', base_url='http://one.example')
+        assert b'http://one.example/articles/first' in first.data
+        other = client.get('/feeds/rss', base_url='http://two.example')
+        assert b'http://two.example/articles/first' in other.data
+        assert b'one.example' not in other.data
+    assert first.headers['ETag'] != other.headers['ETag']
+
+def test_gzip_body_is_cached_with_the_feed(client):
+    """Test that a cached feed is served from its stored gzip encoding"""
+    streamed = client.get('/feeds/atom', headers={'Accept-Encoding': 'gzip'})
+    assert streamed.headers['Content-Encoding'] == 'gzip'
+    plain = gzip.decompress(streamed.data)
+
+    assert len(feed_cache._feeds) == 1
+    cached = client.get('/feeds/atom', headers={'Accept-Encoding': 'gzip'})
+    assert cached.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(cached.data) == plain == client.get('/feeds/atom').data
+
+def test_feed_cache_keeps_a_bounded_number_of_sites():
+    """Test that client-supplied hosts cannot grow the feed cache without bound"""
+    cache = FeedCache(max_feeds=2)
+    for site in ('a', 'b', 'c'):
+        cache.store_feed('rss', site, 1, site.encode())
+    assert cache.feed('rss', 'a', 1) is None
+    assert cache.feed('rss', 'c', 1) == b'c'
+    assert gzip.decompress(cache.feed('rss', 'c', 1, gzipped=True)) == b'c'
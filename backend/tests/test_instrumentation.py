@@ -0,0 +1,90 @@
+from flask import Flask, jsonify
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from services.instrumentation import Instrumentation
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(METRICS_ENABLED=True, **config)
+    engine = create_engine('sqlite://')
+
+    @app.route('/items')
+    def items():
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text('SELECT 1'))
+        return jsonify({'items': list(range(100))})
+
+    @app.route('/failing')
+    def failing():
+        with engine.connect() as conn:
+            try:
+                conn.execute(text('SELECT * FROM missing'))
+            except OperationalError:
+                pass
+            conn.execute(text('SELECT 1'))
+            return jsonify({'pending': len(conn.info.get('_query_start', []))})
+
+    instrumentation = Instrumentation(app)
+    return app, instrumentation
+
+def test_metrics_record_latency_queries_and_size():
+    """Test that latency, query counts and response size are recorded per endpoint"""
+    app, instrumentation = make_app()
+    client = app.test_client()
+    client.get('/items')
+    client.get('/items')
+
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'http_request_duration_seconds_count{endpoint="items",method="GET"} 2' in body
+    assert 'http_request_sql_queries_sum{endpoint="items",method="GET"} 6' in body
+    assert 'http_request_sql_queries_bucket{endpoint="items",method="GET",le="2"} 0' in body
+    assert 'http_request_sql_queries_bucket{endpoint="items",method="GET",le="5"} 2' in body
+    assert 'http_request_serialization_seconds_total{endpoint="items",method="GET"}' in body
+    assert 'http_response_size_bytes_bucket{endpoint="items",method="GET",le="+Inf"} 2' in body
+
+def test_sampling_skips_requests():
+    """Test that unsampled requests leave no metrics"""
+    app, instrumentation = make_app(METRICS_SAMPLE_RATE=0.0)
+    client = app.test_client()
+    client.get('/items')
+
+    assert 'endpoint="items"' not in client.get('/metrics').get_data(as_text=True)
+
+def test_metrics_view_is_exempt_from_default_rate_limits():
+    """Test that exempting metrics_view, as create_app does, keeps scrapes under the default limits"""
+    app, instrumentation = make_app()
+    limiter = Limiter(get_remote_address, app=app, default_limits=['2 per hour'], storage_uri='memory://')
+    limiter.exempt(instrumentation.metrics_view)
+    client = app.test_client()
+
+    assert {client.get('/metrics').status_code for _ in range(5)} == {200}
+    assert [client.get('/items').status_code for _ in range(3)] == [200, 200, 429]
+
+def test_disabled_by_default():
+    """Test that /metrics does not exist unless METRICS_ENABLED is set"""
+    app = Flask(__name__)
+    Instrumentation(app)
+    assert app.test_client().get('/metrics').status_code == 404
+
+def test_histogram_buckets_are_cumulative():
+    """Test that histogram buckets count every observation at or below their bound"""
+    app, instrumentation = make_app()
+    app.test_client().get('/items')
+    histogram = next(iter(instrumentation.registry._endpoints.values())).queries
+    totals = [total for _, total in histogram.cumulative()]
+    assert totals == sorted(totals)
+    assert totals[-1] == histogram.count
+
+def test_failed_queries_are_counted_and_leave_no_start_time():
+    """Test that a statement that raises is counted and its start time discarded"""
+    app, instrumentation = make_app()
+    client = app.test_client()
+
+    assert client.get('/failing').json == {'pending': 0}
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_request_sql_queries_sum{endpoint="failing",method="GET"} 2' in body
@@ -0,0 +1,171 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from flask import Flask, current_app
+
+from utils.job_queue import JobQueue, UnknownJob, job
+
+runs = []
+
+@job('test.record')
+def record(ctx, value):
+    runs.append((value, current_app.name))
+    ctx.progress(1, 2, 'halfway')
+    return {'value': value}
+
+@job('test.flaky', max_attempts=2)
+def flaky(ctx):
+    raise RuntimeError('boom')
+
+@job('test.invalid')
+def invalid(ctx):
+    raise ValueError('bad arguments')
+
+@job('test.cancellable')
+def cancellable(ctx):
+    ctx.queue.cancel(ctx.job_id)
+    ctx.progress(0.5)
+    raise AssertionError('progress() should have raised JobCancelled')
+
+@job('test.taken_over')
+def taken_over(ctx, then):
+    # Look stale, then watch another worker claim the job mid-run
+    time.sleep(0.1)
+    assert ctx.queue.claim('other-worker')['id'] == ctx.job_id
+    if then == 'progress':
+        ctx.progress(1, 1)
+    elif then == 'fail':
+        raise RuntimeError('boom')
+    return 'stale result'
+
+def make_queue(tmp_path, **config):
+    app = Flask(__name__)
+    app.config.update(JOB_QUEUE_PATH=str(tmp_path / 'jobs.sqlite3'), JOB_RETRY_DELAY=0, **config)
+    return app, JobQueue(app)
+
+def test_jobs_run_by_priority_and_record_results(tmp_path):
+    """Test that due jobs run highest priority first and store their result"""
+    app, queue = make_queue(tmp_path)
+    runs.clear()
+    low = queue.enqueue('test.record', {'value': 'low'})
+    high = queue.enqueue('test.record', {'value': 'high'}, priority=5)
+    queue.enqueue('test.record', {'value': 'later'}, delay=60)
+
+    assert queue.work(app, burst=True) == 2
+    assert runs == [('high', app.name), ('low', app.name)]
+
+    job = queue.get(high)
+    assert job['status'] == 'succeeded' and job['result'] == {'value': 'high'}
+    assert job['progress'] == 1.0 and job['message'] == 'halfway'
+    assert queue.get(low)['attempts'] == 1
+    assert queue.counts()['queued'] == 1
+
+def test_unique_jobs_coalesce_while_queued(tmp_path):
+    """Test that a unique job reuses a queued job with the same arguments"""
+    app, queue = make_queue(tmp_path)
+    first = queue.enqueue('test.record', {'value': 'x'}, unique=True)
+    assert queue.enqueue('test.record', {'value': 'x'}, unique=True) == first
+    assert queue.enqueue('test.record', {'value': 'y'}, unique=True) != first
+
+    queue.claim('worker')
+    assert queue.enqueue('test.record', {'value': 'x'}, unique=True) != first
+
+def test_failed_jobs_retry_until_max_attempts(tmp_path):
+    """Test that errors are retried, ValueError fails at once and retry() requeues"""
+    app, queue = make_queue(tmp_path)
+    job_id = queue.enqueue('test.flaky')
+
+    assert queue.run_next(app)['status'] == 'queued'
+    job = queue.run_next(app)
+    assert job['status'] == 'failed' and job['attempts'] == 2
+    assert 'RuntimeError: boom' in job['error']
+
+    assert queue.retry(job_id)['status'] == 'queued'
+    assert queue.get(job_id)['attempts'] == 0
+
+    # Invalid arguments are not worth retrying
+    queue.enqueue('test.invalid')
+    queue.run_next(app)
+    job = queue.run_next(app)
+    assert job['status'] == 'failed' and job['attempts'] == 1 and job['error'] == 'ValueError: bad arguments'
+
+def test_cancel_stops_queued_and_running_jobs(tmp_path):
+    """Test that cancel ends queued jobs at once and running ones at their next progress report"""
+    app, queue = make_queue(tmp_path)
+    queued = queue.enqueue('test.record', {'value': 'x'})
+    assert queue.cancel(queued)['status'] == 'cancelled'
+
+    running = queue.enqueue('test.cancellable')
+    assert queue.run_next(app)['status'] == 'cancelled'
+    assert queue.run_next(app) is None
+    assert queue.get(running)['attempts'] == 1
+
+def test_jobs_of_unresponsive_workers_are_requeued(tmp_path):
+    """Test that a running job without heartbeats is handed to another worker"""
+    app, queue = make_queue(tmp_path, JOB_STALE_SECONDS=0.05)
+    job_id = queue.enqueue('test.record', {'value': 'x'})
+    assert queue.claim('lost-worker')['status'] == 'running'
+
+    time.sleep(0.1)
+    claimed = queue.claim('other-worker')
+    assert claimed['id'] == job_id and claimed['worker'] == 'other-worker' and claimed['attempts'] == 2
+
+def test_unknown_jobs_are_rejected(tmp_path):
+    """Test that enqueuing an unregistered name lists the known jobs"""
+    app, queue = make_queue(tmp_path)
+    with pytest.raises(UnknownJob, match='test.record'):
+        queue.enqueue('test.missing')
+
+def test_arguments_are_checked_against_the_handler(tmp_path):
+    """Test that args the handler cannot accept are rejected at enqueue time"""
+    app, queue = make_queue(tmp_path)
+    with pytest.raises(ValueError, match="missing a required argument: 'value'"):
+        queue.enqueue('test.record')
+    with pytest.raises(ValueError, match="unexpected keyword argument 'extra'"):
+        queue.enqueue('test.record', {'value': 1, 'extra': 2})
+    assert queue.counts()['queued'] == 0
+
+@pytest.mark.parametrize('then', ['return', 'fail', 'progress'])
+def test_runs_that_lost_their_job_leave_it_alone(tmp_path, then):
+    """Test that a run whose job was requeued and claimed again cannot finish, fail or report progress on it"""
+    app, queue = make_queue(tmp_path, JOB_STALE_SECONDS=0.05)
+    job_id = queue.enqueue('test.taken_over', {'then': then}, max_attempts=3)
+
+    job = queue.run_next(app, worker='lost-worker')
+
+    assert job['id'] == job_id and job['status'] == 'running' and job['worker'] == 'other-worker'
+    assert job['attempts'] == 2 and job['result'] is None and job['error'] is None and job['progress'] is None
+
+def test_heartbeat_survives_a_failed_write(tmp_path, monkeypatch):
+    """Test that one busy heartbeat write does not stop the beat"""
+    app, queue = make_queue(tmp_path)
+    monkeypatch.setattr('utils.job_queue.HEARTBEAT_SECONDS', 0.01)
+    job_id = queue.enqueue('test.record', {'value': 'x'})
+    claimed = queue.claim('worker')
+
+    transaction, failures = queue._transaction, []
+    def busy_once():
+        if not failures:
+            failures.append(True)
+            raise sqlite3.OperationalError('database is locked')
+        return transaction()
+    monkeypatch.setattr(queue, '_transaction', busy_once)
+
+    done = threading.Event()
+    beating = threading.Thread(target=queue._heartbeat, args=(job_id, 'worker', done))
+    beating.start()
+    deadline = time.monotonic() + 5
+    while queue.get(job_id)['heartbeat_at'] == claimed['heartbeat_at'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert beating.is_alive()
+    done.set()
+    beating.join()
+    assert failures and queue.get(job_id)['heartbeat_at'] > claimed['heartbeat_at']
+
+    # A heartbeat for a job that is no longer ours stops by itself
+    beating = threading.Thread(target=queue._heartbeat, args=(job_id, 'other-worker', threading.Event()))
+    beating.start()
+    beating.join(timeout=1)
+    assert not beating.is_alive()
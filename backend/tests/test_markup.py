@@ -0,0 +1,82 @@
+import gc
+import time
+
+from utils.markup import content_hash, plain_text, render_article, render_inline, render_markdown
+
+def test_blocks_render_with_heading_anchors_and_toc():
+    """Test that every block type renders and repeated headings get unique anchors"""
+    html, toc = render_markdown(
+        '# Title\n\nSome *intro*\ntext.\n\n## Setup\n- one\n- two\n\n1. first\n\n'
+        '> quoted\n\n```python\nif a < b: pass\n```\n\n### Setup\n---'
+    )
+    assert html.split('\n') == [
+        '<h1 id="title">Title</h1>',
+        '<p>Some <em>intro</em> text.</p>',
+        '<h2 id="setup">Setup</h2>',
+        '<ul><li>one</li><li>two</li></ul>',
+        '<ol><li>first</li></ol>',
+        '<blockquote><p>quoted</p></blockquote>',
+        '<pre><code class="language-python">if a &lt; b: pass</code></pre>',
+        '<h3 id="setup-2">Setup</h3>',
+        '<hr>',
+    ]
+    assert toc == [{'level': 2, 'text': 'Setup', 'id': 'setup'},
+                   {'level': 3, 'text': 'Setup', 'id': 'setup-2'}]
+
+def test_inline_markup_is_escaped_and_urls_are_checked():
+    """Test that raw HTML is escaped and only safe link and image URLs are kept"""
+    assert render_inline('<script>x</script> **a** `<b>` snake_case') == (
+        '&lt;script&gt;x&lt;/script&gt; <strong>a</strong> <code>&lt;b&gt;</code> snake_case'
+    )
+    assert render_inline('[ok](https://x.org/?a=1&b=2)') == '<a href="https://x.org/?a=1&amp;b=2">ok</a>'
+    assert render_inline('[`code`](/docs)') == '<a href="/docs"><code>code</code></a>'
+    assert render_inline('[no](javascript:alert)') == 'no'
+    assert render_inline('[no](JavaScript:alert)') == 'no'
+    assert render_inline('![alt "x"](/a.png)') == '<img src="/a.png" alt="alt &quot;x&quot;" loading="lazy">'
+
+def test_unclosed_delimiters_render_in_linear_time():
+    """Test that long runs of unmatched emphasis and link openers stay fast"""
+    # Garbage left by earlier tests (unclosed SQLite connections) is not ours to time
+    gc.collect()
+    for source in ('*a ' * 8000, '_a ' * 8000, '**a ' * 6000, '[a' * 12000, '![a' * 8000,
+                   '[[[' * 4000 + 'a](' + 'x' * 12000):
+        start = time.perf_counter()
+        render_inline(source)
+        assert time.perf_counter() - start < 0.2
+    assert render_inline('*a **b** c*') == '<em>a <strong>b</strong> c</em>'
+    assert render_inline('[a [b](/u) *x*') == '<a href="/u">a [b</a> <em>x</em>'
+
+def test_code_spans_targets_and_headings_render_in_linear_time():
+    """Test that backtick runs, unclosed targets, heading padding and repeated headings stay fast"""
+    gc.collect()
+    for source in ('`' * 30000 + 'a', '`a ``b ' * 10000, '[a](' * 20000, '![a](' * 20000,
+                   '# a' + ' ' * 30000 + 'b', '## a\n' * 12000, '> ' * 20000 + 'x', '<' * 80000):
+        start = time.perf_counter()
+        render_article(source)
+        assert time.perf_counter() - start < 0.5
+    assert render_inline('``a`b`` `c``') == '<code>a`b</code> `c``'
+    assert render_markdown('## s\n## s\n## s-2\n## s')[0].count('id="s-') == 3
+
+def test_render_article_derives_excerpt_and_reading_stats():
+    """Test that the excerpt, word count, reading time and TOC come from the body"""
+    rendered = render_article('## Intro\n\nFirst **paragraph** here.\n\n' + 'word ' * 600)
+    assert rendered.excerpt == 'First paragraph here.'
+    assert rendered.word_count == 604
+    assert rendered.reading_minutes == 3
+    assert rendered.toc == [{'level': 2, 'text': 'Intro', 'id': 'intro'}]
+
+    assert render_article('body', excerpt='An *authored* <i>summary</i>').excerpt == 'An authored summary'
+    assert render_article('<script>x()</script>\n\nText').excerpt == 'x()'
+    long = render_article('lorem ipsum ' * 100).excerpt
+    assert len(long) <= 241 and long.endswith('…') and not long.endswith(' …')
+    assert render_article(None).reading_minutes == 0
+
+def test_plain_text_separates_blocks():
+    """Test that block tags become spaces and entities are unescaped"""
+    assert plain_text('<ul><li>one</li><li>t<em>w</em>o</li></ul><p>a &amp; b</p>') == 'one two a & b'
+
+def test_content_hash_covers_body_and_excerpt():
+    """Test that the hash changes with either input and keeps them apart"""
+    assert content_hash('a', 'b') == content_hash('a', 'b')
+    assert content_hash('a', 'b') != content_hash('a', None)
+    assert content_hash('ab', None) != content_hash('a', 'b')
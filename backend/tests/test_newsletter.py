@@ -0,0 +1,122 @@
+import io
+import smtplib
+
+import pytest
+from flask import Flask
+
+from models import NewsletterSubscriber, db
+from services.newsletter import (OutboxSender, _insert_new, import_subscribers, read_records, render_message,
+                                 send_newsletter)
+
+def test_read_records_csv():
+    """Test that CSV records yield the email column, BOM stripped"""
+    data = b'\xef\xbb\xbfemail,name\na@example.com,A\n,B\n'
+    assert list(read_records(io.BytesIO(data), 'csv')) == ['a@example.com', '']
+
+def test_read_records_csv_requires_email_column():
+    """Test that CSV input without an email column is rejected"""
+    with pytest.raises(ValueError):
+        list(read_records(io.BytesIO(b'name\nA\n'), 'csv'))
+
+def test_read_records_ndjson():
+    """Test that NDJSON lines may be objects or bare strings"""
+    data = b'{"email": "a@example.com"}\n\n"b@example.com"\n'
+    assert list(read_records(io.BytesIO(data), 'ndjson')) == ['a@example.com', 'b@example.com']
+
+def test_read_records_ndjson_reports_bad_line():
+    """Test that a malformed NDJSON line is reported by number"""
+    with pytest.raises(ValueError, match='line 2'):
+        list(read_records(io.BytesIO(b'"a@example.com"\n{oops\n'), 'ndjson'))
+
+def test_send_newsletter_renders_once_and_fans_out():
+    """Test that every recipient gets the once-rendered message"""
+    sender = OutboxSender(default_sender='news@example.com')
+    message = render_message('Digest for $month', 'Hello from $month', month='May')
+    recipients = [f'user{i}@example.com' for i in range(250)]
+
+    result = send_newsletter(message, recipients=recipients, sender=sender, workers=4, batch_size=30)
+
+    assert result.sent == 250 and result.failed == 0
+    assert sorted(m['To'] for m in sender.outbox) == sorted(recipients)
+    assert {m['Subject'] for m in sender.outbox} == {'Digest for May'}
+    assert sender.outbox[0].get_content().strip() == 'Hello from May'
+
+def test_send_newsletter_counts_failures():
+    """Test that refused recipients are counted without stopping the send"""
+    class FlakySender(OutboxSender):
+        def send(self, message):
+            if message['To'].startswith('bad'):
+                raise smtplib.SMTPRecipientsRefused({message['To']: (550, b'no such user')})
+            super().send(message)
+
+    sender = FlakySender()
+    result = send_newsletter(render_message('s', 't'), recipients=['ok@example.com', 'bad@example.com'],
+                             sender=sender, workers=2, batch_size=1)
+
+    assert (result.sent, result.failed) == (1, 1)
+    assert result.failures[0]['email'] == 'bad@example.com'
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'newsletter.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+def test_import_subscribers_dedupes_and_reports_invalid_rows(app):
+    """Test that imports skip duplicates in the input and in the database"""
+    NewsletterSubscriber(email='old@example.com').save()
+    emails = ['New@Example.com ', 'new@example.com', 'old@example.com', 'not-an-email', 'other@example.com']
+
+    result = import_subscribers(emails, chunk_size=2)
+
+    assert (result.imported, result.duplicates, result.invalid) == (2, 2, 1)
+    assert result.errors[0]['record'] == 4 and result.error is None
+    assert sorted(db.session.scalars(db.select(NewsletterSubscriber.email))) == [
+        'new@example.com', 'old@example.com', 'other@example.com']
+
+def test_import_subscribers_reports_counts_when_input_is_malformed(app):
+    """Test that a parse error returns what was imported before it"""
+    data = b'"a@example.com"\n"b@example.com"\n"c@example.com"\n{oops\n"d@example.com"\n'
+
+    result = import_subscribers(read_records(io.BytesIO(data), 'ndjson'), chunk_size=2)
+
+    assert result.imported == 3
+    assert 'line 4' in result.error
+    assert result.to_dict()['message'] == result.error
+    assert NewsletterSubscriber.query.count() == 3
+
+def test_import_subscribers_reports_counts_when_a_csv_field_is_too_large(app):
+    """Test that a CSV parse error returns what was imported before it"""
+    data = b'email\na@example.com\nb@example.com\n"' + b'x' * 200000 + b'"\nc@example.com\n'
+
+    result = import_subscribers(read_records(io.BytesIO(data), 'csv'), chunk_size=1)
+
+    assert result.imported == 2
+    assert result.error.startswith('Malformed CSV: field larger than field limit')
+    assert NewsletterSubscriber.query.count() == 2
+
+def test_import_subscribers_counts_non_string_emails_as_invalid(app):
+    """Test that NDJSON emails that are not strings are invalid records"""
+    data = b'{"email": 5}\n{"email": null}\n{"email": ["a@example.com"]}\n{"email": "b@example.com"}\n'
+
+    result = import_subscribers(read_records(io.BytesIO(data), 'ndjson'))
+
+    assert (result.imported, result.invalid) == (1, 3)
+    assert [error['error'] for error in result.errors] == [
+        'Email must be a string', 'Email cannot be empty', 'Email must be a string']
+
+def test_import_subscribers_skips_rows_inserted_concurrently(app, monkeypatch):
+    """Test that a subscriber added by another import after the lookup is not an error"""
+    def insert_after_race(emails):
+        # Another import commits the same address between lookup and insert
+        db.session.execute(NewsletterSubscriber.__table__.insert(), [{'email': 'race@example.com'}])
+        return _insert_new(emails)
+
+    monkeypatch.setattr('services.newsletter._insert_new', insert_after_race)
+    result = import_subscribers(['race@example.com', 'calm@example.com'])
+
+    assert (result.imported, result.duplicates) == (1, 1)
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+from utils import password_hashing
+from utils.password_hashing import HashingOverloaded, _HashingPool
+from werkzeug.security import generate_password_hash
+
+
+def test_hash_and_verify_round_trip():
+    """Test that hashes made on the pool verify on the pool"""
+    password_hash = password_hashing.hash_password('S3curePassw0rd')
+
+    assert password_hashing.verify_password(password_hash, 'S3curePassw0rd')
+    assert not password_hashing.verify_password(password_hash, 'wrong')
+
+def test_needs_rehash_when_parameters_change():
+    """Test that hashes made with other parameters are flagged for upgrade"""
+    current = password_hashing.hash_password('S3curePassw0rd')
+    legacy = generate_password_hash('S3curePassw0rd', method='pbkdf2:sha256:1000')
+
+    assert not password_hashing.needs_rehash(current)
+    assert password_hashing.needs_rehash(legacy)
+
+def test_pool_sheds_when_queue_is_full():
+    """Test that calls beyond max_pending fail fast instead of queueing"""
+    pool = _HashingPool(workers=1, max_pending=1, timeout=5)
+    worker = threading.Thread(target=pool.run, args=(time.sleep, 1))
+    worker.start()
+    time.sleep(0.2)
+
+    with pytest.raises(HashingOverloaded):
+        pool.run(time.sleep, 0)
+    worker.join()
+
+def test_timed_out_jobs_keep_their_slot_until_done():
+    """Test that a timeout does not free the slot of a job still running"""
+    pool = _HashingPool(workers=1, max_pending=1, timeout=0.2)
+    pool.run(time.sleep, 0)
+
+    with pytest.raises(HashingOverloaded, match='timed out'):
+        pool.run(time.sleep, 1)
+    with pytest.raises(HashingOverloaded, match='full'):
+        pool.run(time.sleep, 0)
+
+    time.sleep(1.2)
+    assert pool.run(sum, [1, 2]) == 3
+
+def test_inline_mode_without_workers():
+    """Test that a pool with no workers hashes in the calling process"""
+    pool = _HashingPool(workers=0, max_pending=1, timeout=5)
+
+    assert pool.run(sum, [1, 2, 3]) == 6
@@ -0,0 +1,72 @@
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, text
+from utils.query_counter import QueryBudgetExceeded, assert_max_queries, count_queries, query_budget
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY)'))
+    return engine
+
+def test_count_queries(engine):
+    """Test that statements executed in the block are recorded"""
+    with count_queries(engine) as counter:
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+            conn.execute(text('SELECT * FROM items'))
+
+    assert counter.count == 2
+    assert 'items' in counter.statements[1]
+
+def test_assert_max_queries_fails_over_budget(engine):
+    """Test that exceeding the budget raises with the offending statements"""
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with assert_max_queries(1, engine):
+            with engine.connect() as conn:
+                for _ in range(3):
+                    conn.execute(text('SELECT * FROM items'))
+
+    assert 'got 3' in str(excinfo.value)
+
+def test_query_budget_enforced_in_testing_mode():
+    """Test that a view over its budget fails only when TESTING is set"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db = SQLAlchemy(app)
+
+    @app.route('/items')
+    @query_budget(1)
+    def items():
+        for _ in range(2):
+            db.session.execute(text('SELECT 1'))
+        return {'ok': True}
+
+    with app.test_client() as client:
+        assert client.get('/items').status_code == 200
+
+        app.config['TESTING'] = True
+        with pytest.raises(QueryBudgetExceeded):
+            client.get('/items')
+
+def test_query_budget_counts_reads_on_every_bind():
+    """Test that statements sent to a replica bind count against the budget"""
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://',
+                      SQLALCHEMY_BINDS={'replica_0': 'sqlite://'})
+    db = SQLAlchemy(app)
+
+    @app.route('/items')
+    @query_budget(1)
+    def items():
+        replica = db.engines['replica_0']
+        with replica.connect() as conn:
+            for _ in range(2):
+                conn.execute(text('SELECT 1'))
+        return {'ok': True}
+
+    with pytest.raises(QueryBudgetExceeded, match='got 2'):
+        app.test_client().get('/items')
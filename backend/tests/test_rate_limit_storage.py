@@ -0,0 +1,82 @@
+import multiprocessing
+import time
+
+from limits import RateLimitItemPerMinute
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, SlidingWindowCounterRateLimiter
+from utils.rate_limit_storage import MmapStorage
+
+
+def hit_many(uri, count):
+    storage = storage_from_string(uri)
+    for _ in range(count):
+        storage.incr('shared', 60)
+
+def test_scheme_is_registered(tmp_path):
+    """Test that mmap:// URIs resolve to the shared-memory storage"""
+    storage = storage_from_string(f'mmap://{tmp_path}/limits.bin?slots=128')
+
+    assert isinstance(storage, MmapStorage)
+    assert storage.slots == 128
+    assert storage.check()
+
+def test_fixed_window_counters(tmp_path):
+    """Test incr/get/clear through the fixed window strategy"""
+    limiter = FixedWindowRateLimiter(storage_from_string(f'mmap://{tmp_path}/limits.bin'))
+    limit = RateLimitItemPerMinute(2)
+
+    assert limiter.hit(limit, '127.0.0.1')
+    assert limiter.hit(limit, '127.0.0.1')
+    assert not limiter.hit(limit, '127.0.0.1')
+    assert limiter.hit(limit, '10.0.0.1')
+
+def test_sliding_window_counters(tmp_path):
+    """Test the sliding window counter strategy"""
+    storage = storage_from_string(f'mmap://{tmp_path}/limits.bin')
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = RateLimitItemPerMinute(3)
+
+    assert all(limiter.hit(limit, 'client') for _ in range(3))
+    assert not limiter.hit(limit, 'client')
+    assert limiter.get_window_stats(limit, 'client').remaining == 0
+
+def test_counters_shared_across_processes(tmp_path):
+    """Test that worker processes increment the same counters"""
+    uri = f'mmap://{tmp_path}/limits.bin'
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=hit_many, args=(uri, 50)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert storage_from_string(uri).get('shared') == 200
+
+def test_memory_is_bounded(tmp_path):
+    """Test that a full table evicts instead of growing"""
+    storage = storage_from_string(f'mmap://{tmp_path}/limits.bin?slots=16')
+    for i in range(100):
+        storage.incr(f'client-{i}', 60)
+
+    assert storage.get('client-99') == 1
+    assert storage.reset() == 16
+
+def test_expired_slots_are_swept_a_batch_per_increment(tmp_path):
+    """Test that compaction is spread over increments instead of sweeping every slot at once"""
+    storage = MmapStorage(f'mmap://{tmp_path}/limits.bin?slots=64', compact_interval=0.05, compact_batch=16)
+    for i in range(40):
+        storage.incr(f'client-{i}', 0.01)
+    time.sleep(0.06)
+
+    def expired():
+        now = time.time()
+        return sum(1 for index in range(storage.slots)
+                   if storage._read(index)[0] and not storage._is_live(storage._read(index), now))
+
+    before = expired()
+    storage.incr('trigger', 60)
+    assert before - 16 <= expired() < before
+    for _ in range(3):
+        storage.incr('trigger', 60)
+    assert expired() == 0 and storage._compact_cursor == 0
+    assert storage.get('trigger') == 4
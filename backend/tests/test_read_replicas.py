@@ -0,0 +1,90 @@
+import sqlite3
+
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
+from utils.read_replicas import ReadReplicas, use_primary, RoutingSession
+
+def make_database(path, name):
+    """SQLite file whose ``source`` table says which database answered"""
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE source (name TEXT)')
+        conn.execute('INSERT INTO source VALUES (?)', (name,))
+    return f'sqlite:///{path}'
+
+def make_app(tmp_path, replicas, **config):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=make_database(tmp_path / 'primary.db', 'primary'),
+        SQLALCHEMY_REPLICAS=replicas,
+        **config
+    )
+    db = SQLAlchemy(session_options={'class_': RoutingSession})
+    ReadReplicas(app)
+    db.init_app(app)
+
+    def source():
+        return db.session.execute(text('SELECT name FROM source')).scalar()
+
+    @app.route('/source', methods=['GET', 'POST'])
+    def read_source():
+        return jsonify(source())
+
+    @app.route('/write-then-read')
+    def write_then_read():
+        before = source()
+        db.session.execute(text("UPDATE source SET name = name || '*'"))
+        after = source()
+        db.session.commit()
+        return jsonify([before, after])
+
+    @app.route('/primary')
+    def primary_read():
+        with use_primary():
+            return jsonify(source())
+
+    return app, db
+
+def test_reads_rotate_over_replicas_and_writes_use_primary(tmp_path):
+    """Test that GETs rotate over the replicas while writes and use_primary go to the primary"""
+    replicas = [make_database(tmp_path / f'replica{i}.db', f'replica{i}') for i in range(2)]
+    app, db = make_app(tmp_path, replicas)
+    client = app.test_client()
+
+    assert {client.get('/source').get_json() for _ in range(4)} == {'replica0', 'replica1'}
+    assert client.post('/source').get_json() == 'primary'
+    assert client.get('/primary').get_json() == 'primary'
+
+    # Read-after-write within one request stays on the primary
+    before, after = client.get('/write-then-read').get_json()
+    assert before.startswith('replica')
+    assert after == 'primary*'
+
+    with app.app_context():
+        assert db.session.execute(text('SELECT name FROM source')).scalar() == 'primary*'
+
+def test_replica_pool_size_is_applied_per_bind(tmp_path):
+    """Test that SQLALCHEMY_REPLICA_POOL_SIZE applies unless a replica sets its own"""
+    replicas = [make_database(tmp_path / 'replica0.db', 'replica0'),
+                {'url': make_database(tmp_path / 'replica1.db', 'replica1'), 'pool_size': 2}]
+    app, db = make_app(tmp_path, replicas, SQLALCHEMY_REPLICA_POOL_SIZE=7)
+
+    with app.app_context():
+        assert db.engines['replica_0'].pool.size() == 7
+        assert db.engines['replica_1'].pool.size() == 2
+
+def test_unhealthy_replica_falls_back(tmp_path):
+    """Test that a replica that fails to connect is marked down and skipped"""
+    missing = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    app, db = make_app(tmp_path, [missing, make_database(tmp_path / 'replica1.db', 'replica1')])
+    client = app.test_client()
+
+    assert {client.get('/source').get_json() for _ in range(3)} == {'replica1'}
+    assert app.extensions['read_replicas'].status()['replica_0'] == 'down'
+
+def test_no_healthy_replica_reads_primary(tmp_path):
+    """Test that reads go to the primary when every replica is down"""
+    app, db = make_app(tmp_path, [f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"])
+
+    assert app.test_client().get('/source').get_json() == 'primary'
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from flask import Flask
+
+from models import Article, RelatedArticle, db
+from services.related_articles import RelatedArticlesJob, build_feature_matrix, top_k_neighbours
+
+DOCUMENTS = [
+    {'text': 'neural networks learn from data', 'tags': [1], 'category': 1},
+    {'text': 'training deep neural networks', 'tags': [1, 2], 'category': 1},
+    {'text': 'baking sourdough bread at home', 'tags': [3], 'category': 2},
+    {'text': 'sourdough starters and bread', 'tags': [3], 'category': 2},
+    {'text': '', 'tags': [], 'category': None},
+]
+
+def test_feature_rows_are_unit_length_weighted_blocks():
+    """Test that each row's dot product with itself is the sum of present signal weights"""
+    matrix = build_feature_matrix(DOCUMENTS)
+    assert matrix.shape[0] == len(DOCUMENTS)
+    norms = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+    # Text, tags and category all present: 0.6 + 0.3 + 0.1
+    assert norms[:4] == pytest.approx([1.0] * 4, rel=1e-5)
+    assert norms[4] == 0
+
+def test_top_k_neighbours_rank_by_similarity():
+    """Test that neighbours are the most similar other rows, best first"""
+    matrix = build_feature_matrix(DOCUMENTS)
+    neighbours = dict(top_k_neighbours(matrix, range(len(DOCUMENTS)), top_k=1, chunk_size=2))
+
+    assert [row for row, _ in neighbours[0]] == [1]
+    assert [row for row, _ in neighbours[2]] == [3]
+    # An empty document has no positive similarity to anything
+    assert neighbours[4] == []
+
+    ranked = dict(top_k_neighbours(matrix, [0], top_k=10))[0]
+    scores = [score for _, score in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert 0 not in [row for row, _ in ranked]
+    assert all(0 < score <= 1.0 + 1e-6 for score in scores)
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'related.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+def test_deleting_an_article_drops_its_rows_in_the_same_transaction(app):
+    """Test that related rows pointing at a deleted article go with it"""
+    for document in DOCUMENTS[:4]:
+        db.session.add(Article(title='', content=document['text'], status='published'))
+    db.session.commit()
+    RelatedArticlesJob(top_k=2).rebuild()
+    assert RelatedArticle.query.filter(RelatedArticle.related_id == 2).count() > 0
+
+    db.session.get(Article, 2).delete()
+    assert RelatedArticle.query.filter(
+        (RelatedArticle.article_id == 2) | (RelatedArticle.related_id == 2)
+    ).count() == 0
+
+def test_refresh_picks_up_articles_updated_in_the_same_second(app):
+    """Test that the watermark is inclusive and set when the refresh starts"""
+    for document in DOCUMENTS[:4]:
+        db.session.add(Article(title='', content=document['text'], status='published'))
+    db.session.commit()
+    job = RelatedArticlesJob(top_k=2)
+    job.rebuild()
+
+    # Stamped in the same second the rebuild started
+    db.session.get(Article, 3).update(content='neural networks and bread')
+    assert 3 in job._changed_since_last_refresh()
+    assert job.refresh() > 0
@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from services.response_cache import FileSystemBackend, MemoryBackend, ResponseCache
+
+@pytest.fixture(params=['memory', 'filesystem'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend(maxsize=100)
+    return FileSystemBackend(str(tmp_path / 'cache'), maxsize=100)
+
+def test_backend_get_set_delete_and_expiry(backend):
+    """Test the basic key/value operations of each backend"""
+    assert backend.get('a') is None
+    backend.set('a', {'x': 1})
+    backend.set('b', 2, timeout=0.01)
+    assert backend.get('a') == {'x': 1}
+    time.sleep(0.02)
+    assert backend.get('b') is None
+
+    backend.delete('a')
+    assert backend.get('a') is None
+    backend.set('c', 3)
+    backend.clear()
+    assert backend.get('c') is None
+
+def test_memory_backend_evicts_least_recently_used():
+    """Test that the memory backend drops the least recently used key"""
+    backend = MemoryBackend(maxsize=2)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    backend.get('a')
+    backend.set('c', 3)
+    assert backend.get('a') == 1 and backend.get('b') is None
+
+def test_filesystem_backend_prunes_in_batches(tmp_path):
+    """Test that the oldest files are pruned down to the low-water mark"""
+    directory = str(tmp_path / 'cache')
+    backend = FileSystemBackend(directory, maxsize=10, low_water=0.5)
+    for i in range(10):
+        backend.set(f'key{i}', i)
+        os.utime(backend._path(f'key{i}'), (i, i))
+    # Overwriting an existing key does not count as a new file
+    backend.set('key9', 9)
+    assert len(os.listdir(directory)) == 10
+
+    backend.set('key10', 10)
+    assert len(os.listdir(directory)) == 5
+    assert backend.get('key5') is None and backend.get('key6') == 6 and backend.get('key10') == 10
+
+    # A new backend picks up the files already on disk
+    assert FileSystemBackend(directory, maxsize=10)._count == 5
+
+def make_app(cache):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/posts/<int:post_id>')
+    @cache.cached(tags=('articles', 'article:{post_id}'))
+    def get_post(post_id):
+        calls.append(post_id)
+        return jsonify({'id': post_id, 'calls': len(calls)})
+
+    return app, calls
+
+def test_cached_view_hits_until_its_tag_is_invalidated():
+    """Test that cached responses are reused until a tag version changes"""
+    cache = ResponseCache()
+    cache.backend = MemoryBackend()
+    app, calls = make_app(cache)
+    client = app.test_client()
+
+    first = client.get('/posts/1')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert client.get('/posts/1').headers['X-Cache'] == 'HIT'
+    assert client.get('/posts/1?b=2&a=1').headers['X-Cache'] == 'MISS'
+    assert client.get('/posts/1?a=1&b=2').headers['X-Cache'] == 'HIT'
+
+    cache.invalidate('article:2')
+    assert client.get('/posts/1').headers['X-Cache'] == 'HIT'
+    cache.invalidate('article:1')
+    assert client.get('/posts/1').headers['X-Cache'] == 'MISS'
+    assert calls == [1, 1, 1]
+    assert cache.stats() == {'hits': 3, 'misses': 3}
+
+def test_cached_view_answers_conditional_requests():
+    """Test that a matching If-None-Match gets a 304 from the cache"""
+    cache = ResponseCache()
+    cache.backend = MemoryBackend()
+    app, _ = make_app(cache)
+    client = app.test_client()
+
+    etag = client.get('/posts/1').headers['ETag']
+    response = client.get('/posts/1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+def test_disabled_cache_calls_the_view_every_time():
+    """Test that the decorator is a pass-through without a backend"""
+    cache = ResponseCache()
+    app, calls = make_app(cache)
+    client = app.test_client()
+    client.get('/posts/1')
+    client.get('/posts/1')
+    assert calls == [1, 1]
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+from flask import Flask
+
+from services.search_index import FTS5Index, InvertedIndex, SearchIndex, stem, tokenize
+
+
+def build_index(index):
+    index.add(1, title='Neural networks explained', body='How neural networks learn from data',
+              tags='deep-learning', category='Machine Learning')
+    index.add(2, title='Transformers in practice', body='Attention is the core of transformers',
+              tags='nlp transformers', category='NLP')
+    index.add(3, title='Learning rate schedules', body='Tuning the learning rate of networks',
+              tags='training', category='Machine Learning')
+    return index
+
+def test_tokenize_and_stem():
+    """Test that stop words are dropped and suffixes are stripped"""
+    assert tokenize('The Networks of AI') == ['networks', 'ai']
+    assert stem('networks') == 'network'
+    assert stem('learning') == 'learn'
+    assert stem('class') == 'class'
+
+def test_bm25_ranks_title_matches_first():
+    """Test that title matches outrank body-only matches"""
+    index = build_index(InvertedIndex())
+    results = index.search('neural networks')['results']
+
+    assert results[0]['id'] == 1
+    assert {hit['id'] for hit in results} == {1, 3}
+
+def test_prefix_search_and_pagination():
+    """Test search-as-you-type on the last word and page slicing"""
+    index = build_index(InvertedIndex())
+
+    assert index.search('transf')['results'][0]['id'] == 2
+    page = index.search('learning networks', page=2, per_page=1)
+    assert page['total'] == 2
+    assert len(page['results']) == 1
+
+def test_remove_and_reindex():
+    """Test that incremental updates replace a document's postings"""
+    index = build_index(InvertedIndex())
+    index.add(2, title='Diffusion models', body='Denoising', tags='', category='')
+    index.remove(1)
+
+    assert index.search('transformers')['total'] == 0
+    assert index.search('neural')['total'] == 0
+    assert index.search('diffusion')['results'][0]['id'] == 2
+
+def test_suggest_titles_and_tags():
+    """Test typeahead over title and tag words"""
+    index = build_index(InvertedIndex())
+
+    assert index.suggest('tra') == ['transformers', 'training']
+
+def test_save_and_load_round_trip(tmp_path):
+    """Test that a persisted index returns the same results"""
+    index = build_index(InvertedIndex())
+    path = str(tmp_path / 'search.idx')
+    index.save(path)
+
+    loaded = InvertedIndex.load(path)
+    assert loaded.search('learning rate') == index.search('learning rate')
+    assert len(loaded) == 3
+
+def test_fts5_backend(tmp_path):
+    """Test the SQLite FTS5 backend exposes the same interface"""
+    index = build_index(FTS5Index(str(tmp_path / 'search.fts5')))
+
+    assert index.search('neural networks')['results'][0]['id'] == 1
+    assert index.search('transf')['results'][0]['id'] == 2
+    index.remove(2)
+    assert index.search('transformers')['total'] == 0
+
+def article(article_id, title, status='published'):
+    return SimpleNamespace(id=article_id, title=title, content='', tags=[], category=None, status=status)
+
+def open_index(path):
+    """A SearchIndex as a separate worker process would open it"""
+    app = Flask(__name__)
+    app.config.update(SEARCH_INDEX_PATH=path, SEARCH_INDEX_SYNC_INTERVAL=0)
+    return SearchIndex(app)
+
+def test_processes_merge_their_updates_through_the_file(tmp_path):
+    """Test that syncing never discards updates made by another process"""
+    path = str(tmp_path / 'search.idx')
+    first, second = open_index(path), open_index(path)
+
+    first.index_article(article(1, 'Neural networks'))
+    second.index_article(article(2, 'Transformers'))
+    first.save()
+    second.save()
+    first.sync()
+
+    for index in (first, second):
+        assert {hit['id'] for hit in index.search('neural transformers', per_page=5)['results']} == {1, 2}
+
+    second.index_article(article(1, 'Unpublished', status='draft'))
+    second.save()
+    assert first.search('neural')['total'] == 0
+    assert len(open_index(path).backend) == 1
+
+def test_copy_document_replaces_or_removes_the_entry():
+    """Test that copy_document mirrors one document of another index"""
+    source = build_index(InvertedIndex())
+    target = InvertedIndex()
+    target.add(2, title='Old title')
+    target.copy_document(source, 2)
+    target.copy_document(source, 9)
+
+    assert target.search('transformers')['results'][0]['id'] == 2
+    assert target.search('old')['total'] == 0
+    assert target.suggest('tra') == ['transformers']
+    assert len(target) == 1
@@ -0,0 +1,108 @@
+import json
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from marshmallow import Schema, fields, post_dump
+
+from utils.serializers import compile_serializer
+
+class RowSchema(Schema):
+    id = fields.Int(dump_only=True)
+    name = fields.Str()
+    email = fields.Email()
+    password = fields.Str(load_only=True)
+    score = fields.Float()
+    price = fields.Decimal(places=2, as_string=True)
+    count = fields.Int(as_string=True)
+    is_active = fields.Bool()
+    created_at = fields.DateTime(dump_only=True)
+    day = fields.DateTime(format='%Y-%m-%d')
+    full_name = fields.Str(data_key='fullName', attribute='display_name')
+    extra = fields.Raw()
+
+    class Meta:
+        fields = ('id', 'name', 'email', 'password', 'score', 'price', 'count', 'is_active',
+                  'created_at', 'day', 'full_name', 'extra')
+        ordered = True
+
+class Record:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+def random_values(rng):
+    moment = datetime(2024, 1, 1) + timedelta(seconds=rng.randint(0, 10 ** 8), microseconds=rng.randint(0, 999))
+    return {
+        'id': rng.choice([rng.randint(1, 10 ** 6), True, None]),
+        'name': rng.choice(['Ada', 'Zoë', '', 42, None]),
+        'email': rng.choice(['a@example.com', None]),
+        'score': rng.choice([rng.random() * 100, 3, None]),
+        'price': rng.choice([Decimal('1.005'), Decimal(rng.randint(0, 9999)) / 100, None]),
+        'count': rng.choice([rng.randint(0, 100), None]),
+        'is_active': rng.choice([True, False, 0, 1, 't', 'off', None]),
+        'created_at': rng.choice([moment, None]),
+        'day': moment,
+        'display_name': rng.choice(['Ada Lovelace', None]),
+        'extra': rng.choice([{'a': [1, 2]}, 'raw', None]),
+    }
+
+def test_output_matches_marshmallow():
+    """Test that compiled output equals Schema.dump on random rows"""
+    rng = random.Random(7)
+    schema = RowSchema()
+    serializer = compile_serializer(RowSchema)
+
+    for _ in range(2000):
+        values = random_values(rng)
+        row = tuple(values[attribute] for attribute in serializer.attributes)
+        expected = schema.dump(Record(**values))
+        actual = serializer(row)
+        assert actual == expected
+        assert list(actual) == list(expected)
+
+def test_columns_follow_dump_fields():
+    """Test that load-only fields are left out and attributes map to data keys"""
+    serializer = compile_serializer(RowSchema)
+    assert 'password' not in serializer.attributes
+    assert serializer.attributes[-2:] == ['display_name', 'extra']
+    assert serializer.keys[-2:] == ['fullName', 'extra']
+
+def test_schema_instance_options_are_respected():
+    """Test that only= on a schema instance limits the columns"""
+    serializer = compile_serializer(RowSchema(only=('id', 'name')))
+    assert serializer((1, 'Ada')) == {'id': 1, 'name': 'Ada'}
+
+def test_unsupported_schemas_are_rejected():
+    """Test that Method fields and dump hooks cannot be compiled"""
+    class WithMethod(Schema):
+        label = fields.Method('get_label')
+
+        def get_label(self, obj):
+            return 'x'
+
+    class WithHook(Schema):
+        id = fields.Int()
+
+        @post_dump
+        def wrap(self, data, **kwargs):
+            return data
+
+    with pytest.raises(ValueError):
+        compile_serializer(WithMethod)
+    with pytest.raises(ValueError):
+        compile_serializer(WithHook)
+
+def test_response_matches_jsonify():
+    """Test that the prebuilt response body equals the jsonify one"""
+    app = Flask(__name__)
+    serializer = compile_serializer(RowSchema(only=('id', 'name', 'created_at')))
+    rows = [(1, 'Zoë', datetime(2024, 5, 1, 12, 30)), (2, None, None)]
+
+    with app.app_context():
+        response = serializer.response(rows, key='items', next_cursor='abc')
+        expected = app.json.response({'items': serializer.many(rows), 'next_cursor': 'abc'})
+
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == json.loads(expected.get_data())
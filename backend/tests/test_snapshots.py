@@ -0,0 +1,101 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from models import Article, Category, Tag, db
+from services.snapshots import SnapshotPublisher
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'snapshots.db'}",
+                      SNAPSHOT_DIR=str(tmp_path / 'snapshots'))
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        news = Category(name='news')
+        red, blue = Tag(name='red'), Tag(name='blue')
+        db.session.add_all([
+            blue,
+            Article(title='first', content='one', status='published', category=news, tags=[red],
+                    published_at=datetime(2024, 1, 1)),
+            Article(title='second', content='two', status='published', category=news,
+                    published_at=datetime(2024, 1, 2)),
+        ])
+        db.session.commit()
+        settle()
+        yield app
+        db.session.remove()
+
+def settle():
+    """Backdate rows written just now, as if that was longer ago than a second"""
+    past = datetime.utcnow() - timedelta(hours=1)
+    for model in (Article, Category, Tag):
+        db.session.execute(model.__table__.update().where(model.updated_at > past).values(updated_at=past))
+    db.session.commit()
+
+def read(app, path):
+    with open(os.path.join(app.config['SNAPSHOT_DIR'], path)) as f:
+        return json.load(f)
+
+def test_refresh_renders_only_changed_articles(app):
+    """Test that a refresh re-renders the articles whose rows changed and nothing else"""
+    publisher = SnapshotPublisher(app)
+    assert publisher.refresh()['articles'] == 2
+    assert publisher.refresh() == {'articles': 0, 'written': 0, 'removed': 0}
+
+    db.session.get(Article, 1).update(title='renamed')
+    settle()
+    result = publisher.refresh()
+    assert result['articles'] == 1 and result['written'] > 1
+    assert read(app, 'posts/1.json')['title'] == 'renamed'
+    assert read(app, 'posts/pages/1.json')['items'][1]['title'] == 'renamed'
+
+def test_retagging_an_article_renders_it_again(app):
+    """Test that a tag change alone, which leaves the article row untouched, is picked up"""
+    publisher = SnapshotPublisher(app)
+    publisher.refresh()
+
+    article = db.session.get(Article, 1)
+    article.update(tags=[Tag.query.filter_by(name='blue').one()])
+    settle()
+    assert publisher.refresh()['articles'] == 1
+    assert [tag['name'] for tag in read(app, 'posts/1.json')['tags']] == ['blue']
+
+    db.session.get(Tag, article.tags[0].id).update(name='navy')
+    settle()
+    assert publisher.refresh()['articles'] == 1
+    assert [tag['name'] for tag in read(app, 'posts/1.json')['tags']] == ['navy']
+
+def test_unpublished_articles_lose_their_files(app):
+    """Test that files the new snapshot no longer writes are removed"""
+    publisher = SnapshotPublisher(app)
+    publisher.refresh()
+
+    db.session.get(Article, 2).update(status='draft')
+    settle()
+    assert publisher.refresh()['removed'] == 1
+    assert not os.path.exists(os.path.join(app.config['SNAPSHOT_DIR'], 'posts/2.json'))
+    assert read(app, 'posts/pages/1.json')['total'] == 1
+
+def test_manifest_is_reused_across_publishers(app):
+    """Test that a new process picks up where the manifest left off"""
+    SnapshotPublisher(app).refresh()
+    manifest = read(app, 'manifest.json')
+    assert set(manifest['articles']) == {'1', '2'}
+    assert 'posts/1.json' in manifest['files']
+
+    assert SnapshotPublisher(app).refresh()['articles'] == 0
+
+def test_recent_writes_are_rendered_until_they_settle(app):
+    """Test that an article written in the last second has no version and is always re-rendered"""
+    publisher = SnapshotPublisher(app)
+    publisher.refresh()
+
+    db.session.get(Article, 1).update(title='just now')
+    assert publisher.refresh()['articles'] == 1
+    assert publisher.refresh()['articles'] == 1
+    assert read(app, 'manifest.json')['articles']['1'] is None
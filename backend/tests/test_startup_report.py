@@ -0,0 +1,23 @@
+from benchmarks.startup import ImportTiming, by_package, parse_importtime
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2500 |     sqlalchemy.sql
+import time:      3000 |       8000 |   sqlalchemy
+import time:       500 |      11000 | app
+some unrelated stderr line
+"""
+
+def test_parse_importtime():
+    """Test that -X importtime lines parse into timings and other lines are skipped"""
+    timings = parse_importtime(IMPORTTIME_OUTPUT)
+    assert timings[0] == ImportTiming('_io', 120, 120)
+    assert timings[-1] == ImportTiming('app', 500, 11000)
+    assert len(timings) == 4
+
+def test_by_package_sums_self_time():
+    """Test that self times are summed per top-level package, largest first"""
+    totals = dict(by_package(parse_importtime(IMPORTTIME_OUTPUT)))
+    assert totals['sqlalchemy'] == 5000
+    assert by_package(parse_importtime(IMPORTTIME_OUTPUT))[0][0] == 'sqlalchemy'
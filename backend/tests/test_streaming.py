@@ -0,0 +1,19 @@
+import gzip
+
+from utils.streaming import gzip_stream
+
+def test_gzip_stream_round_trips_mixed_chunks():
+    """Test that str and bytes chunks decompress to the original body"""
+    chunks = ['<feed>', b'<entry/>' * 20000, '</feed>']
+    body = b''.join(gzip_stream(chunks))
+    assert gzip.decompress(body) == b'<feed>' + b'<entry/>' * 20000 + b'</feed>'
+
+def test_gzip_stream_emits_incrementally():
+    """Test that compressed output is yielded before the input ends"""
+    chunks = (b'x' * 70000 for _ in range(3))
+    outputs = list(gzip_stream(chunks))
+    assert len(outputs) > 1
+
+def test_gzip_stream_handles_empty_input():
+    """Test that an empty stream is still a valid gzip member"""
+    assert gzip.decompress(b''.join(gzip_stream([]))) == b''
@@ -0,0 +1,54 @@
+import time
+
+from utils.token_cache import TokenCache, UserSnapshot
+
+
+def make_snapshot(user_id=1):
+    return UserSnapshot(id=user_id, username=f'user{user_id}', email=f'user{user_id}@example.com',
+                        first_name='Test', last_name='User', role='author',
+                        is_active=True, created_at=None)
+
+def test_cache_hit_and_miss_counters():
+    """Test that lookups are counted as hits and misses"""
+    cache = TokenCache(maxsize=10, ttl=60)
+    assert cache.get('token-a') is None
+
+    cache.set('token-a', make_snapshot())
+    assert cache.get('token-a').id == 1
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['size'] == 1
+
+def test_entry_capped_at_token_expiry():
+    """Test that an entry never outlives the token's exp claim"""
+    cache = TokenCache(maxsize=10, ttl=60)
+    cache.set('token-a', make_snapshot(), token_exp=time.time() - 1)
+
+    assert cache.get('token-a') is None
+
+def test_lru_eviction():
+    """Test that the least recently used token is evicted when full"""
+    cache = TokenCache(maxsize=2, ttl=60)
+    cache.set('token-a', make_snapshot(1))
+    cache.set('token-b', make_snapshot(2))
+    cache.get('token-a')
+    cache.set('token-c', make_snapshot(3))
+
+    assert cache.get('token-b') is None
+    assert cache.get('token-a') is not None
+    assert cache.stats()['evictions'] == 1
+
+def test_invalidate_user_drops_all_tokens():
+    """Test that invalidating a user removes every token for that user"""
+    cache = TokenCache(maxsize=10, ttl=60)
+    cache.set('token-a', make_snapshot(1))
+    cache.set('token-b', make_snapshot(1))
+    cache.set('token-c', make_snapshot(2))
+
+    cache.invalidate_user(1)
+
+    assert cache.get('token-a') is None
+    assert cache.get('token-b') is None
+    assert cache.get('token-c') is not None
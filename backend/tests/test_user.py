@@ -0,0 +1,42 @@
+import pytest
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from models import db
+from models.user import User
+from utils.password_hashing import HashingOverloaded, needs_rehash
+
+PASSWORD = 'S3curePassw0rd'
+
+@pytest.fixture
+def legacy_user(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'users.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user = User('writer', 'writer@example.com', PASSWORD, 'Ada', 'Writer')
+        user.password_hash = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000')
+        db.session.add(user)
+        db.session.commit()
+        yield user
+        db.session.remove()
+
+def test_check_password_upgrades_legacy_hashes(legacy_user):
+    """Test that a successful check rehashes a hash made with old parameters"""
+    assert legacy_user.check_password(PASSWORD)
+    db.session.expire_all()
+    assert not needs_rehash(legacy_user.password_hash)
+    assert not legacy_user.check_password('wrong')
+
+def test_check_password_succeeds_when_the_rehash_is_shed(legacy_user, monkeypatch):
+    """Test that an overloaded hashing pool skips the upgrade instead of failing the login"""
+    def overloaded(password):
+        raise HashingOverloaded('Password hashing queue is full')
+
+    legacy = legacy_user.password_hash
+    monkeypatch.setattr('models.user.hash_password', overloaded)
+
+    assert legacy_user.check_password(PASSWORD)
+    db.session.expire_all()
+    assert legacy_user.password_hash == legacy
@@ -0,0 +1,36 @@
+import random
+
+from utils.validators import validate_email, validate_emails, validate_password, validate_passwords
+
+EMAIL_CASES = [
+    '', 'user@example.com', 'first.last+tag@sub.example.co', 'user@example', 'user@.example.com',
+    'user@example.', '@example.com', 'user@@example.com', 'us er@example.com', 'user@exa_mple.com',
+    'user@example.com\n', 'user@example.com\n\n', 'üser@example.com', 'user@-x.y', 'user@x..y',
+    'user@x.y.', '.user@x.y', 'a@b.c', 'a@b.c@d.e'
+]
+
+PASSWORD_CASES = [
+    '', 'short1!', 'Password1!', 'password1!', 'PASSWORD1!', 'Password!!', 'Password11',
+    'Pass word1!', 'Password1!\n', 'Passwor1!\n', 'Pässword1!', 'Password١!', 'Password1!\n\n',
+    'Aa1@aaaa', 'Aa1#aaaa'
+]
+
+def _fuzz(alphabet, count, max_length, seed):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length))) for _ in range(count)]
+
+def test_validate_emails_matches_validate_email():
+    """Test that the batch email validator agrees with the single-value one"""
+    cases = EMAIL_CASES + _fuzz('ab1_.+-@\n é', 5000, 12, seed=13)
+    assert validate_emails(cases) == [validate_email(email) for email in cases]
+
+def test_validate_emails_memoized_batches_match():
+    """Test that repeated batches served from the memo give the same results"""
+    cases = EMAIL_CASES * 20
+    assert validate_emails(cases) == [validate_email(email) for email in cases]
+    assert validate_emails(cases) == [validate_email(email) for email in cases]
+
+def test_validate_passwords_matches_validate_password():
+    """Test that the batch password validator agrees with the single-value one"""
+    cases = PASSWORD_CASES + _fuzz('aA1@ #\n٣é', 5000, 12, seed=13)
+    assert validate_passwords(cases) == [validate_password(password) for password in cases]
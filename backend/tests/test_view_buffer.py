@@ -0,0 +1,98 @@
+import atexit
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from models import Article, ArticleViewCount, db
+from routes.analytics import bp as analytics_bp
+from services.view_buffer import ViewBuffer
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'views.db'}")
+    db.init_app(app)
+    with app.app_context():
+        # SQLite only enforces foreign keys when asked to
+        event.listen(db.engine, 'connect', lambda conn, record: conn.execute('PRAGMA foreign_keys=ON'))
+        db.create_all()
+        db.session.add(Article(title='Known', slug='known', content='text', status='published'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def buffer(app):
+    app.config['VIEW_BUFFER_FLUSH_INTERVAL'] = 3600
+    buffer = ViewBuffer(app)
+    yield buffer
+    buffer._stop.set()
+    atexit.unregister(buffer.shutdown)
+
+def stored_views():
+    return {row.article_id: row.views for row in ArticleViewCount.query}
+
+def test_views_are_aggregated_per_article_and_bucket(app, buffer):
+    """Test that buffered views are written as one counter per bucket"""
+    buffer.record(1, timestamp=0)
+    buffer.record(1, count=2, timestamp=10)
+    assert buffer.flush() == 1
+    assert buffer.flush() == 0
+
+    with app.app_context():
+        assert stored_views() == {1: 3}
+    assert buffer.stats()['flushed'] == 3 and buffer.stats()['buffered_keys'] == 0
+
+def test_full_buffer_drops_views_for_new_keys(buffer):
+    """Test that the buffer never grows past its capacity"""
+    buffer.capacity = 1
+    assert buffer.record(1, timestamp=0)
+    assert buffer.record(1, timestamp=0)
+    assert not buffer.record(2, timestamp=0)
+    assert buffer.stats()['dropped'] == 1
+
+def test_rejected_counters_are_dropped_without_blocking_the_rest(app, buffer):
+    """Test that a view of an unknown article does not stall later flushes"""
+    buffer.record(1, timestamp=0)
+    buffer.record(999, count=4, timestamp=0)
+
+    assert buffer.flush() == 1
+    assert buffer.stats()['buffered_keys'] == 0
+    assert buffer.stats()['dropped'] == 4
+
+    buffer.record(1, timestamp=0)
+    assert buffer.flush() == 1
+    with app.app_context():
+        assert stored_views() == {1: 2}
+
+def test_batch_endpoint_counts_each_article_once(app, buffer, monkeypatch):
+    """Test that /analytics/views accepts at most one view per article"""
+    monkeypatch.setattr('routes.analytics.view_buffer', buffer)
+    app.register_blueprint(analytics_bp)
+    client = app.test_client()
+
+    response = client.post('/analytics/views', json={'views': [
+        {'articleId': 1, 'count': 100},
+        {'articleId': 1, 'count': 100},
+        {'articleId': 2},
+        {'articleId': 'x'},
+        {'articleId': -1},
+        'junk',
+    ]})
+    assert response.status_code == 202
+    assert response.json == {'accepted': 2}
+    assert buffer.stats()['accepted'] == 2
+
+    too_many = {'views': [{'articleId': 1}] * 501}
+    assert client.post('/analytics/views', json=too_many).status_code == 400
+
+def test_single_view_endpoint_validates_the_article_id(app, buffer, monkeypatch):
+    """Test that /analytics/view requires a positive integer articleId"""
+    monkeypatch.setattr('routes.analytics.view_buffer', buffer)
+    app.register_blueprint(analytics_bp)
+    client = app.test_client()
+
+    assert client.post('/analytics/view', json={'articleId': 1}).json == {'accepted': 1}
+    assert client.post('/analytics/view', json={'articleId': 0}).status_code == 400
+    assert client.post('/analytics/view', json={}).status_code == 400
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import numpy as np
+
+from services.view_rollups import aggregate, ceil_period, floor_period, next_period
+
+def test_period_arithmetic():
+    """Test that periods floor, step and round up at calendar boundaries"""
+    moment = datetime(2024, 2, 29, 13, 45, 10)
+    assert floor_period('hour', moment) == datetime(2024, 2, 29, 13)
+    assert floor_period('day', moment) == datetime(2024, 2, 29)
+    assert floor_period('month', moment) == datetime(2024, 2, 1)
+    assert next_period('month', datetime(2024, 1, 1)) == datetime(2024, 2, 1)
+    assert next_period('month', datetime(2024, 12, 1)) == datetime(2025, 1, 1)
+    assert ceil_period('day', datetime(2024, 3, 1)) == datetime(2024, 3, 1)
+    assert ceil_period('day', moment) == datetime(2024, 3, 1)
+
+def test_aggregate_sums_views_per_article():
+    """Test that chunks are merged into one sorted count per article"""
+    ids, views = aggregate([
+        (np.array([1, 3, 7], dtype='<i4'), np.array([5, 1, 2], dtype='<i8')),
+        (np.array([], dtype='<i4'), np.array([], dtype='<i8')),
+        (np.array([3, 4], dtype='<i4'), np.array([10, 1], dtype='<i8')),
+    ])
+    assert ids.tolist() == [1, 3, 4, 7]
+    assert views.tolist() == [5, 11, 1, 2]
+    assert views.dtype == np.dtype('<i8')
+
+def test_aggregate_of_nothing_is_empty():
+    """Test that aggregating no chunks gives empty arrays"""
+    ids, views = aggregate([])
+    assert len(ids) == 0 and len(views) == 0
@@ -0,0 +1,83 @@
+import sqlite3
+
+import pytest
+from flask import Flask
+
+import models
+from models import Tag, db, write_batch
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'batch.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def notified(tmp_path):
+    """Change notifications, with the tag rows committed when each arrived"""
+    seen = []
+
+    def listener(instance, action):
+        if isinstance(instance, Tag):
+            with sqlite3.connect(tmp_path / 'batch.db') as conn:
+                committed = conn.execute('SELECT COUNT(*) FROM tags').fetchone()[0]
+            seen.append((instance.name, action, committed))
+
+    models._change_listeners.append(listener)
+    yield seen
+    models._change_listeners.remove(listener)
+
+def test_listeners_run_once_after_the_single_commit(app, notified):
+    """Test that writes in a batch are committed once and then notified"""
+    with write_batch(batch_size=2):
+        tags = [Tag(name=f'tag{i}') for i in range(5)]
+        for tag in tags:
+            tag.save()
+        tags[0].update(name='renamed')
+        assert notified == []
+
+    assert notified == [('tag1', 'save', 5), ('tag2', 'save', 5), ('tag3', 'save', 5),
+                        ('tag4', 'save', 5), ('renamed', 'update', 5)]
+    assert 'write_batch' not in db.session.info
+
+def test_listeners_do_not_run_when_the_batch_rolls_back(app, notified):
+    """Test that a failing batch commits nothing and notifies nobody"""
+    with pytest.raises(RuntimeError):
+        with write_batch(batch_size=2):
+            for i in range(3):
+                Tag(name=f'tag{i}').save()
+            raise RuntimeError('import failed')
+
+    assert notified == []
+    assert Tag.query.count() == 0
+
+def test_nested_batches_join_the_outer_one(app, notified):
+    """Test that an inner write_batch does not commit on its own"""
+    with write_batch() as outer:
+        with write_batch() as inner:
+            Tag(name='inner').save()
+        assert inner is outer
+        assert notified == []
+    assert [name for name, _, _ in notified] == ['inner']
+
+def test_commit_chunks_notifies_each_flushed_chunk(app, notified):
+    """Test that commit_chunks commits and releases every full chunk"""
+    with pytest.raises(RuntimeError):
+        with write_batch(batch_size=2, commit_chunks=True) as batch:
+            for i in range(5):
+                Tag(name=f'tag{i}').save()
+                assert len(batch.changes) < 2
+            raise RuntimeError('import failed')
+
+    # The fifth tag was still pending when the block failed
+    assert notified == [('tag0', 'save', 2), ('tag1', 'save', 2), ('tag2', 'save', 4), ('tag3', 'save', 4)]
+    assert Tag.query.count() == 4
+
+def test_bulk_save(app, notified):
+    """Test that bulk_save inserts every instance in one batch"""
+    Tag.bulk_save([Tag(name=f'tag{i}') for i in range(3)], batch_size=2)
+    assert [committed for _, _, committed in notified] == [3, 3, 3]
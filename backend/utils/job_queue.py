@@ -0,0 +1,481 @@
+"""
+Durable background job queue on a local SQLite file.
+
+Heavy admin and maintenance work (bulk publishing, re-tagging, index
+rebuilds) is enqueued as a row instead of running inside the request.
+Worker processes claim the highest priority job that is due, run its
+registered handler inside an app context and record the result.
+
+A failed job is retried with exponential backoff until it has used
+``max_attempts``; handlers raise ValueError for arguments that can never
+work, which fails the job at once. Running jobs send a heartbeat, and a
+job whose worker stopped beating (crash, kill -9) is handed to another
+worker, after which the old run can no longer update it. Handlers report progress through the JobContext they receive,
+which is also where a cancel request takes effect.
+
+Configuration (app config):
+    JOB_QUEUE_PATH: SQLite file, defaults to <instance>/jobs.sqlite3
+    JOB_RETRY_DELAY: seconds before the first retry, doubled per attempt
+    JOB_STALE_SECONDS: heartbeat age after which a running job is requeued
+"""
+
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from werkzeug.utils import import_string
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 30
+DEFAULT_STALE_SECONDS = 120
+HEARTBEAT_SECONDS = 10
+# Progress updates closer together than this are not written
+PROGRESS_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    args TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after REAL NOT NULL,
+    progress REAL,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    heartbeat_at REAL,
+    created_by INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (status, priority DESC, run_after, id);
+"""
+
+# Writes from a run only apply while its worker still owns the job: once a
+# stale job is requeued and claimed again, the old run must not touch it
+_OWNED = "id = ? AND worker = ? AND status = 'running'"
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+
+class UnknownJob(ValueError):
+    """Raised when enqueuing a job name with no registered handler"""
+
+
+# Handlers by job name: (function, max_attempts)
+_handlers = {}
+
+def job(name, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Register ``fn(ctx, **args)`` as the handler for jobs called ``name``"""
+    def register(fn):
+        _handlers[name] = (fn, max_attempts)
+        return fn
+    return register
+
+def registered_jobs():
+    """Names of the jobs that can be enqueued"""
+    return sorted(_handlers)
+
+def _timestamp(value):
+    return datetime.utcfromtimestamp(value).isoformat() if value is not None else None
+
+
+class JobContext:
+    """Handle passed to a running handler for progress and cancellation"""
+
+    def __init__(self, queue, job_id, attempt, worker):
+        self.queue = queue
+        self.job_id = job_id
+        self.attempt = attempt
+        self.worker = worker
+        self._last_write = 0.0
+
+    def progress(self, done, total=None, message=None):
+        """
+        Report ``done`` of ``total`` units (or a 0-1 fraction if no total).
+
+        Raises:
+            JobCancelled: If the job was cancelled since the last report, or
+                handed to another worker after this one looked stale
+        """
+        fraction = done / total if total else done
+        now = time.monotonic()
+        if now - self._last_write >= PROGRESS_INTERVAL or fraction >= 1:
+            self._last_write = now
+            if not self.queue._set_progress(self.job_id, self.worker, min(max(fraction, 0.0), 1.0), message):
+                raise JobCancelled(f'Job {self.job_id} was taken over by another worker')
+        if self.queue._cancel_requested(self.job_id):
+            raise JobCancelled(f'Job {self.job_id} was cancelled')
+
+
+class JobQueue:
+    """Flask extension owning the job database"""
+
+    def __init__(self, app=None):
+        self.path = None
+        self.retry_delay = DEFAULT_RETRY_DELAY
+        self.stale_seconds = DEFAULT_STALE_SECONDS
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Point the queue at JOB_QUEUE_PATH and create its table"""
+        self.path = app.config.get('JOB_QUEUE_PATH', os.path.join(app.instance_path, 'jobs.sqlite3'))
+        self.retry_delay = app.config.get('JOB_RETRY_DELAY', self.retry_delay)
+        self.stale_seconds = app.config.get('JOB_STALE_SECONDS', self.stale_seconds)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+        app.extensions['job_queue'] = self
+
+    def enqueue(self, name, args=None, priority=0, max_attempts=None, delay=0, created_by=None, unique=False):
+        """
+        Add a job and return its id.
+
+        Higher ``priority`` runs first; ``delay`` postpones the first run.
+        With ``unique``, a job already queued with the same name and
+        arguments is reused instead, so bursts of triggers coalesce.
+
+        Raises:
+            UnknownJob: If no handler is registered for ``name``
+            ValueError: If ``args`` do not match the handler's parameters
+        """
+        if name not in _handlers:
+            raise UnknownJob(f"Unknown job; choose one of {', '.join(registered_jobs())}")
+        try:
+            inspect.signature(_handlers[name][0]).bind(None, **(args or {}))
+        except TypeError as e:
+            raise ValueError(f'Invalid arguments for {name}: {e}') from None
+        if max_attempts is None:
+            max_attempts = _handlers[name][1]
+        now = time.time()
+        encoded = json.dumps(args or {}, sort_keys=True)
+        with self._transaction() as conn:
+            if unique:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' AND name = ? AND args = ? LIMIT 1", (name, encoded)
+                ).fetchone()
+                if row is not None:
+                    return row[0]
+            cursor = conn.execute(
+                'INSERT INTO jobs (name, args, priority, max_attempts, run_after, created_by, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (name, encoded, int(priority), int(max_attempts), now + delay, created_by, now)
+            )
+            return cursor.lastrowid
+
+    def get(self, job_id):
+        """The job as a dict, or None"""
+        row = self._connection().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list(self, status=None, limit=50, before=None):
+        """Newest jobs first, optionally of one status and with ids below ``before``"""
+        clauses, params = [], []
+        if status is not None:
+            clauses.append('status = ?')
+            params.append(status)
+        if before is not None:
+            clauses.append('id < ?')
+            params.append(before)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ''
+        rows = self._connection().execute(
+            f'SELECT * FROM jobs {where}ORDER BY id DESC LIMIT ?', (*params, limit)
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self):
+        """Number of jobs per status"""
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self._connection().execute('SELECT status, count(*) FROM jobs GROUP BY status'))
+        return counts
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Queued jobs stop at once; running ones at their next
+        progress report. Returns the job, or None if it does not exist.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def retry(self, job_id):
+        """Queue a failed or cancelled job again with a fresh set of attempts"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, run_after = ?, cancel_requested = 0, "
+                "error = NULL, progress = NULL, message = NULL, finished_at = NULL "
+                "WHERE id = ? AND status IN ('failed', 'cancelled')",
+                (time.time(), job_id)
+            )
+        return self.get(job_id)
+
+    def purge(self, older_than):
+        """Delete jobs that finished more than ``older_than`` seconds ago"""
+        with self._transaction() as conn:
+            return conn.execute(
+                f"DELETE FROM jobs WHERE status IN {FINISHED_STATUSES} AND finished_at < ?",
+                (time.time() - older_than,)
+            ).rowcount
+
+    def claim(self, worker):
+        """
+        Mark the next due job as running for ``worker`` and return it.
+
+        Jobs whose worker stopped sending heartbeats are requeued first.
+        Returns None when nothing is due.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            stale = now - self.stale_seconds
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Worker stopped responding', finished_at = ? "
+                "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= max_attempts",
+                (now, stale)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL "
+                "WHERE status = 'running' AND heartbeat_at < ?",
+                (stale,)
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? "
+                "ORDER BY priority DESC, run_after, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, "
+                "started_at = ?, heartbeat_at = ? WHERE id = ?",
+                (worker, now, now, row[0])
+            )
+        return self.get(row[0])
+
+    def run_next(self, app, worker=None):
+        """
+        Claim and run one job inside an app context.
+
+        Returns:
+            dict or None: The finished (or requeued) job, None if idle
+        """
+        worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+        claimed = self.claim(worker)
+        if claimed is None:
+            return None
+
+        job_id = claimed['id']
+        handler = _handlers.get(claimed['name'])
+        context = JobContext(self, job_id, claimed['attempts'], worker)
+        beating = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, worker, beating), daemon=True)
+        heartbeat.start()
+        try:
+            if handler is None:
+                raise UnknownJob(f"No handler registered for {claimed['name']!r}")
+            with app.app_context():
+                result = handler[0](context, **claimed['args'])
+        except JobCancelled:
+            self._finish(claimed, 'cancelled', error='Cancelled')
+        except ValueError as e:
+            self._finish(claimed, 'failed', error=f'{type(e).__name__}: {e}')
+        except Exception:
+            logger.exception('Job %s (%s) failed', job_id, claimed['name'])
+            self._fail(claimed, traceback.format_exc(limit=5))
+        else:
+            self._finish(claimed, 'succeeded', result=result)
+        finally:
+            beating.set()
+            heartbeat.join()
+        return self.get(job_id)
+
+    def work(self, app, stop=None, poll_interval=1.0, burst=False):
+        """
+        Run jobs until ``stop`` is set (or, with ``burst``, the queue is idle).
+
+        Returns:
+            int: Number of jobs run
+        """
+        stop = stop or threading.Event()
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        ran = 0
+        while not stop.is_set():
+            if self.run_next(app, worker) is not None:
+                ran += 1
+            elif burst:
+                break
+            else:
+                stop.wait(poll_interval)
+        return ran
+
+    def _fail(self, claimed, error):
+        if claimed['attempts'] >= claimed['max_attempts']:
+            self._finish(claimed, 'failed', error=error)
+            return
+        delay = self.retry_delay * 2 ** (claimed['attempts'] - 1)
+        with self._transaction() as conn:
+            updated = conn.execute(
+                f"UPDATE jobs SET status = 'queued', worker = NULL, error = ?, run_after = ? WHERE {_OWNED}",
+                (error, time.time() + delay, claimed['id'], claimed['worker'])
+            ).rowcount
+        if not updated:
+            logger.warning('Job %s was taken over by another worker; not requeuing it', claimed['id'])
+
+    def _finish(self, claimed, status, result=None, error=None):
+        with self._transaction() as conn:
+            updated = conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, '
+                f"progress = CASE WHEN ? = 'succeeded' THEN 1.0 ELSE progress END WHERE {_OWNED}",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), status,
+                 claimed['id'], claimed['worker'])
+            ).rowcount
+        if not updated:
+            logger.warning('Job %s was taken over by another worker; dropping its %s outcome', claimed['id'], status)
+
+    def _set_progress(self, job_id, worker, fraction, message):
+        """Record progress, which also counts as a heartbeat; False if the job is no longer ours"""
+        with self._transaction() as conn:
+            return conn.execute(
+                f'UPDATE jobs SET progress = ?, message = coalesce(?, message), heartbeat_at = ? WHERE {_OWNED}',
+                (fraction, message, time.time(), job_id, worker)
+            ).rowcount > 0
+
+    def _cancel_requested(self, job_id):
+        row = self._connection().execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _heartbeat(self, job_id, worker, done):
+        while not done.wait(HEARTBEAT_SECONDS):
+            try:
+                with self._transaction() as conn:
+                    owned = conn.execute(
+                        f'UPDATE jobs SET heartbeat_at = ? WHERE {_OWNED}', (time.time(), job_id, worker)
+                    ).rowcount
+            except sqlite3.Error:
+                # Keep beating: a thread that dies on one busy write makes a
+                # live job look stale
+                logger.warning('Heartbeat for job %s failed', job_id, exc_info=True)
+                continue
+            if not owned:
+                return
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job['args'] = json.loads(job['args'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        for key in ('run_after', 'heartbeat_at', 'created_at', 'started_at', 'finished_at'):
+            job[key] = _timestamp(job[key])
+        return job
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._connection())
+
+    def _connection(self):
+        # One connection per thread and per process, like the FTS5 index
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE ... COMMIT, so concurrent claims serialize on the write lock"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            try:
+                self.conn.execute('COMMIT')
+                return False
+            except sqlite3.Error:
+                # A busy COMMIT leaves the transaction open; end it so the
+                # connection can begin the next one
+                if self.conn.in_transaction:
+                    self.conn.execute('ROLLBACK')
+                raise
+        if self.conn.in_transaction:
+            self.conn.execute('ROLLBACK')
+        return False
+
+def _worker_process(factory, factory_args, stop, poll_interval, burst):
+    # Ctrl-C reaches the whole process group; the parent sets ``stop`` and
+    # each worker finishes its current job before exiting
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    app = import_string(factory)(*factory_args)
+    app.extensions['job_queue'].work(app, stop=stop, poll_interval=poll_interval, burst=burst)
+
+def run_workers(factory, factory_args=(), processes=2, poll_interval=1.0, burst=False):
+    """
+    Run ``processes`` worker processes until interrupted.
+
+    Each worker is spawned fresh and builds its own app by calling the
+    ``factory`` import string (e.g. 'app:create_app') with ``factory_args``,
+    so no database connections or threads are shared with the parent.
+    """
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    workers = [
+        context.Process(target=_worker_process, name=f'job-worker-{number}',
+                        args=(factory, factory_args, stop, poll_interval, burst))
+        for number in range(processes)
+    ]
+    for process in workers:
+        process.start()
+
+    previous = signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        for process in workers:
+            while process.is_alive():
+                try:
+                    process.join()
+                except KeyboardInterrupt:
+                    stop.set()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    return [process.exitcode for process in workers]
+
+# Shared queue instance, initialized in create_app
+job_queue = JobQueue()
+
+__all__ = ['FINISHED_STATUSES', 'JobCancelled', 'JobContext', 'JobQueue', 'STATUSES', 'UnknownJob',
+           'job', 'job_queue', 'registered_jobs', 'run_workers']
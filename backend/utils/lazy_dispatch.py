@@ -0,0 +1,55 @@
+"""
+Path-prefix dispatch to applications built on first use.
+
+Flask cannot register blueprints once it has served a request, so lazy
+loading happens one level up: requests under a registered prefix go to
+a child app that is created by its loader the first time the prefix is
+hit. Paths are passed through unchanged, so child apps register their
+blueprints with the full URL prefix.
+"""
+
+import threading
+from typing import Callable, Dict
+
+
+class LazyPrefixDispatcher:
+    """
+    WSGI middleware routing URL prefixes to lazily created applications.
+
+    Args:
+        default_app: WSGI app serving every path without a registered prefix
+        loaders: Mapping of URL prefix to a zero-argument callable returning
+            the WSGI app for that prefix
+    """
+
+    def __init__(self, default_app, loaders: Dict[str, Callable]):
+        self.default_app = default_app
+        self.loaders = dict(loaders)
+        self.apps = {}
+        self._lock = threading.Lock()
+        # Longest prefix first so nested prefixes win
+        self._prefixes = sorted(self.loaders, key=len, reverse=True)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        for prefix in self._prefixes:
+            if path == prefix or path.startswith(prefix + '/'):
+                return self.get_app(prefix)(environ, start_response)
+        return self.default_app(environ, start_response)
+
+    def get_app(self, prefix):
+        """Return the app for ``prefix``, creating it on first use"""
+        app = self.apps.get(prefix)
+        if app is None:
+            with self._lock:
+                app = self.apps.get(prefix)
+                if app is None:
+                    app = self.apps[prefix] = self.loaders[prefix]()
+        return app
+
+    def load_all(self):
+        """Create every child app now, e.g. before forking workers"""
+        for prefix in self._prefixes:
+            self.get_app(prefix)
+
+__all__ = ['LazyPrefixDispatcher']
@@ -0,0 +1,363 @@
+"""
+Markdown rendering for article bodies.
+
+Articles are written in a Markdown subset: ATX headings, paragraphs,
+emphasis, inline and fenced code, links, images, block quotes, flat
+lists and horizontal rules. All input text is HTML-escaped before any
+markup is produced, and link and image URLs are limited to http(s),
+mailto and relative targets, so the output is safe to embed without a
+separate sanitizer. Raw HTML in the source is shown as text.
+
+``render_article`` also derives what readers are shown next to the
+body: a plain-text excerpt, the word count, the reading time and a
+table of contents built from h2/h3 headings.
+"""
+
+import bisect
+import hashlib
+import html
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Bump when the output for the same source changes, so stored
+# renderings are recomputed by the backfill
+RENDERER_VERSION = 2
+
+WORDS_PER_MINUTE = 238
+EXCERPT_LENGTH = 240
+TOC_LEVELS = (2, 3)
+# Deeper quote markers are shown as text
+MAX_QUOTE_DEPTH = 8
+
+_FENCE = re.compile(r'^(```|~~~)\s*([\w+-]*)\s*$')
+_HEADING = re.compile(r'^(#{1,6})\s+(\S.*)$')
+_RULE = re.compile(r'^(?:-{3,}|\*{3,}|_{3,})\s*$')
+_UNORDERED = re.compile(r'^[-*+]\s+(.*)$')
+_ORDERED = re.compile(r'^\d{1,9}[.)]\s+(.*)$')
+_QUOTE = re.compile(r'^>\s?(.*)$')
+
+_BACKTICKS = re.compile(r'`+')
+# Link and image targets run from the '(' after the closing bracket to
+# the next ')', without whitespace
+_TARGET_END = re.compile(r'[)\s]')
+# Zero-width matches at every position where an emphasis delimiter can
+# open or close; group 1 is the delimiter
+_STRONG_OPENER = re.compile(r'(?=(\*\*|__)\S)')
+_STRONG_CLOSER = re.compile(r'(?<=\S)(?=(\*\*|__))')
+_EMPHASIS_OPENER = re.compile(r'(?<![\w*])(?=([*_])\S)')
+_EMPHASIS_CLOSER = re.compile(r'(?<=\S)(?=([*_])(?![\w*]))')
+_SAFE_URL = re.compile(r'^(?:https?://|mailto:|/|#|\.{0,2}/|[^:/?#]+(?:[/?#]|$))', re.IGNORECASE)
+_BLOCK_TAG = re.compile(r'</?(?:p|h[1-6]|li|ul|ol|blockquote|pre|hr)\b[^>]*>')
+_TAG = re.compile(r'<[^<>]+>')
+_WORD = re.compile(r"\w+(?:['’-]\w+)*")
+
+
+@dataclass
+class Rendered:
+    """Everything stored for one revision of an article"""
+    html: str
+    excerpt: str
+    word_count: int
+    reading_minutes: int
+    toc: List[dict] = field(default_factory=list)
+
+def content_hash(content: Optional[str], excerpt: Optional[str] = None) -> str:
+    """Hash identifying the rendering inputs, including the renderer version"""
+    digest = hashlib.sha256(f'{RENDERER_VERSION}\0'.encode('utf-8'))
+    digest.update((content or '').encode('utf-8'))
+    digest.update(b'\0')
+    digest.update((excerpt or '').encode('utf-8'))
+    return digest.hexdigest()
+
+def _safe_url(url):
+    url = html.unescape(url)
+    return html.escape(url, quote=True) if _SAFE_URL.match(url) else None
+
+def _newline_between(newlines, start, stop):
+    line = bisect.bisect_left(newlines, start)
+    return line < len(newlines) and newlines[line] < stop
+
+def _replace_code_spans(text, render):
+    """
+    Replace every code span with ``render(code)``.
+
+    A run of backticks opens a span that the next run of the same length
+    on the same line closes; shorter or longer runs in between are part
+    of the code. The runs are listed once and the next run of each length
+    is tracked with a pointer, so this stays linear where a backreference
+    search retried from every run is not.
+    """
+    runs = [match.span() for match in _BACKTICKS.finditer(text)]
+    by_length = defaultdict(list)
+    for index, (start, stop) in enumerate(runs):
+        by_length[stop - start].append(index)
+    newlines = [match.start() for match in re.finditer('\n', text)]
+    next_run = defaultdict(int)
+
+    out, end, index = [], 0, 0
+    while index < len(runs):
+        start, content = runs[index]
+        length = content - start
+        candidates = by_length[length]
+        position = next_run[length]
+        while position < len(candidates) and candidates[position] <= index:
+            position += 1
+        next_run[length] = position
+        if position == len(candidates) or _newline_between(newlines, content, runs[candidates[position]][0]):
+            index += 1
+            continue
+        closer = candidates[position]
+        out.append(text[end:start])
+        out.append(render(text[content:runs[closer][0]]))
+        end = runs[closer][1]
+        index = closer + 1
+    out.append(text[end:])
+    return ''.join(out)
+
+def _replace_links(text, opener, render):
+    """
+    Replace every ``<opener>label](target)`` with ``render(label, target)``.
+
+    A scan rather than a regex search: a regex retried from each of many
+    unclosed brackets rescans the rest of the text every time. Here the
+    closing bracket, and the end of the target after it, are looked up
+    once and reused by every opener that shares them.
+    """
+    out, end = [], 0
+    close, target, target_end = -1, None, -1
+    start = text.find(opener)
+    while start != -1:
+        label = start + len(opener)
+        if close < label:
+            close = text.find(']', label)
+            if close == -1:
+                break
+            target = None
+            if text.startswith('(', close + 1):
+                if target_end <= close + 1:
+                    found = _TARGET_END.search(text, close + 2)
+                    target_end = found.start() if found else len(text)
+                if target_end > close + 2 and text.startswith(')', target_end):
+                    target = text[close + 2:target_end]
+        # Link labels must not be empty; image alt text may be
+        if target is not None and (close > label or opener == '!['):
+            out.append(text[end:start])
+            out.append(render(text[label:close], target))
+            end = target_end + 1
+            start = text.find(opener, end)
+        else:
+            start = text.find(opener, start + 1)
+    out.append(text[end:])
+    return ''.join(out)
+
+def _wrap_delimited(text, opener, closer, tag):
+    """
+    Wrap delimited runs such as ``**bold**`` in ``tag``.
+
+    Each opener is paired with the nearest closer of the same delimiter
+    after it, on the same line and with some content in between. The
+    closers are listed once and consumed in order, so this is linear
+    where a lazy ``(.+?)`` search from every opener is quadratic.
+    """
+    closers = defaultdict(list)
+    for match in closer.finditer(text):
+        closers[match.group(1)].append(match.start())
+    newlines = [match.start() for match in re.finditer('\n', text)]
+    next_closer = defaultdict(int)
+
+    out, end = [], 0
+    for match in opener.finditer(text):
+        start, delimiter = match.start(), match.group(1)
+        if start < end:
+            continue
+        content = start + len(delimiter)
+        positions = closers[delimiter]
+        index = next_closer[delimiter]
+        while index < len(positions) and positions[index] <= content:
+            index += 1
+        next_closer[delimiter] = index
+        if index == len(positions):
+            continue
+        stop = positions[index]
+        if _newline_between(newlines, content, stop):
+            continue
+        out.append(text[end:start])
+        out.append(f'<{tag}>{text[content:stop]}</{tag}>')
+        end = stop + len(delimiter)
+    out.append(text[end:])
+    return ''.join(out)
+
+def render_inline(text: str) -> str:
+    """Render inline Markdown in ``text`` to escaped HTML"""
+    spans = []
+
+    def protect(markup):
+        spans.append(markup)
+        return f'\x00{len(spans) - 1}\x00'
+
+    text = _replace_code_spans(text.replace('\x00', ''),
+                               lambda code: protect(f'<code>{html.escape(code.strip())}</code>'))
+    text = html.escape(text, quote=True)
+
+    def image(label, target):
+        url = _safe_url(target)
+        return protect(f'<img src="{url}" alt="{label}" loading="lazy">') if url else label
+
+    def link(label, target):
+        url = _safe_url(target)
+        return protect(f'<a href="{url}">{label}</a>') if url else label
+
+    text = _replace_links(text, '![', image)
+    text = _replace_links(text, '[', link)
+    text = _wrap_delimited(text, _STRONG_OPENER, _STRONG_CLOSER, 'strong')
+    text = _wrap_delimited(text, _EMPHASIS_OPENER, _EMPHASIS_CLOSER, 'em')
+    # Links may contain protected code spans, so restore until none are left
+    while '\x00' in text:
+        text = re.sub(r'\x00(\d+)\x00', lambda m: spans[int(m.group(1))], text)
+    return text
+
+def plain_text(markup: str) -> str:
+    """Text content of rendered HTML, with whitespace collapsed"""
+    return ' '.join(html.unescape(_TAG.sub('', _BLOCK_TAG.sub(' ', markup))).split())
+
+def _slugify(text, used):
+    # ``used`` maps every id given out to the last number suffixed to it,
+    # so repeated headings do not count up from 1 each time
+    slug = re.sub(r'[^\w\s-]', '', text.lower())
+    slug = re.sub(r'[\s_-]+', '-', slug).strip('-') or 'section'
+    candidate, number = slug, used.get(slug, 1)
+    while candidate in used:
+        number += 1
+        candidate = f'{slug}-{number}'
+    used[slug] = number
+    used.setdefault(candidate, 1)
+    return candidate
+
+def _heading_text(text):
+    # The optional closing sequence of '#'s, stripped without a lazy
+    # regex that backtracks over long runs of spaces
+    return text.rstrip().rstrip('#').rstrip() or text[0]
+
+def render_markdown(source: str):
+    """
+    Render ``source`` to HTML.
+
+    Returns:
+        tuple: (html, toc) where toc lists the h2/h3 headings as
+        ``{'level', 'text', 'id'}``
+    """
+    return _render_blocks(source, 0)
+
+def _render_blocks(source, depth):
+    lines = (source or '').replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    out, toc, used_ids = [], [], {}
+    paragraph = []
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            out.append(f"<p>{render_inline(' '.join(line.strip() for line in paragraph))}</p>")
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        fence = _FENCE.match(stripped)
+        if fence:
+            flush_paragraph()
+            code = []
+            i += 1
+            while i < len(lines) and lines[i].strip() != fence.group(1):
+                code.append(lines[i])
+                i += 1
+            language = f' class="language-{fence.group(2)}"' if fence.group(2) else ''
+            out.append(f"<pre><code{language}>{html.escape(chr(10).join(code))}</code></pre>")
+            i += 1
+            continue
+
+        if not stripped:
+            flush_paragraph()
+            i += 1
+            continue
+
+        heading = _HEADING.match(stripped)
+        if heading:
+            flush_paragraph()
+            level = len(heading.group(1))
+            content = render_inline(_heading_text(heading.group(2)))
+            anchor = _slugify(plain_text(content), used_ids)
+            out.append(f'<h{level} id="{anchor}">{content}</h{level}>')
+            if level in TOC_LEVELS:
+                toc.append({'level': level, 'text': plain_text(content), 'id': anchor})
+            i += 1
+            continue
+
+        if _RULE.match(stripped):
+            flush_paragraph()
+            out.append('<hr>')
+            i += 1
+            continue
+
+        if depth < MAX_QUOTE_DEPTH and _QUOTE.match(stripped):
+            flush_paragraph()
+            quoted = []
+            while i < len(lines) and _QUOTE.match(lines[i].strip()):
+                quoted.append(_QUOTE.match(lines[i].strip()).group(1))
+                i += 1
+            inner, _ = _render_blocks('\n'.join(quoted), depth + 1)
+            out.append(f'<blockquote>{inner}</blockquote>')
+            continue
+
+        for pattern, tag in ((_UNORDERED, 'ul'), (_ORDERED, 'ol')):
+            if pattern.match(stripped):
+                flush_paragraph()
+                items = []
+                while i < len(lines) and pattern.match(lines[i].strip()):
+                    items.append(f'<li>{render_inline(pattern.match(lines[i].strip()).group(1))}</li>')
+                    i += 1
+                out.append(f"<{tag}>{''.join(items)}</{tag}>")
+                break
+        else:
+            paragraph.append(line)
+            i += 1
+
+    flush_paragraph()
+    return '\n'.join(out), toc
+
+def _truncate(text, length):
+    if len(text) <= length:
+        return text
+    cut = text[:length + 1].rsplit(' ', 1)[0] if ' ' in text[:length + 1] else text[:length]
+    return cut.rstrip(' ,;:.-') + '…'
+
+def render_article(content: Optional[str], excerpt: Optional[str] = None) -> Rendered:
+    """
+    Render an article body and derive its reading stats.
+
+    The excerpt is plain text: the author's ``excerpt`` with markup and
+    HTML tags stripped, or else the opening of the body, cut at a word
+    boundary.
+    """
+    body_html, toc = render_markdown(content or '')
+    text = plain_text(body_html)
+    word_count = len(_WORD.findall(text))
+    if excerpt and excerpt.strip():
+        summary = plain_text(render_inline(excerpt))
+    else:
+        first_paragraph = re.search(r'<p>(.*?)</p>', body_html, re.DOTALL)
+        summary = plain_text(first_paragraph.group(1)) if first_paragraph else text
+    # Raw HTML in the source survives escaping as text; leave it out of the excerpt
+    summary = ' '.join(_TAG.sub('', summary).split())
+    return Rendered(
+        html=body_html,
+        excerpt=_truncate(summary, EXCERPT_LENGTH),
+        word_count=word_count,
+        reading_minutes=max(1, round(word_count / WORDS_PER_MINUTE)) if word_count else 0,
+        toc=toc
+    )
+
+__all__ = ['RENDERER_VERSION', 'Rendered', 'content_hash', 'plain_text', 'render_article', 'render_inline',
+           'render_markdown']
@@ -0,0 +1,132 @@
+"""
+Keyset (cursor) pagination and column projection for listing endpoints.
+
+Pages are addressed by an opaque cursor encoding the ``(published_at, id)``
+of the last row served, so fetching page N costs the same index range
+scan as page 1. Rows whose sort value is NULL come last on every
+database, ordered by id. They are read in a second phase once the non-NULL
+range runs out, so the range itself stays a plain row-value seek on the
+``(..., published_at, id)`` indexes. Listings select only the requested
+columns and return plain dicts instead of ORM objects.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from models import db
+from sqlalchemy import tuple_
+
+# Columns returned by article listings when no fields= are requested
+DEFAULT_ARTICLE_FIELDS = ('id', 'title', 'slug', 'excerpt', 'published_at',
+                          'author_id', 'category_id', 'is_featured')
+
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, datetime_key: bool = True) -> Tuple:
+    """
+    Decode a cursor produced by ``encode_cursor``. The sort value is None
+    when the last row had no sort value.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if datetime_key and sort_value is not None:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], default: Iterable[str],
+                 required: Iterable[str] = ('id',)) -> List[str]:
+    """
+    Resolve a comma-separated ``fields=`` parameter into column names.
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        names = list(default)
+    else:
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = set(names) - set(allowed)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    for name in required:
+        if name not in names:
+            names.append(name)
+    return names
+
+def _ranged(query, sort_column, id_column, after):
+    """Rows with a sort value, newest first, after the ``(sort_value, row_id)`` in ``after``"""
+    query = query.where(sort_column.is_not(None))
+    if after is not None:
+        query = query.where(tuple_(sort_column, id_column) < tuple_(*after))
+    # No NULLS LAST: the ascending indexes are scanned backwards as they are
+    return query.order_by(sort_column.desc(), id_column.desc())
+
+def _unsorted(query, sort_column, id_column, after_id):
+    """Rows without a sort value, highest id first, below ``after_id``"""
+    query = query.where(sort_column.is_(None))
+    if after_id is not None:
+        query = query.where(id_column < after_id)
+    return query.order_by(id_column.desc())
+
+def keyset_paginate(model, fields, filters=(), cursor=None, limit=20, sort_field='published_at'):
+    """
+    Return one page of ``model`` rows ordered newest first.
+
+    Args:
+        model: Model class to list
+        fields: Column names to select
+        filters: SQLAlchemy criteria applied to the query
+        cursor: Cursor from the previous page's ``next_cursor``
+        limit: Page size, capped at MAX_PAGE_SIZE
+        sort_field: Column paired with ``id`` as the sort key
+
+    Returns:
+        dict: ``items`` as plain dicts and ``next_cursor`` (None on the last page)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    sort_column = getattr(model, sort_field)
+    names = list(fields)
+    # The sort key is needed to build the next cursor even if not requested
+    extra = [name for name in (sort_field, 'id') if name not in names]
+    columns = [getattr(model, name) for name in names + extra]
+
+    query = db.select(*columns).where(*filters)
+    sort_value, row_id = decode_cursor(cursor, datetime_key=sort_field != 'id') if cursor else (None, None)
+
+    rows = []
+    if not cursor or sort_value is not None:
+        after = (sort_value, row_id) if cursor else None
+        rows = db.session.execute(_ranged(query, sort_column, model.id, after).limit(limit + 1)).all()
+    if len(rows) <= limit and model.__table__.c[sort_field].nullable:
+        after_id = row_id if cursor and sort_value is None else None
+        rows += db.session.execute(
+            _unsorted(query, sort_column, model.id, after_id).limit(limit + 1 - len(rows))
+        ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(last[sort_field], last['id'])
+
+    items = [{name: row._mapping[name] for name in names} for row in rows]
+    return {'items': items, 'next_cursor': next_cursor}
+
+__all__ = ['decode_cursor', 'encode_cursor', 'keyset_paginate', 'parse_fields']
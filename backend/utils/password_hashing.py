@@ -0,0 +1,98 @@
+"""
+Password hashing on a bounded process pool.
+
+Hashing and verifying passwords is deliberately CPU-heavy. Running it in
+a small, dedicated process pool keeps request workers free, and a cap on
+pending jobs turns a login burst into fast HashingOverloaded errors
+(served as 503) instead of a queue that starves every other endpoint.
+
+Configuration (environment):
+    PASSWORD_HASH_METHOD: werkzeug method string, e.g. 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS: pool size per process; 0 hashes inline
+    PASSWORD_HASH_MAX_PENDING: jobs allowed in flight before shedding
+    PASSWORD_HASH_TIMEOUT: seconds to wait for a result
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '5'))
+
+
+class HashingOverloaded(Exception):
+    """Raised when the hashing pool is saturated and the request should be shed"""
+
+
+class _HashingPool:
+    """Process pool with a bound on in-flight jobs, created lazily per process"""
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded('Password hashing queue is full')
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job is done, not until the caller
+        # gives up: a timed-out job keeps its worker busy
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingOverloaded('Password hashing timed out') from None
+
+    def _get_executor(self):
+        # Forked request workers must not reuse the parent's pool
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+_pool = _HashingPool(HASH_WORKERS, MAX_PENDING, HASH_TIMEOUT)
+
+def hash_password(password: str) -> str:
+    """Hash ``password`` with the configured method on the hashing pool"""
+    return _pool.run(generate_password_hash, password, HASH_METHOD)
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Check ``password`` against ``password_hash`` on the hashing pool"""
+    return _pool.run(check_password_hash, password_hash, password)
+
+@lru_cache(maxsize=None)
+def _current_params() -> str:
+    # werkzeug expands defaults (e.g. 'pbkdf2' -> 'pbkdf2:sha256:1000000'),
+    # so compare against the prefix of a real hash
+    return generate_password_hash('', HASH_METHOD).split('$', 1)[0]
+
+def needs_rehash(password_hash: str) -> bool:
+    """Return True if ``password_hash`` was made with different parameters"""
+    return password_hash.split('$', 1)[0] != _current_params()
+
+__all__ = ['HashingOverloaded', 'hash_password', 'needs_rehash', 'verify_password']
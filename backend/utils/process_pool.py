@@ -0,0 +1,26 @@
+"""
+Process pools for CPU-bound batch work inside the application.
+
+Full rebuilds (snapshots, article renderings) spread their chunks over
+spawned processes. Each process builds its own app, so no database
+connections or threads are inherited from the parent.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.utils import import_string
+
+def _push_app_context(factory, factory_args):
+    # Each pool process keeps one app context for its lifetime
+    import_string(factory)(*factory_args).app_context().push()
+
+def app_pool(processes, factory, factory_args=()):
+    """
+    ProcessPoolExecutor whose spawned processes each build an app with the
+    ``factory`` import string and work inside its app context
+    """
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_push_app_context, initargs=(factory, factory_args))
+
+__all__ = ['app_pool']
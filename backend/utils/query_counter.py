@@ -0,0 +1,83 @@
+"""
+SQL query counting for tests and query budgets on endpoints.
+
+``count_queries`` records every statement sent to the app's engines,
+read replicas included, inside the block. ``assert_max_queries`` fails when a block issues more statements
+than allowed, and the ``query_budget`` decorator applies the same check
+to a view whenever the app runs in TESTING mode, so an N+1 regression
+fails the endpoint's tests.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+from typing import List
+
+from flask import current_app
+from sqlalchemy import event
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block or endpoint issues more queries than its budget"""
+
+
+class QueryCounter:
+    """Collects statements executed on an engine while active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    Yield a QueryCounter recording the statements executed in the block.
+
+    Without ``engine`` every engine of the current app is watched, so
+    reads routed to a replica bind count against the budget too.
+    """
+    if engine is None:
+        engines = set(current_app.extensions['sqlalchemy'].engines.values())
+    else:
+        engines = {engine}
+    counter = QueryCounter()
+    for watched in engines:
+        event.listen(watched, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        for watched in engines:
+            event.remove(watched, 'before_cursor_execute', counter)
+
+@contextmanager
+def assert_max_queries(max_queries, engine=None):
+    """Fail if the block executes more than ``max_queries`` statements"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > max_queries:
+        statements = '\n'.join(f'  {statement}' for statement in counter.statements)
+        raise QueryBudgetExceeded(
+            f'Expected at most {max_queries} queries, got {counter.count}:\n{statements}'
+        )
+
+def query_budget(max_queries):
+    """
+    Decorator enforcing a query budget on a view while TESTING is enabled
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not current_app.config.get('TESTING'):
+                return f(*args, **kwargs)
+            with assert_max_queries(max_queries):
+                return f(*args, **kwargs)
+        decorated.query_budget = max_queries
+        return decorated
+    return decorator
+
+__all__ = ['QueryBudgetExceeded', 'QueryCounter', 'assert_max_queries', 'count_queries', 'query_budget']
@@ -0,0 +1,275 @@
+"""
+Shared-memory rate limit storage for multi-process, single-host deployments.
+
+Importing this module registers the ``mmap://`` scheme with the ``limits``
+library, so Flask-Limiter can be pointed at it with::
+
+    RATELIMIT_STORAGE_URI = 'mmap:///var/run/blog/ratelimit.bin?slots=65536'
+    RATELIMIT_STRATEGY = 'sliding-window-counter'
+
+Counters live in a fixed-size, memory-mapped hash table shared by every
+worker on the host. Memory is bounded by the slot count: when all slots a
+key may probe are taken by live counters, the one closest to expiry is
+evicted. Expired slots are swept periodically, a bounded batch per
+increment, so no single request pays for a pass over the whole table.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from math import floor
+from urllib.parse import parse_qs, urlparse
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+MAGIC = b'RLMMAP01'
+HEADER = struct.Struct('<8sQ')
+# key hash, counter, expiry timestamp
+SLOT = struct.Struct('<Qqd')
+
+DEFAULT_SLOTS = 65536
+PROBE_LENGTH = 16
+COMPACT_INTERVAL = 60
+# Slots swept per increment while a compaction pass is under way
+COMPACT_BATCH = 1024
+
+
+class MmapStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Fixed and sliding window counters in a shared memory-mapped file.
+
+    Args:
+        uri (str): ``mmap:///path/to/file`` with an optional ``slots`` query arg
+    """
+
+    STORAGE_SCHEME = ['mmap']
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        parsed = urlparse(uri or 'mmap:///tmp/ratelimit.bin')
+        query = parse_qs(parsed.query)
+        self.path = parsed.path
+        self.slots = int(options.get('slots', query.get('slots', [DEFAULT_SLOTS])[0]))
+        self.compact_interval = float(options.get('compact_interval', COMPACT_INTERVAL))
+        self.compact_batch = int(options.get('compact_batch', COMPACT_BATCH))
+        self._thread_lock = threading.RLock()
+        self._pid = None
+        self._file = None
+        self._map = None
+        self._last_compaction = time.time()
+        # Next slot of the compaction pass in progress; 0 between passes
+        self._compact_cursor = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return (OSError, ValueError, struct.error)
+
+    def incr(self, key, expiry, amount=1):
+        with self._locked():
+            return self._incr(key, expiry, amount)
+
+    def decr(self, key, amount=1):
+        with self._locked():
+            index = self._find(self._hash(key), time.time())
+            if index is None:
+                return 0
+            key_hash, count, expires_at = self._read(index)
+            count = max(count - amount, 0)
+            self._write(index, key_hash, count, expires_at)
+            return count
+
+    def get(self, key):
+        with self._locked():
+            index = self._find(self._hash(key), time.time())
+            return 0 if index is None else self._read(index)[1]
+
+    def get_expiry(self, key):
+        now = time.time()
+        with self._locked():
+            index = self._find(self._hash(key), now)
+            return now if index is None else self._read(index)[2]
+
+    def clear(self, key):
+        with self._locked():
+            index = self._find(self._hash(key), time.time())
+            if index is not None:
+                self._write(index, 0, 0, 0.0)
+
+    def check(self):
+        try:
+            with self._locked():
+                return self._map is not None
+        except self.base_exceptions:
+            return False
+
+    def reset(self):
+        now = time.time()
+        with self._locked():
+            live = sum(1 for index in range(self.slots) if self._is_live(self._read(index), now))
+            self._map[HEADER.size:] = bytes(SLOT.size * self.slots)
+            return live
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        with self._locked():
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(
+                previous_key, current_key, expiry, now
+            )
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            # Keep the current window around for the whole next window too
+            self._incr(current_key, 2 * expiry, amount)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        with self._locked():
+            return self._sliding_window(previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+    def compact(self):
+        """Zero every expired slot, returning the number reclaimed"""
+        now = time.time()
+        with self._locked():
+            self._compact_cursor = 0
+            return self._compact(now, self.slots)
+
+    def _sliding_window(self, previous_key, current_key, expiry, now):
+        previous_index = self._find(self._hash(previous_key), now)
+        current_index = self._find(self._hash(current_key), now)
+        previous_count = 0 if previous_index is None else self._read(previous_index)[1]
+        current_count = 0 if current_index is None else self._read(current_index)[1]
+        previous_ttl = 0.0 if not previous_count else (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def _incr(self, key, expiry, amount):
+        now = time.time()
+        if self._compact_cursor or now - self._last_compaction >= self.compact_interval:
+            self._compact(now, self.compact_batch)
+
+        key_hash = self._hash(key)
+        index = self._find(key_hash, now)
+        if index is not None:
+            _, count, expires_at = self._read(index)
+            count += amount
+            self._write(index, key_hash, count, expires_at)
+            return count
+
+        self._write(self._claim(key_hash, now), key_hash, amount, now + expiry)
+        return amount
+
+    def _find(self, key_hash, now):
+        for index in self._probe(key_hash):
+            slot = self._read(index)
+            if slot[0] == key_hash and slot[2] > now:
+                return index
+        return None
+
+    def _claim(self, key_hash, now):
+        # Prefer a free or expired slot, otherwise evict the soonest to expire
+        victim, victim_expiry = None, None
+        for index in self._probe(key_hash):
+            slot = self._read(index)
+            if not self._is_live(slot, now):
+                return index
+            if victim is None or slot[2] < victim_expiry:
+                victim, victim_expiry = index, slot[2]
+        return victim
+
+    def _compact(self, now, limit):
+        # Sweep up to ``limit`` slots from where the pass left off; the
+        # pass is done, and the interval restarts, once it wraps around
+        start = self._compact_cursor
+        stop = min(start + limit, self.slots)
+        reclaimed = 0
+        for index in range(start, stop):
+            slot = self._read(index)
+            if slot[0] and slot[2] <= now:
+                self._write(index, 0, 0, 0.0)
+                reclaimed += 1
+        self._compact_cursor = stop % self.slots
+        if not self._compact_cursor:
+            self._last_compaction = now
+        return reclaimed
+
+    def _probe(self, key_hash):
+        start = key_hash % self.slots
+        return ((start + offset) % self.slots for offset in range(min(PROBE_LENGTH, self.slots)))
+
+    @staticmethod
+    def _is_live(slot, now):
+        return slot[0] != 0 and slot[2] > now
+
+    @staticmethod
+    def _hash(key):
+        digest = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+        return digest or 1
+
+    def _read(self, index):
+        return SLOT.unpack_from(self._map, HEADER.size + index * SLOT.size)
+
+    def _write(self, index, key_hash, count, expires_at):
+        SLOT.pack_into(self._map, HEADER.size + index * SLOT.size, key_hash, count, expires_at)
+
+    def _locked(self):
+        self._open()
+        return _FileLock(self._thread_lock, self._file)
+
+    def _open(self):
+        # Re-open after fork: flock locks are shared by inherited descriptors
+        if self._pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._pid == os.getpid():
+                return
+            size = HEADER.size + SLOT.size * self.slots
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handle = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), 'r+b')
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                if os.fstat(handle.fileno()).st_size != size:
+                    handle.truncate(size)
+                    handle.seek(0)
+                    handle.write(HEADER.pack(MAGIC, self.slots))
+                    handle.flush()
+                mapped = mmap.mmap(handle.fileno(), size)
+                magic, slots = HEADER.unpack_from(mapped, 0)
+                if magic != MAGIC or slots != self.slots:
+                    raise ValueError(f'{self.path} is not a rate limit table with {self.slots} slots')
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            self._file, self._map, self._pid = handle, mapped, os.getpid()
+
+
+class _FileLock:
+    """Holds the in-process lock and an exclusive flock on the table file"""
+
+    def __init__(self, thread_lock, handle):
+        self.thread_lock = thread_lock
+        self.handle = handle
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        fcntl.flock(self.handle, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.handle, fcntl.LOCK_UN)
+        self.thread_lock.release()
+
+__all__ = ['MmapStorage']
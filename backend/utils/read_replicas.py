@@ -0,0 +1,224 @@
+"""
+Read-replica routing for Flask-SQLAlchemy sessions.
+
+Replicas are configured with SQLALCHEMY_REPLICAS, a list of URLs or of
+dicts with a ``url`` and engine options (``pool_size``, ``max_overflow``,
+...). They are registered as extra binds, so Flask-SQLAlchemy creates
+and disposes their engines like any other. Entries without their own
+``pool_size`` get SQLALCHEMY_REPLICA_POOL_SIZE.
+
+``RoutingSession`` sends a query to a replica only when all of these hold:
+
+- it runs inside a GET, HEAD or OPTIONS request;
+- it would otherwise use the default bind;
+- the session has not written anything yet in this request.
+
+Everything else goes to the primary: flushes, Core DML and raw SQL
+other than SELECT, queries made after the first write (read-after-write),
+and queries inside ``use_primary()``. Each session sticks to one replica.
+
+A replica is probed with a connection before its first use. It is taken
+out of rotation for SQLALCHEMY_REPLICA_RETRY_SECONDS when the probe or a
+later query fails with a connection-level error. When no replica is
+healthy, reads fall back to the primary.
+"""
+
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+BIND_PREFIX = 'replica_'
+DEFAULT_RETRY_SECONDS = 30.0
+
+# Errors that mean the replica itself is unavailable, not that the query is wrong
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+
+class ReplicaSet:
+    """
+    Round-robin selection over replica binds with health tracking.
+
+    Args:
+        keys: Bind keys of the replicas, in configuration order
+        retry_after: Seconds a failed replica stays out of rotation
+    """
+
+    def __init__(self, keys, retry_after=DEFAULT_RETRY_SECONDS):
+        self.keys = list(keys)
+        self.retry_after = retry_after
+        self._down_until = {}
+        self._verified = set()
+        self._watched = set()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def choose(self, engines, preferred=None):
+        """Return a healthy replica key, trying ``preferred`` first, or None"""
+        if not self.keys:
+            return None
+        if preferred is not None and self.is_available(preferred, engines[preferred]):
+            return preferred
+        start = next(self._counter)
+        for offset in range(len(self.keys)):
+            key = self.keys[(start + offset) % len(self.keys)]
+            if key != preferred and self.is_available(key, engines[key]):
+                return key
+        return None
+
+    def is_available(self, key, engine):
+        """Whether ``key`` may serve reads, probing it if its state is unknown"""
+        until = self._down_until.get(key)
+        if until is not None and time.monotonic() < until:
+            return False
+        if key in self._verified:
+            return True
+
+        self._watch(key, engine)
+        try:
+            engine.connect().close()
+        except UNAVAILABLE_ERRORS:
+            self.mark_down(key)
+            return False
+        with self._lock:
+            self._down_until.pop(key, None)
+            self._verified.add(key)
+        return True
+
+    def mark_down(self, key):
+        """Take ``key`` out of rotation for ``retry_after`` seconds"""
+        with self._lock:
+            self._down_until[key] = time.monotonic() + self.retry_after
+            self._verified.discard(key)
+
+    def status(self):
+        """Health of each replica: 'up', 'down' or 'unknown'"""
+        now = time.monotonic()
+        return {
+            key: 'down' if self._down_until.get(key, 0) > now else 'up' if key in self._verified else 'unknown'
+            for key in self.keys
+        }
+
+    def _watch(self, key, engine):
+        # Failures of queries already routed to the replica also count
+        if key in self._watched:
+            return
+        with self._lock:
+            if key in self._watched:
+                return
+            self._watched.add(key)
+
+        @event.listens_for(engine, 'handle_error')
+        def replica_failed(context):
+            if isinstance(context.sqlalchemy_exception, UNAVAILABLE_ERRORS):
+                self.mark_down(key)
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends safe reads to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self._flushing:
+            return engine
+        if _is_write(clause):
+            self.info['wrote'] = True
+            return engine
+
+        engines = self._db.engines
+        if engine is not engines.get(None) or not self._reads_from_replica():
+            return engine
+
+        replicas = current_app.extensions.get('read_replicas')
+        if replicas is None:
+            return engine
+        key = replicas.choose(engines, self.info.get('replica'))
+        if key is None:
+            return engine
+        self.info['replica'] = key
+        return engines[key]
+
+    def _reads_from_replica(self):
+        return (
+            has_request_context()
+            and request.method in READ_METHODS
+            and not self.info.get('wrote')
+            and not self.info.get('force_primary')
+        )
+
+def _is_write(clause):
+    """Core DML, or raw SQL that is not a plain SELECT"""
+    if isinstance(clause, UpdateBase):
+        return True
+    return isinstance(clause, TextClause) and not clause.text.lstrip().lower().startswith('select')
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _pin_to_primary(session, flush_context):
+    # Later reads in this request must see the write
+    session.info['wrote'] = True
+
+@contextmanager
+def use_primary(session=None):
+    """Route every query made by ``session`` inside the block to the primary"""
+    if session is None:
+        session = current_app.extensions['sqlalchemy'].session
+    depth = session.info.get('force_primary', 0)
+    session.info['force_primary'] = depth + 1
+    try:
+        yield session
+    finally:
+        session.info['force_primary'] = depth
+
+
+class ReadReplicas:
+    """
+    Registers SQLALCHEMY_REPLICAS as binds and tracks their health.
+
+    ``init_app`` must run before ``db.init_app`` so the replica engines are
+    created with the rest.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        replicas = app.config.get('SQLALCHEMY_REPLICAS')
+        if replicas is None:
+            replicas = [url for url in os.getenv('SQLALCHEMY_REPLICAS', '').split(',') if url.strip()]
+        pool_size = app.config.get('SQLALCHEMY_REPLICA_POOL_SIZE')
+
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        keys = []
+        for index, replica in enumerate(replicas):
+            options = dict(replica) if isinstance(replica, dict) else {'url': replica.strip()}
+            if pool_size is not None:
+                options.setdefault('pool_size', pool_size)
+            key = f'{BIND_PREFIX}{index}'
+            binds[key] = options
+            keys.append(key)
+
+        app.config['SQLALCHEMY_BINDS'] = binds
+        app.extensions['read_replicas'] = ReplicaSet(
+            keys, app.config.get('SQLALCHEMY_REPLICA_RETRY_SECONDS', DEFAULT_RETRY_SECONDS)
+        )
+
+    @staticmethod
+    def status():
+        """Health of the current app's replicas"""
+        if not has_app_context() or 'read_replicas' not in current_app.extensions:
+            return {}
+        return current_app.extensions['read_replicas'].status()
+
+read_replicas = ReadReplicas()
+
+__all__ = ['ReadReplicas', 'ReplicaSet', 'RoutingSession', 'read_replicas', 'use_primary']
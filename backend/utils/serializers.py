@@ -0,0 +1,147 @@
+"""
+Precompiled serializers for Marshmallow schemas.
+
+``compile_serializer(UserSchema)`` turns the schema's dump fields (its
+``Meta.fields`` minus load-only fields, in order) into one generated
+function mapping a SQLAlchemy Core row to the dict ``schema.dump``
+would return. Common field types are converted inline and every other
+field calls its own ``_serialize``, so output is identical to
+Marshmallow either way. The row must hold the schema's source columns
+in order, which ``CompiledSerializer.columns`` selects:
+
+    serializer = compile_serializer(UserSchema)
+    rows = db.session.execute(db.select(*serializer.columns(User)))
+    return serializer.response(rows, key='users')
+
+JSON is encoded with orjson when it is installed.
+"""
+
+from functools import lru_cache, partial
+
+from flask import current_app
+from marshmallow import fields
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+
+try:
+    import orjson
+except ImportError:  # optional fast JSON encoder
+    orjson = None
+
+# Fields whose value does not come from a column
+UNSUPPORTED_FIELDS = (fields.Nested, fields.Pluck, fields.Method, fields.Function)
+
+
+def _inline_expression(field, value, name):
+    """
+    Python expression converting ``value`` like ``field._serialize`` does,
+    or None when the field has to be called.
+    """
+    field_type = type(field)
+    if field_type._serialize is fields.String._serialize:
+        return f'{value} if {value}.__class__ is str or {value} is None else str({value})'
+    if (field_type._serialize is fields.Number._serialize
+            and field_type._format_num is fields.Number._format_num
+            and field.num_type in (int, float) and not field.as_string):
+        num_type = field.num_type.__name__
+        return f'{value} if {value}.__class__ is {num_type} or {value} is None else {num_type}({value})'
+    if field_type._serialize is fields.Boolean._serialize:
+        return f'{value} if {value} is True or {value} is False or {value} is None else {name}({value})'
+    if field_type._serialize is fields.DateTime._serialize and (field.format or field.DEFAULT_FORMAT) == 'iso':
+        return f'None if {value} is None else {value}.isoformat()'
+    if field_type._serialize is fields.Raw._serialize:
+        return value
+    return None
+
+
+class CompiledSerializer:
+    """
+    Row-to-dict function generated for one schema.
+
+    Attributes:
+        attributes: Source attribute names, in the order rows must hold them
+        keys: Output keys, in the same order
+    """
+
+    def __init__(self, schema):
+        hooks = getattr(schema, '_hooks', {})
+        if any(hooks.get((tag, many)) for tag in (PRE_DUMP, POST_DUMP) for many in (False, True)):
+            raise ValueError(f'{type(schema).__name__} has dump hooks and cannot be compiled')
+
+        self.attributes = []
+        self.keys = []
+        namespace = {}
+        entries = []
+        for index, (name, field) in enumerate(schema.dump_fields.items()):
+            attribute = field.attribute or name
+            if isinstance(field, UNSUPPORTED_FIELDS) or '.' in attribute:
+                raise ValueError(f'Field {name!r} of {type(schema).__name__} does not map to a column')
+            key = field.data_key if field.data_key is not None else name
+            self.attributes.append(attribute)
+            self.keys.append(key)
+
+            value, converter = f'v{index}', f'_serialize{index}'
+            namespace[converter] = partial(field._serialize, attr=attribute, obj=None)
+            expression = _inline_expression(field, value, converter) or f'{converter}({value})'
+            entries.append(f'{key!r}: {expression}')
+
+        if not self.keys:
+            raise ValueError(f'{type(schema).__name__} has no fields to dump')
+        values = ', '.join(f'v{index}' for index in range(len(self.keys)))
+        source = (
+            'def serialize(row):\n'
+            f'    {values}, = row\n'
+            f'    return {{{", ".join(entries)}}}\n'
+        )
+        exec(compile(source, f'<serializer {type(schema).__name__}>', 'exec'), namespace)
+        self.source = source
+        self.serialize = namespace['serialize']
+
+    def __call__(self, row):
+        return self.serialize(row)
+
+    def many(self, rows):
+        """Serialize an iterable of rows into a list of dicts"""
+        serialize = self.serialize
+        return [serialize(row) for row in rows]
+
+    def columns(self, model):
+        """Columns of ``model`` (mapped class or Table) to select, in row order"""
+        columns = getattr(model, 'c', None)
+        if columns is not None:
+            return [columns[attribute] for attribute in self.attributes]
+        return [getattr(model, attribute) for attribute in self.attributes]
+
+    def response(self, rows, key=None, status=200, **extra):
+        """
+        JSON response of the serialized rows, as a bare list or under ``key``
+        together with ``extra`` members (pagination cursors, totals)
+        """
+        data = self.many(rows)
+        if key is not None:
+            data = {key: data, **extra}
+        return current_app.response_class(dumps(data), status=status, mimetype='application/json')
+
+@lru_cache(maxsize=None)
+def _compile_schema_class(schema_class):
+    return CompiledSerializer(schema_class())
+
+def compile_serializer(schema):
+    """Serializer for a schema class (cached) or a configured schema instance"""
+    if isinstance(schema, type):
+        return _compile_schema_class(schema)
+    return CompiledSerializer(schema)
+
+def dumps(data):
+    """
+    Encode ``data`` as JSON the way the app's provider would, using orjson
+    when available
+    """
+    sort_keys = getattr(current_app.json, 'sort_keys', False)
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except TypeError:
+            pass
+    return current_app.json.dumps(data)
+
+__all__ = ['CompiledSerializer', 'compile_serializer', 'dumps']
@@ -0,0 +1,36 @@
+"""
+Helpers for streamed responses.
+"""
+
+import zlib
+from typing import Iterable, Iterator
+
+# Flush compressed output once this many bytes are buffered
+GZIP_FLUSH_BYTES = 64 * 1024
+
+def accepts_gzip(request) -> bool:
+    """Return True if the client accepts a gzip-encoded response"""
+    return 'gzip' in request.accept_encodings
+
+def gzip_stream(chunks: Iterable, level: int = 6) -> Iterator[bytes]:
+    """
+    Compress an iterable of str/bytes chunks into a gzip stream.
+
+    Output is emitted whenever enough input has been buffered, so memory
+    stays flat regardless of the total size.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= GZIP_FLUSH_BYTES:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if data:
+            yield data
+    yield compressor.flush()
+
+__all__ = ['accepts_gzip', 'gzip_stream']
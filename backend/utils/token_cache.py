@@ -0,0 +1,137 @@
+"""
+Bounded cache of verified JWTs used by the ``token_required`` decorator.
+
+A token is decoded and its user loaded once; later requests carrying the
+same token are served from the cache until the entry's TTL or the token's
+own ``exp`` claim is reached, whichever comes first.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Slim, immutable copy of the User columns needed by protected routes"""
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    role: str
+    is_active: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user) -> 'UserSnapshot':
+        """Build a snapshot from a User instance"""
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at
+        )
+
+    def get_full_name(self) -> str:
+        """Return the full name of the user."""
+        return f"{self.first_name} {self.last_name}"
+
+
+class TokenCache:
+    """
+    Thread-safe LRU cache mapping raw tokens to user snapshots.
+
+    Args:
+        maxsize (int): Maximum number of cached tokens
+        ttl (float): Maximum lifetime of an entry in seconds
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        """Return the cached snapshot for ``token`` or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, snapshot = entry
+            if expires_at <= now:
+                self._remove(token)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return snapshot
+
+    def set(self, token: str, snapshot: UserSnapshot, token_exp: Optional[float] = None):
+        """Cache ``snapshot`` for ``token``, never beyond the token's ``exp``"""
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (expires_at, snapshot)
+            self._tokens_by_user.setdefault(snapshot.id, set()).add(token)
+
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token belonging to ``user_id``"""
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, set()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def _remove(self, token: str):
+        # Caller must hold the lock
+        _, snapshot = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(snapshot.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[snapshot.id]
+
+__all__ = ['TokenCache', 'UserSnapshot']
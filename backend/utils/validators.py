@@ -3,7 +3,8 @@ Utility functions for validating common data types in the Flask API.
 """
 
 import re
-from typing import Tuple
+import string
+from typing import Iterable, List, Tuple
 
 # Email validation regex pattern
 EMAIL_REGEX = re.compile(
@@ -20,6 +21,28 @@ PASSWORD_REGEX = re.compile(
     r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$"
 )
 
+# Characters allowed by PASSWORD_REGEX, checked without lookaheads by the
+# batch validator; the required classes are then tested individually
+PASSWORD_CHARSET_REGEX = re.compile(r"^[A-Za-z\d@$!%*?&]{8,}$")
+PASSWORD_LOWER = frozenset(string.ascii_lowercase)
+PASSWORD_UPPER = frozenset(string.ascii_uppercase)
+PASSWORD_DIGITS = frozenset(string.digits)
+PASSWORD_SPECIAL = frozenset('@$!%*?&')
+
+# Emails memoized per generation by the batch validator; the older of two
+# generations is dropped when the newer one fills up
+EMAIL_CACHE_SIZE = 100000
+
+# Memoize a batch only if addresses in its first EMAIL_MEMO_SAMPLE items
+# appear at least EMAIL_MEMO_MIN_REPEAT times on average
+EMAIL_MEMO_SAMPLE = 4096
+EMAIL_MEMO_MIN_REPEAT = 2
+
+PASSWORD_REQUIREMENTS_MESSAGE = (
+    "Password must contain at least one uppercase letter, "
+    "one lowercase letter, one digit, and one special character"
+)
+
 def validate_email(email: str) -> Tuple[bool, str]:
     """
     Validate an email address format.
@@ -55,11 +78,110 @@ def validate_password(password: str) -> Tuple[bool, str]:
         return False, "Password must be at least 8 characters"
 
     if not PASSWORD_REGEX.match(password):
-        return False, (
-            "Password must contain at least one uppercase letter, "
-            "one lowercase letter, one digit, and one special character"
-        )
+        return False, PASSWORD_REQUIREMENTS_MESSAGE
 
     return True, ""
 
-__all__ = ['validate_email', 'validate_password']
+_EMAIL_VALID = (True, "")
+_EMAIL_INVALID = (False, "Invalid email format")
+_EMAIL_EMPTY = (False, "Email cannot be empty")
+
+class _EmailMemo:
+    """Two-generation memo of recent email results"""
+
+    def __init__(self, size):
+        self.size = size
+        self.current = {}
+        self.previous = {}
+
+    def rotate(self):
+        self.previous = self.current
+        self.current = {}
+
+    def clear(self):
+        self.current = {}
+        self.previous = {}
+
+_email_memo = _EmailMemo(EMAIL_CACHE_SIZE)
+
+def validate_emails(emails: Iterable[str]) -> List[Tuple[bool, str]]:
+    """
+    Validate many email addresses at once.
+
+    Results match validate_email item for item. When a batch repeats
+    addresses, results are memoized across calls so each address is
+    checked once; mostly-distinct batches skip the memo and its overhead.
+
+    Args:
+        emails (Iterable[str]): The email addresses to validate
+
+    Returns:
+        List[Tuple[bool, str]]: (is_valid, error_message) per email
+    """
+    emails = list(emails)
+    match = EMAIL_REGEX.match
+
+    sample = emails[:EMAIL_MEMO_SAMPLE]
+    if len(set(sample)) * EMAIL_MEMO_MIN_REPEAT > len(sample):
+        return [
+            (_EMAIL_VALID if match(email) else _EMAIL_INVALID) if email else _EMAIL_EMPTY
+            for email in emails
+        ]
+
+    memo = _email_memo
+    results = []
+    append = results.append
+    for email in emails:
+        result = memo.current.get(email)
+        if result is None:
+            result = memo.previous.get(email)
+            if result is None:
+                if not email:
+                    result = _EMAIL_EMPTY
+                else:
+                    result = _EMAIL_VALID if match(email) else _EMAIL_INVALID
+            if len(memo.current) >= memo.size:
+                memo.rotate()
+            memo.current[email] = result
+        append(result)
+    return results
+
+def _has_digit(password: str) -> bool:
+    # '\d' also matches non-ASCII decimal digits
+    return not PASSWORD_DIGITS.isdisjoint(password) or any(char.isdecimal() for char in password)
+
+def validate_passwords(passwords: Iterable[str]) -> List[Tuple[bool, str]]:
+    """
+    Validate many passwords at once.
+
+    Results match validate_password item for item. Instead of the four
+    lookaheads in PASSWORD_REGEX, each password is matched once against
+    the allowed characters and then checked for each required class.
+    Passwords are never memoized.
+
+    Args:
+        passwords (Iterable[str]): The passwords to validate
+
+    Returns:
+        List[Tuple[bool, str]]: (is_valid, error_message) per password
+    """
+    charset_match = PASSWORD_CHARSET_REGEX.match
+    lower, upper, special = PASSWORD_LOWER, PASSWORD_UPPER, PASSWORD_SPECIAL
+    results = []
+    append = results.append
+    for password in passwords:
+        if not password:
+            append((False, "Password cannot be empty"))
+        elif len(password) < 8:
+            append((False, "Password must be at least 8 characters"))
+        elif (charset_match(password) is None
+              or lower.isdisjoint(password)
+              or upper.isdisjoint(password)
+              or special.isdisjoint(password)
+              or not _has_digit(password)):
+            append((False, PASSWORD_REQUIREMENTS_MESSAGE))
+        else:
+            append((True, ""))
+    return results
+
+__all__ = ['validate_email', 'validate_emails', 'validate_password', 'validate_passwords']
@@ -6,15 +6,51 @@
 
 const BASE_URL = process.env.REACT_APP_API_BASE_URL || 'https://api.ai-insights-blog.com/v1';
 
+// Retry policy for idempotent reads: full-jitter exponential backoff
+const RETRY_BASE_DELAY_MS = 300;
+const RETRY_MAX_DELAY_MS = 8000;
+
+// Cache lifetimes per endpoint prefix (first match wins). Within `ttl` a
+// cached response is served as is; until `stale` it is served while a
+// background request revalidates it.
+const CACHE_POLICIES = [
+  { prefix: '/categories', ttl: 10 * 60 * 1000, stale: 60 * 60 * 1000 },
+  { prefix: '/authors', ttl: 5 * 60 * 1000, stale: 30 * 60 * 1000 },
+  { prefix: '/posts/featured', ttl: 2 * 60 * 1000, stale: 10 * 60 * 1000 },
+  { prefix: '/search', ttl: 30 * 1000, stale: 2 * 60 * 1000 },
+  { prefix: '/posts', ttl: 60 * 1000, stale: 5 * 60 * 1000 },
+];
+const DEFAULT_CACHE_POLICY = { ttl: 30 * 1000, stale: 2 * 60 * 1000 };
+const MAX_CACHE_ENTRIES = 200;
+
+// Least recently used entries first
+const responseCache = new Map();
+const inFlightRequests = new Map();
+const cacheStats = { hits: 0, staleHits: 0, misses: 0, notModified: 0, coalesced: 0, retries: 0 };
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const cachePolicyFor = (endpoint) =>
+  CACHE_POLICIES.find(({ prefix }) => endpoint.startsWith(prefix)) || DEFAULT_CACHE_POLICY;
+
+const isRetryable = (error) => !error.status || error.status === 429 || error.status >= 500;
+
+const retryDelay = (error, attempt) => {
+  const retryAfter = Number(error.retryAfter);
+  if (retryAfter > 0) return Math.min(retryAfter * 1000, RETRY_MAX_DELAY_MS);
+  return Math.random() * Math.min(RETRY_MAX_DELAY_MS, RETRY_BASE_DELAY_MS * 2 ** attempt);
+};
+
 /**
- * Makes an API call with proper error handling and headers
+ * Sends a request and returns the parsed body with its status and ETag
  * @param {string} endpoint - API endpoint (e.g., '/posts')
- * @param {string} method - HTTP method (GET, POST, PUT, DELETE)
+ * @param {string} method - HTTP method
  * @param {object} data - Request payload (optional)
  * @param {object} headers - Additional headers (optional)
- * @returns {Promise} - Resolves with response data or rejects with error
+ * @returns {Promise} - Resolves with { status, data, etag }; rejects with an
+ *   Error carrying `status` (absent for network errors) and `retryAfter`
  */
-export const apiCall = async (endpoint, method = 'GET', data = null, headers = {}) => {
+const sendRequest = async (endpoint, method = 'GET', data = null, headers = {}) => {
   const url = `${BASE_URL}${endpoint}`;
   const config = {
     method,
@@ -29,41 +65,216 @@ export const apiCall = async (endpoint, method = 'GET', data = null, headers = {
     config.body = JSON.stringify(data);
   }
 
-  try {
-    const response = await fetch(url, config);
+  const response = await fetch(url, config);
+  const etag = response.headers.get('ETag');
 
-    if (!response.ok) {
-      const errorData = await response.json().catch(() => ({}));
-      throw new Error(errorData.message || `API request failed with status ${response.status}`);
-    }
+  if (response.status === 304) {
+    return { status: 304, data: null, etag };
+  }
 
-    return await response.json();
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    const error = new Error(errorData.message || `API request failed with status ${response.status}`);
+    error.status = response.status;
+    error.retryAfter = response.headers.get('Retry-After');
+    throw error;
+  }
+
+  return { status: response.status, data: await response.json(), etag };
+};
+
+/**
+ * Makes an API call with proper error handling and headers
+ * @param {string} endpoint - API endpoint (e.g., '/posts')
+ * @param {string} method - HTTP method (GET, POST, PUT, DELETE)
+ * @param {object} data - Request payload (optional)
+ * @param {object} headers - Additional headers (optional)
+ * @returns {Promise} - Resolves with response data or rejects with error
+ */
+export const apiCall = async (endpoint, method = 'GET', data = null, headers = {}) => {
+  try {
+    const { data: body } = await sendRequest(endpoint, method, data, headers);
+    return body;
   } catch (error) {
     console.error('API call failed:', error);
     throw error;
   }
 };
 
+const storeResponse = (key, entry) => {
+  responseCache.delete(key);
+  responseCache.set(key, entry);
+  if (responseCache.size > MAX_CACHE_ENTRIES) {
+    responseCache.delete(responseCache.keys().next().value);
+  }
+};
+
+/**
+ * Fetches a GET endpoint with retries, revalidating the cached copy if any.
+ * Identical requests already in flight share one network request.
+ */
+const loadEndpoint = (key, endpoint, headers, retries) => {
+  const pending = inFlightRequests.get(key);
+  if (pending) {
+    cacheStats.coalesced += 1;
+    return pending;
+  }
+
+  const request = (async () => {
+    const cached = responseCache.get(key);
+    const requestHeaders = cached && cached.etag ? { ...headers, 'If-None-Match': cached.etag } : headers;
+
+    for (let attempt = 0; ; attempt += 1) {
+      try {
+        const { status, data, etag } = await sendRequest(endpoint, 'GET', null, requestHeaders);
+        const now = Date.now();
+        if (status === 304 && cached) {
+          cacheStats.notModified += 1;
+          storeResponse(key, { ...cached, fetchedAt: now });
+          return cached.data;
+        }
+        storeResponse(key, { data, etag, fetchedAt: now });
+        return data;
+      } catch (error) {
+        if (attempt >= retries || !isRetryable(error)) {
+          console.error('API call failed:', error);
+          throw error;
+        }
+        cacheStats.retries += 1;
+        await sleep(retryDelay(error, attempt));
+      }
+    }
+  })();
+
+  inFlightRequests.set(key, request);
+  const settle = () => inFlightRequests.delete(key);
+  request.then(settle, settle);
+  return request;
+};
+
 /**
- * Fetches data from the API with caching and retry logic
+ * Fetches data from the API with caching and retry logic.
+ *
+ * Fresh cached responses are returned without a request; stale ones are
+ * returned immediately and revalidated in the background with
+ * If-None-Match. Failed requests are retried with exponential backoff and
+ * jitter on network errors, 429 and 5xx responses.
  * @param {string} endpoint - API endpoint
- * @param {object} options - Fetch options
+ * @param {object} options - { headers, ttl, stale, force } where ttl/stale
+ *   (ms) override the endpoint's cache policy and force skips the cache
  * @param {number} retries - Number of retry attempts
- * @returns {Promise} - Resolves with fetched data
+ * @returns {Promise} - Resolves with fetched data (shared between callers;
+ *   do not mutate it)
  */
 export const fetchData = async (endpoint, options = {}, retries = 2) => {
-  try {
-    const response = await apiCall(endpoint, 'GET', null, options.headers);
-    return response;
-  } catch (error) {
-    if (retries > 0) {
-      console.log(`Retrying ${endpoint}... (${retries} attempts left)`);
-      return fetchData(endpoint, options, retries - 1);
+  const headers = options.headers || {};
+  const key = `${endpoint} ${JSON.stringify(headers)}`;
+  const policy = cachePolicyFor(endpoint);
+  const { ttl = policy.ttl, stale = policy.stale } = options;
+  const cached = responseCache.get(key);
+
+  if (cached && !options.force) {
+    const age = Date.now() - cached.fetchedAt;
+    if (age < ttl) {
+      cacheStats.hits += 1;
+      return cached.data;
+    }
+    if (age < Math.max(stale, ttl)) {
+      cacheStats.staleHits += 1;
+      loadEndpoint(key, endpoint, headers, retries).catch(() => {
+        // Keep serving the stale copy; the next call retries
+      });
+      return cached.data;
     }
-    throw error;
   }
+
+  cacheStats.misses += 1;
+  return loadEndpoint(key, endpoint, headers, retries);
+};
+
+/**
+ * Drops cached responses, e.g. after a write that changes them
+ * @param {string} prefix - Only drop endpoints starting with this (optional)
+ */
+export const invalidateCache = (prefix = '') => {
+  [...responseCache.keys()]
+    .filter((key) => key.startsWith(prefix))
+    .forEach((key) => responseCache.delete(key));
 };
 
+/**
+ * Returns cache counters and the share of reads answered from the cache
+ * @returns {object} - Counters plus hitRate (0-1) and cached entry count
+ */
+export const getCacheStats = () => {
+  const reads = cacheStats.hits + cacheStats.staleHits + cacheStats.misses;
+  return {
+    ...cacheStats,
+    entries: responseCache.size,
+    hitRate: reads ? (cacheStats.hits + cacheStats.staleHits) / reads : 0,
+  };
+};
+
+// Article views are batched client-side and sent in groups
+const VIEW_BATCH_SIZE = 20;
+const VIEW_FLUSH_INTERVAL_MS = 5000;
+let pendingViews = {};
+let pendingViewCount = 0;
+let viewFlushTimer = null;
+
+const takePendingViews = () => {
+  const views = Object.entries(pendingViews).map(([articleId, count]) => ({
+    articleId: Number(articleId),
+    count,
+  }));
+  pendingViews = {};
+  pendingViewCount = 0;
+  clearTimeout(viewFlushTimer);
+  viewFlushTimer = null;
+  return views;
+};
+
+/**
+ * Sends all queued article views in a single request
+ * @returns {Promise} - Resolves once the batch has been sent
+ */
+export const flushArticleViews = () => {
+  const views = takePendingViews();
+  if (!views.length) return Promise.resolve();
+
+  return apiCall('/analytics/views', 'POST', { views }).catch(() => {
+    // View tracking is best effort; never surface failures to the UI
+  });
+};
+
+/**
+ * Queues an article view, flushing when the batch is full or the timer fires
+ * @param {number} articleId - ID of the viewed article
+ * @returns {Promise} - Resolves immediately unless a flush is triggered
+ */
+const queueArticleView = (articleId) => {
+  pendingViews[articleId] = (pendingViews[articleId] || 0) + 1;
+  pendingViewCount += 1;
+
+  if (pendingViewCount >= VIEW_BATCH_SIZE) {
+    return flushArticleViews();
+  }
+  if (!viewFlushTimer) {
+    viewFlushTimer = setTimeout(flushArticleViews, VIEW_FLUSH_INTERVAL_MS);
+  }
+  return Promise.resolve();
+};
+
+// Deliver queued views when the page is hidden or closed
+if (typeof window !== 'undefined' && typeof navigator !== 'undefined' && navigator.sendBeacon) {
+  window.addEventListener('pagehide', () => {
+    const views = takePendingViews();
+    if (!views.length) return;
+    const payload = new Blob([JSON.stringify({ views })], { type: 'application/json' });
+    navigator.sendBeacon(`${BASE_URL}/analytics/views`, payload);
+  });
+}
+
 // Specific API methods for common endpoints
 export const api = {
   // Articles
@@ -71,21 +282,28 @@ export const api = {
   getArticleById: (id) => fetchData(`/posts/${id}`),
   getFeaturedArticles: () => fetchData('/posts/featured'),
   getRelatedArticles: (id) => fetchData(`/posts/${id}/related`),
-  searchArticles: (query) => fetchData(`/posts/search?query=${encodeURIComponent(query)}`),
+  searchArticles: (query, page = 1) => fetchData(`/search?${new URLSearchParams({ q: query, page })}`),
+  suggestSearchTerms: (prefix) => fetchData(`/search/suggest?q=${encodeURIComponent(prefix)}`),
 
   // Categories
   getCategories: () => fetchData('/categories'),
-  getArticlesByCategory: (categoryId) => fetchData(`/categories/${categoryId}/posts`),
+  getArticlesByCategory: (categoryId, params = {}) =>
+    fetchData(`/categories/${categoryId}/posts?${new URLSearchParams(params)}`),
 
   // Authors
-  getAuthors: () => fetchData('/authors'),
+  getAuthors: (params = {}) => fetchData(`/authors?${new URLSearchParams(params)}`),
   getAuthorById: (id) => fetchData(`/authors/${id}`),
 
   // Newsletter
   subscribeToNewsletter: (email) => apiCall('/newsletter/subscribe', 'POST', { email }),
 
   // Analytics
-  trackArticleView: (articleId) => apiCall('/analytics/view', 'POST', { articleId }),
+  trackArticleView: (articleId) => queueArticleView(articleId),
+  flushArticleViews,
+
+  // Client cache
+  invalidateCache,
+  getCacheStats,
 };
 
 export default api;
\ No newline at end of file